@@ -33,6 +33,24 @@ Additional Contributions by: Maxime Fleury
 2021-01-02:
     Implemented main function and args to start from command line
     Now outputs absolute and difference damage to excel (previously only absolute)
+2026-10-17:
+    Several input files and sheets per run (globs, sheet patterns, all sheets),
+    optionally evaluated in parallel worker processes
+    Optional on-disk result cache (--cache)
+    Statistics of the complete damage distribution (--complete, --thresholds)
+    Monte Carlo cross-check (--monte-carlo, --seed)
+    Calculation server with JSON-over-HTTP API (--server, --host)
+    Streaming batch mode from stdin to stdout (--stream, --stream-output,
+    --batch-size)
+    Columnar file output as Parquet, Arrow or .npz (--file-format)
+    Profiling report of every calculation stage (--profile, --profile-file,
+    --cprofile)
+    Build optimizer over a catalog of feats, buffs and weapon options
+    (--optimize, --top)
+    Expected damage against a weighted target table (--target-table)
+    Damage against every profile of a target profile table (--target-profiles)
+    Compact float32 results (--dtype) and chunked batch evaluation within a
+    memory limit (--memory-limit)
 """
 
 import sys
@@ -40,30 +58,89 @@ import numpy as np
 
 import inputWeapons as iw
 import sheet as sht
+import parallel as par
+import resultCache as rc
+import profiling as prf
 
 
 def main(args):
     # Default settings (can be overridden by input arguments)
     
-    # Names of input and output files
+    # Names of input and output files and format of the output file
+    # ("xlsx", "parquet", "arrow" or "npz")
     # inputFileName = "input_examples.xlsx"
     inputFileName = "input_test.xlsx"
     outputFileName = "output.xlsx"
+    outputFileFormat = "xlsx"
     
     # Name of the sheet that the program should use
     # (Numerical index or sheet name as string works)
     inputSheet = "Aargan"
     outputSheet = "Sheet0"
     
+    # Additional input files and sheets given by repeated -i/-is options or
+    # patterns. If more than one sheet results from these, every sheet gets its
+    # own output sheet and graph files, labelled with the sheet name.
+    inputFileNames = []
+    inputSheets = []
+    flagAllSheets = False
+    
+    # Number of worker processes for the evaluation of several sheets
+    workers = 1
+    
+    # File name of the on-disk result cache (None: no cache)
+    cacheFileName = None
+    
+    # Port and host address of the calculation server (None: no server)
+    serverPort = None
+    serverHost = "127.0.0.1"
+    
+    # Streaming batch mode: input and output format ("ndjson" or "csv",
+    # None: no streaming) and number of builds per batch
+    streamFormat = None
+    streamOutputFormat = None
+    batchSize = 1024
+    
+    # Build optimizer: JSON catalog file (None: no optimization) and number of
+    # printed builds (None: "top" of the catalog file)
+    optimizeFileName = None
+    optimizeTop = None
+    
+    # Profiling: console report, JSON report file and cProfile statistics file
+    flagProfile = False
+    profileFileName = None
+    cProfileFileName = None
+    
+    # CSV file of a weighted target table (None: no target table)
+    targetFileName = None
+    
+    # CSV file of a target profile table (None: no profile table)
+    targetProfileFileName = None
+    
+    # Floating point type of the damage arrays ("float64" or "float32") and
+    # memory limit in bytes for batch evaluations (None: no limit)
+    resultDtype = "float64"
+    memoryLimit = None
+    
     # AC range for the calculation, given in minimum and maximum value (default 10 and 40)
     minAC = 10
     maxAC = 40
     
     # Flags for desired output steps
-    flagOutputConsole = True
+    flagOutputConsole = False
     flagOutputFile = False
-    flagOutputGraphAbsolute = True
-    flagOutputGraphDifference = True
+    flagOutputGraphAbsolute = False
+    flagOutputGraphDifference = False
+    
+    # Statistics of the complete damage distribution (console and file output)
+    # and damage thresholds x for P(damage >= x)
+    flagOutputComplete = False
+    thresholds = ()
+    
+    # Number of full attacks for a Monte Carlo simulation (0: no simulation)
+    # and its random seed
+    simulationRounds = 0
+    seed = None
     
     # Graph titles and file names
     graphAbsoluteTitle = "Average Damage"
@@ -80,10 +157,48 @@ def main(args):
                 return
             elif a in ("-i", "--input-file"):
                 inputFileName = args[i+1]
+                inputFileNames.append(args[i+1])
             elif a in ("-o", "--output-file"):
                 outputFileName = args[i+1]
             elif a in ("-is", "--input-sheet"):
                 inputSheet = args[i+1]
+                inputSheets.append(args[i+1])
+            elif a in ("-as", "--all-sheets"):
+                flagAllSheets = True
+            elif a in ("-w", "--workers"):
+                workers = int(args[i+1])
+            elif a in ("-ca", "--cache"):
+                cacheFileName = args[i+1]
+            elif a in ("-sv", "--server"):
+                serverPort = int(args[i+1])
+            elif a in ("-ho", "--host"):
+                serverHost = args[i+1]
+            elif a in ("-st", "--stream"):
+                streamFormat = args[i+1]
+            elif a in ("-so", "--stream-output"):
+                streamOutputFormat = args[i+1]
+            elif a in ("-bs", "--batch-size"):
+                batchSize = int(args[i+1])
+            elif a in ("-op", "--optimize"):
+                optimizeFileName = args[i+1]
+            elif a in ("-tk", "--top"):
+                optimizeTop = int(args[i+1])
+            elif a in ("-tt", "--target-table"):
+                targetFileName = args[i+1]
+            elif a in ("-tp", "--target-profiles"):
+                targetProfileFileName = args[i+1]
+            elif a in ("-dt", "--dtype"):
+                resultDtype = args[i+1].lower()
+            elif a in ("-ml", "--memory-limit"):
+                memoryLimit = parseMemoryLimit(args[i+1])
+            elif a in ("-ff", "--file-format"):
+                outputFileFormat = args[i+1].lower()
+            elif a in ("-pr", "--profile"):
+                flagProfile = True
+            elif a in ("-pf", "--profile-file"):
+                profileFileName = args[i+1]
+            elif a in ("-pc", "--cprofile"):
+                cProfileFileName = args[i+1]
             elif a in ("-os", "--output-sheet"):
                 outputSheet = args[i+1]
             elif a in ("-mi", "--min-AC"):
@@ -98,6 +213,14 @@ def main(args):
                 flagOutputGraphAbsolute = True
             elif a in ("-d", "--graph-difference"):
                 flagOutputGraphDifference = True
+            elif a in ("-cp", "--complete"):
+                flagOutputComplete = True
+            elif a in ("-th", "--thresholds"):
+                thresholds = tuple(float(x) for x in args[i+1].split(","))
+            elif a in ("-mc", "--monte-carlo"):
+                simulationRounds = int(float(args[i+1]))
+            elif a in ("-sd", "--seed"):
+                seed = int(args[i+1])
             elif a in ("-ta", "--title-absolute"):
                 graphAbsoluteTitle = args[i+1]
             elif a in ("-td", "--title-difference"):
@@ -109,29 +232,284 @@ def main(args):
     except:
         print("Error parsing arguments. -h or --help for help.")
 
+    # Instrumented run: main() is run again with the instrumentation enabled,
+    # the report follows at the end
+    if ((flagProfile or profileFileName is not None or cProfileFileName is not None)
+        and not prf.isEnabled()):
+        prf.enable(cProfileFileName)
+        try:
+            main(args)
+        finally:
+            prf.disable()
+            print()
+            prf.printReport(records=flagProfile)
+            if profileFileName is not None:
+                prf.writeReport(profileFileName)
+        return
+    
     # Settings for the Numpy library concerning printing of arrays (mainly for
     # debugging purposes), suppression of scientific notation and setting precision
     # to max. 3 decimal places.
     np.set_printoptions(precision=3)
     np.set_printoptions(suppress=True)
     
+    # Result dtype and memory limit of the batch evaluations (streaming mode,
+    # optimizer and target tables)
+    if resultDtype not in ("float64", "float32"):
+        print("Unknown dtype {}, use 'float64' or 'float32'.".format(resultDtype))
+        return
+    import batch as bt
+    bt.setResultDtype(resultDtype)
+    bt.setMemoryLimit(memoryLimit)
+    
+    # Weighted target table, read once for every sheet
+    targetTable = None
+    if targetFileName is not None:
+        import targets as tg
+        targetTable = tg.readTargets(targetFileName)
+    profileTable = None
+    if targetProfileFileName is not None:
+        import targets as tg
+        profileTable = tg.readProfiles(targetProfileFileName)
+    
+    # Output settings for outputSheetData()
+    settings = {
+        "console": flagOutputConsole,
+        "file": flagOutputFile,
+        "fileFormat": outputFileFormat,
+        "outputFileName": outputFileName,
+        "graphAbsolute": flagOutputGraphAbsolute,
+        "graphDifference": flagOutputGraphDifference,
+        "complete": flagOutputComplete,
+        "thresholds": thresholds,
+        "simulationRounds": simulationRounds,
+        "seed": seed,
+        "targets": targetTable,
+        "profiles": profileTable,
+        "graphAbsoluteTitle": graphAbsoluteTitle,
+        "graphAbsoluteFileName": graphAbsoluteFileName,
+        "graphDifferenceTitle": graphDifferenceTitle,
+        "graphDifferenceFileName": graphDifferenceFileName,
+        }
+    
+    # Streaming batch mode: builds from stdin, results to stdout
+    if streamFormat is not None:
+        import stream as stm
+        stm.streamBuilds(sys.stdin, sys.stdout, streamFormat, streamOutputFormat,
+                         minAC, maxAC, batchSize)
+        return
+    
+    # Build optimizer: catalog from a JSON file, best builds to the console
+    if optimizeFileName is not None:
+        import optimizer as opt
+        opt.optimizeFile(optimizeFileName, minAC, maxAC, optimizeTop)
+        return
+    
     # Start of calculation execution
-    sheet = sht.Sheet(iw.readInput(inputFileName, inputSheet), minAC, maxAC)
+    cache = None
+    if cacheFileName is not None:
+        cache = rc.ResultCache(cacheFileName)
+    
+    # Server mode: no input file, builds are received as JSON
+    if serverPort is not None:
+        import server as srv
+        srv.serve(serverHost, serverPort, cache)
+        return
+    
+    jobs = par.expandJobs(inputFileNames or [inputFileName],
+                          inputSheets or [inputSheet], flagAllSheets)
+    
+    # Excel output goes to a single file with one output sheet per input sheet.
+    # Columnar formats write one file per input sheet.
+    writer = None
+    if flagOutputFile == True and outputFileFormat == "xlsx":
+        import pandas as pd
+        writer = pd.ExcelWriter(outputFileName)
+    
+    # A single sheet keeps the plain output sheet and graph file names
+    if len(jobs) == 1 and jobs[0] == (inputFileName, inputSheet):
+        sheet = sht.Sheet(iw.readInput(inputFileName, inputSheet), minAC, maxAC,
+                          cache, resultDtype)
+        outputSheetData(sheet, settings, writer, outputSheet)
+        if writer is not None:
+            writer.close()
+        return
+    
+    withFileName = len(set(job[0] for job in jobs)) > 1
+    results = par.calcSheets(jobs, minAC, maxAC, workers, cache, resultDtype)
+    
+    # Outputs of every sheet in the order of jobs.
+    usedSheetNames = []
+    for job, (sheet, error) in zip(jobs, results):
+        label = par.jobLabel(job, withFileName)
+        if error is not None:
+            print("Skipped {}: {}".format(label, error))
+            continue
+        
+        # Excel sheet names are limited to 31 characters and must be unique
+        sheetName = label[:31]
+        while sheetName in usedSheetNames:
+            sheetName = sheetName[:28] + "_" + str(len(usedSheetNames))
+        usedSheetNames.append(sheetName)
+        
+        print("*** {} ***".format(label))
+        outputSheetData(sheet, settings, writer, sheetName, label)
+    if writer is not None:
+        writer.close()
+
+
+def outputSheetData(sheet, settings, writer, outputSheet, label=None):
+    """
+    Produces the requested outputs of a single Sheet object.
+
+    Parameters
+    ----------
+    sheet : Sheet
+        Sheet object to output.
+    settings : dict
+        Output flags, graph titles and graph file names as set up by main().
+    writer : pandas.ExcelWriter or None
+        Open ExcelWriter of the output file, None if there is no file output.
+    outputSheet : str
+        Output sheet name. Statistics of the complete damage distribution go
+        to a second sheet with the suffix "-Complete".
+    label : str, optional
+        Label of the sheet which is added to graph titles and graph file
+        names. The default is None (no label).
+
+    Returns
+    -------
+    None.
+    
+    """
+    
+    graphAbsoluteTitle = settings["graphAbsoluteTitle"]
+    graphAbsoluteFileName = settings["graphAbsoluteFileName"]
+    graphDifferenceTitle = settings["graphDifferenceTitle"]
+    graphDifferenceFileName = settings["graphDifferenceFileName"]
+    if label is not None:
+        graphAbsoluteTitle += " - " + label
+        graphAbsoluteFileName = labelFileName(graphAbsoluteFileName, label)
+        graphDifferenceTitle += " - " + label
+        graphDifferenceFileName = labelFileName(graphDifferenceFileName, label)
     
     # Check output flags
-    if flagOutputConsole == True:
+    if settings["console"] == True:
         sheet.printData()
-    if flagOutputFile == True:
-        sheet.outputData(outputFileName=outputFileName, outputSheet=outputSheet)
-    if flagOutputGraphAbsolute == True:
+        if settings["complete"] == True:
+            sheet.printDataComplete(thresholds=settings["thresholds"])
+    if settings["file"] == True and settings["fileFormat"] != "xlsx":
+        fileName = columnarFileName(settings["outputFileName"], settings["fileFormat"])
+        if label is not None:
+            fileName = labelFileName(fileName, label)
+        sheet.outputColumnar(fileName, settings["fileFormat"])
+    elif settings["file"] == True:
+        sheet.outputData(outputFileName=writer, outputSheet=outputSheet)
+        if settings["complete"] == True:
+            sheet.outputDataComplete(outputFileName=writer,
+                                     outputSheet=outputSheet[:22] + "-Complete",
+                                     thresholds=settings["thresholds"])
+    if settings["graphAbsolute"] == True:
         sheet.graphAbsolute(fileName=graphAbsoluteFileName, graphTitle=graphAbsoluteTitle)
-    if flagOutputGraphDifference == True:
+    if settings["graphDifference"] == True:
         sheet.graphDifference(fileName=graphDifferenceFileName, graphTitle=graphDifferenceTitle)
     
     # If no other flag was set, print to console as if given -c.
-    if (flagOutputConsole == False and flagOutputFile == False and
-        flagOutputGraphAbsolute == False and flagOutputGraphDifference == False):
+    if (settings["console"] == False and settings["file"] == False and
+        settings["graphAbsolute"] == False and settings["graphDifference"] == False):
         sheet.printData()
+        if settings["complete"] == True:
+            sheet.printDataComplete(thresholds=settings["thresholds"])
+    
+    if settings["simulationRounds"] > 0:
+        sheet.printSimulation(settings["simulationRounds"], settings["seed"])
+    
+    if settings["targets"] is not None:
+        print()
+        sheet.printTargetExpectation(settings["targets"])
+    if settings["profiles"] is not None:
+        sheet.printProfiles(settings["profiles"])
+
+
+def parseMemoryLimit(text):
+    """
+    Converts a memory limit like "512M" or "2G" to bytes. The suffixes K, M
+    and G (optionally followed by B) are powers of 1024, numbers without
+    suffix are bytes.
+
+    Parameters
+    ----------
+    text : str
+        Memory limit.
+
+    Returns
+    -------
+    int
+        Memory limit in bytes.
+    
+    """
+    
+    text = text.strip().upper()
+    if text.endswith("B"):
+        text = text[:-1]
+    factor = 1
+    if text[-1:] in ("K", "M", "G"):
+        factor = 1024 ** ("KMG".index(text[-1]) + 1)
+        text = text[:-1]
+    return int(float(text) * factor)
+
+def columnarFileName(fileName, fileFormat):
+    """
+    Replaces the extension ".xlsx" of an output file name with the extension
+    of a columnar file format. Other extensions are kept.
+    Example: ("output.xlsx", "parquet") -> "output.parquet"
+
+    Parameters
+    ----------
+    fileName : str
+        Output file name.
+    fileFormat : str
+        "parquet", "arrow" or "npz".
+
+    Returns
+    -------
+    str
+        Output file name for the columnar format.
+    
+    """
+    
+    extensions = {"parquet": ".parquet", "arrow": ".arrow", "npz": ".npz"}
+    if fileFormat not in extensions:
+        raise ValueError("Unknown file format: " + fileFormat)
+    if fileName.lower().endswith(".xlsx"):
+        return fileName[:-5] + extensions[fileFormat]
+    return fileName
+
+
+def labelFileName(fileName, label):
+    """
+    Inserts a label into a file name in front of the file extension.
+    Example: ("graph.png", "Aargan") -> "graph_Aargan.png"
+
+    Parameters
+    ----------
+    fileName : str
+        Original file name.
+    label : str
+        Label to insert.
+
+    Returns
+    -------
+    str
+        Labelled file name.
+    
+    """
+    
+    label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+    if "." in fileName:
+        stem, extension = fileName.rsplit(".", 1)
+        return stem + "_" + label + "." + extension
+    return fileName + "_" + label
     
 
 def helptext():
@@ -153,10 +531,46 @@ def helptext():
           "Input file name/path. Default: 'input_examples.xlsx'")
     print("-o or --output-file".ljust(justLength) +
           "Output file name/path. Default: 'output.xlsx'")
+    print("-ff or --file-format".ljust(justLength) +
+          "Format of the output file: 'xlsx', 'parquet', 'arrow' or 'npz'. Default: 'xlsx'")
     print("-is or --input-sheet".ljust(justLength) +
           "Input sheet name or index. Default: 'Salvador'")
     print("-os or --output-sheet".ljust(justLength) +
           "Output sheet name. Default: 'Sheet0'")
+    print("-as or --all-sheets".ljust(justLength) +
+          "Use every sheet of the input file(s).")
+    print("-w or --workers".ljust(justLength) +
+          "Number of worker processes for several sheets. Default: 1")
+    print("-ca or --cache".ljust(justLength) +
+          "File name of the on-disk result cache. Default: no cache")
+    print("-sv or --server".ljust(justLength) +
+          "Start the calculation server on the given port (see server.py).")
+    print("-ho or --host".ljust(justLength) +
+          "Host address of the calculation server. Default: '127.0.0.1'")
+    print("-st or --stream".ljust(justLength) +
+          "Read builds from stdin ('ndjson' or 'csv', see stream.py), results to stdout.")
+    print("-so or --stream-output".ljust(justLength) +
+          "Output format of the streaming mode. Default: same as --stream")
+    print("-bs or --batch-size".ljust(justLength) +
+          "Number of builds per batch in the streaming mode. Default: 1024")
+    print("-op or --optimize".ljust(justLength) +
+          "Find the best builds of a JSON modifier catalog (see optimizer.py).")
+    print("-tk or --top".ljust(justLength) +
+          "Number of builds printed by --optimize. Default: 'top' of the catalog or 10")
+    print("-tt or --target-table".ljust(justLength) +
+          "Expected damage vs. a weighted target table CSV (see targets.py).")
+    print("-tp or --target-profiles".ljust(justLength) +
+          "Damage vs. every profile of a target profile CSV (see targets.py).")
+    print("-dt or --dtype".ljust(justLength) +
+          "Floating point type of the results: 'float64' or 'float32'. Default: 'float64'")
+    print("-ml or --memory-limit".ljust(justLength) +
+          "Memory limit of batch evaluations, e.g. '512M' or '2G'. Default: no limit")
+    print("-pr or --profile".ljust(justLength) +
+          "Print the time of every calculation stage and details of every weapon.")
+    print("-pf or --profile-file".ljust(justLength) +
+          "Write the profiling report to the given JSON file.")
+    print("-pc or --cprofile".ljust(justLength) +
+          "Write cProfile statistics to the given file (pstats, snakeviz, ...).")
     print("-mi or --min-AC".ljust(justLength) +
           "Minimum AC for calculation. Default: 10")
     print("-ma or --max-AC".ljust(justLength) +
@@ -165,12 +579,25 @@ def helptext():
     print("-f or --file-output".ljust(justLength) + "Numerical output to file.")
     print("-a or --graph-absolute".ljust(justLength) + "Create and save graph of damage values.")
     print("-d or --graph-difference".ljust(justLength) + "Create and save graph of damage differences.")
+    print("-cp or --complete".ljust(justLength) +
+          "Add statistics of the complete damage distribution to console/file output.")
+    print("-th or --thresholds".ljust(justLength) +
+          "Comma separated damage values x for P(damage >= x), e.g. '50,100'.")
+    print("-mc or --monte-carlo".ljust(justLength) +
+          "Number of full attacks for a Monte Carlo cross-check, e.g. 1e6.")
+    print("-sd or --seed".ljust(justLength) + "Random seed of the Monte Carlo simulation.")
     print("-ta or --title-absolute".ljust(justLength) + "Title of damage graph.")
     print("-td or --title-difference".ljust(justLength) + "Title of difference graph.")
     print("-fa or --file-absolute".ljust(justLength) + "File name of damage graph.")
     print("-fd or --file-difference".ljust(justLength) + "File name of difference graph.")
     print()
     print("If no output option (-c, -f, -a, -d) is given, the program defaults to console output as if given -c.")
+    print()
+    print("-i and -is can be given several times and accept patterns like '*.xlsx' or 'Irgwi*'.")
+    print("If more than one sheet is selected, every sheet gets its own output sheet")
+    print("and graph files, which are labelled with the sheet name.")
+    print("Columnar formats (parquet, arrow, npz) write one file per sheet with absolute and")
+    print("difference columns, --complete statistics are only written to xlsx files.")
 
 if __name__ == "__main__":
     main(sys.argv[1:])
\ No newline at end of file
@@ -6,10 +6,23 @@ An attack consists of one or several weapons.
 
 *** Recent Changes: ***
 2020-12-29: Translated comments to English
+2026-10-17: Added optional on-disk result cache
+    Added calcDistribution() for the complete damage distribution
+    Added simulate() for Monte Carlo simulations
+    Added setACRange() and updateWeapon() for incremental recalculation
+    Results array is preallocated instead of appended column by column
+    Added labeledResults()
+    Added instrumentation for profiling.py
+    The full attack damage is stored once as self.damage, optionally as a
+    column of the Sheet damage array. self.results is assembled on demand
+    from self.damage and the damage arrays of the weapons.
 """
 
 import numpy as np
 import weapon as wp
+import damageDistribution as dd
+import simulation as sm
+import profiling as prf
 
 class Attack:
     """
@@ -17,7 +30,9 @@ class Attack:
     It summarizes the damage information and provides easier access.
     """
     
-    def __init__(self, dfWeapons, name, minAC, maxAC):
+    @prf.timed("attack")
+    def __init__(self, dfWeapons, name, minAC, maxAC, cache=None,
+                 dtype=np.float64, out=None):
         """
         The constructor takes a list of weapon DataFrames and the upper and
         lower bounds of the target AC for all weapon calculations. It creates
@@ -27,14 +42,25 @@ class Attack:
         Parameters
         ----------
         dfWeapons : list
-            List of pandas.DataFrame objects which contain the properties of 
-            an entire column of weapons, where each weapon is a DataFrame.
+            List of weapons of an entire column, where each weapon is a block
+            of input cells (np.array or pandas.DataFrame) or a
+            weaponSpec.WeaponSpec.
         name : str
             Name of the attack as defined in the input file
         minAC : int
             Lower limit of target AC for calculations.
         maxAC : int
             Upper limit of target AC for calculations.
+        cache : resultCache.ResultCache, optional
+            On-disk result cache passed on to every Weapon. The default is None.
+        dtype : numpy dtype, optional
+            Floating point type of self.damage and of the damage arrays of the
+            weapons. The full attack damage is summed in float64 and rounded
+            once. The default is np.float64.
+        out : np.array, optional
+            Array of length maxAC-minAC+1 which takes the full attack damage,
+            e.g. a column of the Sheet damage array. The default is None
+            (a new array is allocated).
 
         Returns
         -------
@@ -43,19 +69,45 @@ class Attack:
         """
         
         self.name = name
+        self.dtype = np.dtype(dtype)
         self.weapons = []
         # Create a new Weapon object for every weapon DataFrame in dfWeapons.
         for weapon in dfWeapons:
-            self.weapons.append(wp.Weapon(weapon, minAC, maxAC))
+            self.weapons.append(wp.Weapon(weapon, minAC, maxAC, cache, self.dtype))
         
         self.minAC = minAC
         self.maxAC = maxAC
         self.acRange = np.arange(minAC, maxAC+1).transpose()
-        self.results = np.arange(minAC, maxAC+1).transpose()
         
-        self.results = np.c_[self.results, np.zeros((self.results.shape[0],1))]
+        # Complete damage distribution, only calculated on demand by
+        # calcDistribution()
+        self.distribution = None
         
+        self.damage = self.allocateDamage(out)
         self.calcFullAttack()
+    
+    def allocateDamage(self, out=None):
+        """
+        Returns the array for the full attack damage.
+
+        Parameters
+        ----------
+        out : np.array, optional
+            Array which takes the full attack damage. The default is None
+            (a new array is allocated).
+
+        Returns
+        -------
+        np.array
+            Array of the size of self.acRange.
+
+        """
+        
+        if out is None:
+            return np.zeros(self.acRange.size, dtype=self.dtype)
+        if out.shape != self.acRange.shape:
+            raise ValueError("Damage array does not match the AC range")
+        return out
             
     def listWeapons(self):
         """
@@ -94,18 +146,92 @@ class Attack:
         Returns
         -------
         np.array
-            Full results array.
+            Full results array, see self.results.
 
         """
         
         return self.results
     
+    @property
+    def results(self):
+        """
+        Results array of the full attack: column 0 contains the target ACs,
+        column 1 the average damage of the full attack (self.damage) and
+        every column thereafter the average full attack damage of one weapon
+        in the order which is maintained in self.weapons.
+        The array is assembled on every access and does not share its memory
+        with self.damage or the weapons.
+
+        Returns
+        -------
+        results : np.array
+            Full results array.
+
+        """
+        
+        results = np.zeros((self.acRange.size, len(self.weapons)+2))
+        results[:,0] = self.acRange
+        results[:,1] = self.damage
+        for i, w in enumerate(self.weapons):
+            results[:,i+2] = w.attackResults[:,0]
+        return results
+    
     def calcFullAttack(self):
         """
-        Calculates the average damage of a full attack. This includes every weapon
-        with every BAB entry. The result appears in column 1 (second column) of
-        the results array. Every column thereafter is the average full attack
-        damage of one weapon in the order which is maintained in self.weapons.
+        Calculates the average damage of a full attack. This includes every
+        weapon with every BAB entry. The weapon damage is summed in float64 and
+        the result is written to self.damage, the damage of the single weapons
+        stays in their attackResults arrays.
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        with prf.stage("calcFullAttack", attack=self.name,
+                       weapons=len(self.weapons)) as record:
+            damage = np.zeros(self.acRange.size)
+            for w in self.weapons:
+                damage += w.attackResults[:,0]
+            self.damage[:] = damage
+            record["arrayBytes"] = self.damage.nbytes
+    
+    def labeledResults(self):
+        """
+        Labeled results with the target AC as index and "Full Attack" and the
+        weapon names as column index, see self.results.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Labeled results.
+
+        """
+        
+        import pandas as pd
+        
+        columns = pd.Index(["Full Attack"] + [w.name for w in self.weapons],
+                           name="Weapon")
+        data = np.column_stack([self.damage] + [w.attackResults[:,0] for w in self.weapons])
+        return pd.DataFrame(data, index=pd.Index(self.acRange, name="AC"),
+                            columns=columns, copy=False)
+    
+    def setACRange(self, minAC, maxAC, out=None):
+        """
+        Changes the AC range of the attack and all of its weapons. The average
+        damage per hit and per critical hit of the weapons is kept, only the
+        damage arrays are recalculated.
+
+        Parameters
+        ----------
+        minAC : int
+            Lower limit of target AC for calculations.
+        maxAC : int
+            Upper limit of target AC for calculations.
+        out : np.array, optional
+            Array which takes the full attack damage, see __init__().
+            The default is None (a new array is allocated).
 
         Returns
         -------
@@ -114,5 +240,79 @@ class Attack:
         """
         
         for w in self.weapons:
-            self.results = np.c_[self.results, w.attackResults[:,0]]
-            self.results[:,1] += w.attackResults[:,0]
+            w.setACRange(minAC, maxAC)
+        
+        self.minAC = minAC
+        self.maxAC = maxAC
+        self.acRange = np.arange(minAC, maxAC+1).transpose()
+        self.distribution = None
+        
+        self.damage = self.allocateDamage(out)
+        self.calcFullAttack()
+    
+    def updateWeapon(self, index, **changes):
+        """
+        Changes parameters of a single weapon and only recalculates this
+        weapon and the full attack sum.
+
+        Parameters
+        ----------
+        index : int
+            Index of the weapon in self.weapons.
+        **changes
+            New parameter values, see Weapon.setParameters().
+
+        Returns
+        -------
+        None.
+
+        """
+        
+        self.weapons[index].setParameters(**changes)
+        self.calcFullAttack()
+        self.distribution = None
+    
+    @prf.timed("calcDistribution")
+    def calcDistribution(self):
+        """
+        Calculates the complete damage distribution of a full attack with every
+        weapon and every BAB entry for every target AC. The result is stored
+        in self.distribution for later use.
+
+        Returns
+        -------
+        damageDistribution.DamageDistribution
+            Damage distribution of the full attack.
+
+        """
+        
+        if self.distribution is None:
+            self.distribution = dd.DamageDistribution(self.weapons, self.minAC,
+                                                      self.maxAC)
+        return self.distribution
+    
+    @prf.timed("simulate")
+    def simulate(self, rounds=1000000, seed=None, rend=None):
+        """
+        Runs a Monte Carlo simulation of the full attack with every weapon
+        and every BAB entry for every target AC.
+
+        Parameters
+        ----------
+        rounds : int, optional
+            Number of simulated full attacks per AC. The default is 1000000.
+        seed : int, optional
+            Seed of the random number generator. The default is None.
+        rend : tuple, optional
+            (hits, dice, damage) of a rend-like ability, see
+            simulation.Simulation. The default is None.
+
+        Returns
+        -------
+        simulation.Simulation
+            Simulation results.
+
+        """
+        
+        return sm.Simulation(self.weapons, self.minAC, self.maxAC, rounds, seed,
+                             rend=rend)
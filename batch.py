@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+
+"""
+batch.py provides the batch evaluation of many weapon variants for damage-calc.
+
+Instead of one Weapon object per variant, the weapon parameters are passed as
+a struct of arrays (dict of equally long sequences or a pandas.DataFrame with
+one row per variant) and the full attack damage of every variant is computed
+as a single (variant x AC) array operation.
+
+The parameter names are the same as the Weapon attributes, with fortification
+and failChance given as fractions (0 to 1) like in Weapon. Every parameter
+that is missing takes the default from DEFAULTS. Dice parameters accept a
+list of dice tuples like Weapon.baseDice, a dice expression like "2d6+1d8"
+or one of those per variant. baseAttacks accepts a list of BAB penalties
+that is shared by all variants or one such list per variant, which may differ
+in length (e.g. variants with and without haste).
+
+*** Recent Changes: ***
+2026-10-17: First Version
+2026-10-17: Added calcBatchAC() for arbitrary AC arrays, variants with
+    shared dice pools are grouped without a Python loop
+2026-10-17: calcBatchAC() accepts target ACs per variant, repeated dice
+    entries are converted once
+2026-10-17: Roll bonuses and threat ranges are passed as integers to the
+    chance tables of probability.py
+2026-10-17: Added setMemoryLimit() and setResultDtype(): calcBatchAC()
+    evaluates the variants in chunks which keep the (variant x attack x AC)
+    temporaries below the memory limit and returns results in the result dtype
+    or the dtype passed to calcBatch() and calcBatchAC()
+2026-10-17: Fortification is calculated as exact mixture like in Weapon
+"""
+
+import numpy as np
+import dice as dc
+import probability as pr
+
+# Default values of every batch parameter
+DEFAULTS = {
+    "baseDice": [],
+    "baseAttacks": [0],
+    "attackBonus": 0,
+    "damageBonus": 0,
+    "critRange": 20,
+    "critMultiplier": 2,
+    "critConfirmBonus": 0,
+    "precisionDice": [],
+    "precisionDamage": 0,
+    "extraDice": [],
+    "extraCritDice": [],
+    "extraDamage": 0,
+    "extraCritDamage": 0,
+    "fortification": 0.,
+    "precImmunity": 0,
+    "failChance": 0.,
+    "damageReduction": 0,
+    }
+
+# Parameters which hold dice and can not be stored as plain numerical arrays
+DICE_PARAMETERS = ("baseDice", "precisionDice", "extraDice", "extraCritDice")
+
+# Approximate number of 8-byte (variant x attack x AC) temporaries that
+# calcBatchAC() holds at the same time, used to size the chunks
+TEMPORARIES = 8
+
+# Memory limit in bytes for the temporaries of calcBatchAC(), None for no
+# limit, see setMemoryLimit()
+memoryLimit = None
+
+# Data type of the result arrays of calcBatchAC(), see setResultDtype()
+resultDtype = np.dtype(np.float64)
+
+
+def setMemoryLimit(limit=None):
+    """
+    Sets the memory limit for the temporaries of calcBatchAC(). Larger
+    batches are evaluated in chunks of variants. The results array itself is
+    not part of the limit.
+
+    Parameters
+    ----------
+    limit : int or None, optional
+        Memory limit in bytes, None for no limit. The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    global memoryLimit
+    memoryLimit = None if limit is None else int(limit)
+
+def setResultDtype(dtype=np.float64):
+    """
+    Sets the data type of the result arrays of calcBatchAC(). The
+    calculation itself always runs in float64, np.float32 halves the size of
+    large result arrays.
+
+    Parameters
+    ----------
+    dtype : numpy dtype, optional
+        Floating point type of the results. The default is np.float64.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    global resultDtype
+    resultDtype = np.dtype(dtype)
+
+def chunkRows(attacks, acs, limit=None):
+    """
+    Number of variants per chunk whose (variant x attack x AC) temporaries
+    stay below the memory limit.
+
+    Parameters
+    ----------
+    attacks : int
+        Number of attacks per variant (including padding).
+    acs : int
+        Number of target ACs per variant.
+    limit : int, optional
+        Memory limit in bytes. The default is None (the module setting
+        memoryLimit).
+
+    Returns
+    -------
+    rows : int or None
+        Variants per chunk, at least 1. None if there is no memory limit.
+
+    """
+
+    if limit is None:
+        limit = memoryLimit
+    if limit is None:
+        return None
+    return max(1, int(limit) // (max(1, attacks) * max(1, acs) * 8 * TEMPORARIES))
+
+
+def batchSize(variants):
+    """
+    Determines the number of variants of a batch from its longest
+    per-variant parameter.
+
+    Parameters
+    ----------
+    variants : dict or pandas.DataFrame
+        Batch parameters.
+
+    Returns
+    -------
+    n : int
+        Number of variants.
+
+    """
+
+    n = 1
+    for key in variants.keys():
+        value = variants[key]
+        if key in DICE_PARAMETERS or key == "baseAttacks":
+            if not isPerVariant(key, value):
+                continue
+        elif np.ndim(value) == 0:
+            continue
+        n = max(n, len(value))
+    return n
+
+def isPerVariant(key, value):
+    """
+    Checks whether a dice or baseAttacks parameter is given once per variant
+    or shared by all variants.
+
+    Parameters
+    ----------
+    key : str
+        Parameter name.
+    value : object
+        Parameter value.
+
+    Returns
+    -------
+    bool
+        True if value contains one entry per variant.
+
+    """
+
+    if isinstance(value, str):
+        return False
+    if key != "baseAttacks" and getattr(value, "dtype", None) == object:
+        return True
+    value = list(value)
+    if len(value) == 0:
+        return False
+    if key == "baseAttacks":
+        return np.ndim(value[0]) > 0
+    # Shared dice are either a list of dice tuples or a dice expression
+    first = value[0]
+    return isinstance(first, str) or np.ndim(first) > 1 or (
+        np.ndim(first) == 1 and (len(first) == 0 or np.ndim(first[0]) > 0))
+
+def toDiceTuples(value):
+    """
+    Converts a single dice parameter to the tuple notation of Weapon.
+
+    Parameters
+    ----------
+    value : str or list
+        Dice expression or list of dice tuples.
+
+    Returns
+    -------
+    tuple
+        Tuple of (number, sides) tuples.
+
+    """
+
+    if isinstance(value, str):
+        value = dc.parseDice(value)
+    elif value is None or (np.ndim(value) == 0 and value != value):
+        # Missing entries (e.g. NaN in a DataFrame) mean no dice
+        value = []
+    return tuple((int(t[0]), int(t[1])) for t in value)
+
+def diceColumn(variants, key, n):
+    """
+    Returns the dice parameter key as a list with one tuple of dice tuples per
+    variant. Repeated hashable entries (dice expressions or tuples, e.g. the
+    dice of a weapon paired with many targets) are converted only once.
+
+    Parameters
+    ----------
+    variants : dict or pandas.DataFrame
+        Batch parameters.
+    key : str
+        Name of the dice parameter.
+    n : int
+        Number of variants.
+
+    Returns
+    -------
+    list
+        Dice tuples of every variant.
+
+    """
+
+    value = variants[key] if key in variants.keys() else DEFAULTS[key]
+    if isPerVariant(key, value):
+        converted = {}
+        column = []
+        for v in value:
+            try:
+                tuples = converted[v]
+            except KeyError:
+                tuples = converted[v] = toDiceTuples(v)
+            except TypeError:
+                tuples = toDiceTuples(v)
+            column.append(tuples)
+        return column
+    return [toDiceTuples(value)] * n
+
+def numericColumn(variants, key, n, dtype=float):
+    """
+    Returns the numerical parameter key as an np.array of length n.
+
+    Parameters
+    ----------
+    variants : dict or pandas.DataFrame
+        Batch parameters.
+    key : str
+        Name of the parameter.
+    n : int
+        Number of variants.
+    dtype : type, optional
+        Data type of the returned array. The default is float.
+
+    Returns
+    -------
+    np.array
+        Parameter value for every variant.
+
+    """
+
+    value = variants[key] if key in variants.keys() else DEFAULTS[key]
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (n,))
+
+def babMatrix(variants, n):
+    """
+    Converts baseAttacks to a (variant x attack) matrix and a mask of the same
+    shape, which is False for padding entries of variants with fewer attacks.
+
+    Parameters
+    ----------
+    variants : dict or pandas.DataFrame
+        Batch parameters.
+    n : int
+        Number of variants.
+
+    Returns
+    -------
+    bab : np.array
+        BAB penalties, padded with zeros.
+    mask : np.array
+        Boolean array marking actual attacks.
+
+    """
+
+    value = variants["baseAttacks"] if "baseAttacks" in variants.keys() else DEFAULTS["baseAttacks"]
+    if not isPerVariant("baseAttacks", value):
+        bab = np.broadcast_to(np.asarray(value, dtype=int), (n, len(value)))
+        return bab, np.ones(bab.shape, dtype=bool)
+
+    value = list(value)
+    width = max(len(b) for b in value)
+    bab = np.zeros((n, width), dtype=int)
+    mask = np.zeros((n, width), dtype=bool)
+    for i, b in enumerate(value):
+        bab[i, :len(b)] = b
+        mask[i, :len(b)] = True
+    return bab, mask
+
+def listDice(*diceTuples):
+    """
+    Generates a sorted list of all damage dice of the given dice tuples.
+
+    Parameters
+    ----------
+    *diceTuples : tuple
+        Any number of tuples of dice tuples.
+
+    Returns
+    -------
+    list
+        Sorted dice list in the form of [x, ..., x, y, ..., y, ...].
+
+    """
+
+    diceList = []
+    for tuples in diceTuples:
+        for t in tuples:
+            diceList += [t[1]] * t[0]
+    return sorted(diceList)
+
+def groupVariants(keys):
+    """
+    Groups the variants by a hashable key, e.g. their dice pool, so that every
+    group only needs to be evaluated once.
+
+    Parameters
+    ----------
+    keys : list
+        Hashable key of every variant.
+
+    Returns
+    -------
+    groups : dict
+        Dictionary which maps every distinct key to an np.array with the
+        indices of its variants.
+
+    """
+
+    groups = {}
+    for i, k in enumerate(keys):
+        groups.setdefault(k, []).append(i)
+    return {k: np.array(index) for k, index in groups.items()}
+
+def calcAverageDamage(variants, n=None):
+    """
+    Calculates the average damage per normal hit and per critical hit of every
+    variant in the same way as Weapon.calcDamageHit() and
+    Weapon.calcDamageCrit(). Variants with the same dice pools are evaluated
+    together by dice.averageDamageArray().
+
+    Parameters
+    ----------
+    variants : dict or pandas.DataFrame
+        Batch parameters.
+    n : int, optional
+        Number of variants. Determined from variants if not given.
+
+    Returns
+    -------
+    avgDamageHit : np.array
+        Average damage per normal hit of every variant.
+    avgDamageCrit : np.array
+        Average damage per critical hit of every variant.
+
+    """
+
+    if n is None:
+        n = batchSize(variants)
+    col = lambda key: numericColumn(variants, key, n)
+    critMultiplier = numericColumn(variants, "critMultiplier", n, dtype=int)
+    notImmune = col("precImmunity") == 0
+
+    # Overall damage bonus for normal and critical hits, see Weapon.__init__
+    damageHit = (col("damageBonus") + col("extraDamage")
+                 + col("precisionDamage") * notImmune)
+    damageCrit = (col("damageBonus") * critMultiplier + col("precisionDamage")
+                  + col("extraDamage") + col("extraCritDamage")
+                  + col("precisionDamage") * notImmune)
+    damageReduction = col("damageReduction")
+    fortification = col("fortification")
+
+    if any(isPerVariant(key, variants[key]) for key in DICE_PARAMETERS
+           if key in variants.keys()):
+        keys = zip(*[diceColumn(variants, key, n) for key in DICE_PARAMETERS],
+                   critMultiplier, notImmune)
+        groups = groupVariants(keys)
+    else:
+        # Shared dice pools only differ by crit multiplier and immunity,
+        # which are grouped without a loop over the variants
+        dice = tuple(diceColumn(variants, key, 1)[0] for key in DICE_PARAMETERS)
+        codes, inverse = np.unique(critMultiplier * 2 + notImmune,
+                                   return_inverse=True)
+        groups = {dice + (int(c) // 2, bool(c % 2)): np.flatnonzero(inverse == i)
+                  for i, c in enumerate(codes)}
+
+    avgDamageHit = np.zeros(n)
+    avgDamageCrit = np.zeros(n)
+    for key, index in groups.items():
+        baseDice, precisionDice, extraDice, extraCritDice, multiplier, vulnerable = key
+        precision = precisionDice if vulnerable else ()
+        diceHit = listDice(baseDice, precision, extraDice)
+        diceCrit = listDice(baseDice * multiplier, precision, extraDice,
+                            extraCritDice)
+
+        avgDamageHit[index] = dc.averageDamageArray(
+            diceHit, damageHit[index], damageReduction[index])
+        avgDamageCrit[index] = dc.averageDamageArray(
+            diceCrit, damageCrit[index], damageReduction[index])
+
+        # Fortification nullifies precision damage dice (not flat bonuses):
+        # mixture with the hits without them, see Weapon.calcDamageHit()
+        fort = fortification[index]
+        fortified = fort != 0
+        if len(precision) > 0 and fortified.any():
+            index, fort = index[fortified], fort[fortified]
+            avgDamageHit[index] = (1 - fort) * avgDamageHit[index] + fort * dc.averageDamageArray(
+                listDice(baseDice, extraDice), damageHit[index], damageReduction[index])
+            avgDamageCrit[index] = (1 - fort) * avgDamageCrit[index] + fort * dc.averageDamageArray(
+                listDice(baseDice * multiplier, extraDice, extraCritDice),
+                damageCrit[index], damageReduction[index])
+
+    return avgDamageHit, avgDamageCrit
+
+def calcBatch(variants, minAC=10, maxAC=40, dtype=None):
+    """
+    Calculates the average full attack damage of every variant for every
+    target AC in the given AC range.
+
+    Parameters
+    ----------
+    variants : dict or pandas.DataFrame
+        Batch parameters, see module docstring.
+    minAC : int, optional
+        Lower limit of target AC for calculations.
+    maxAC : int, optional
+        Upper limit of target AC for calculations.
+    dtype : numpy dtype, optional
+        Floating point type of the results. The default is None (the
+        result dtype, see setResultDtype()).
+
+    Returns
+    -------
+    results : np.array
+        (variant x AC) array with the average full attack damage.
+
+    """
+
+    return calcBatchAC(variants, np.arange(minAC, maxAC+1), dtype)
+
+def calcBatchAC(variants, acArray, dtype=None):
+    """
+    Calculates the average full attack damage of every variant for every
+    target AC of an arbitrary AC array, e.g. the support of an AC
+    distribution. If a memory limit is set (see setMemoryLimit()), the
+    variants are evaluated in chunks.
+
+    Parameters
+    ----------
+    variants : dict or pandas.DataFrame
+        Batch parameters, see module docstring.
+    acArray : np.array
+        Target ACs shared by all variants, or a (variant x AC) array with the
+        target ACs of every variant.
+    dtype : numpy dtype, optional
+        Floating point type of the results, e.g. np.float64 for results
+        which are summed before they are stored. The default is None (the
+        result dtype, see setResultDtype()).
+
+    Returns
+    -------
+    results : np.array
+        (variant x AC) array with the average full attack damage.
+
+    """
+
+    n = batchSize(variants)
+    col = lambda key: numericColumn(variants, key, n)[:, np.newaxis, np.newaxis]
+    intCol = lambda key: numericColumn(variants, key, n, dtype=int)[:, np.newaxis, np.newaxis]
+    avgDamageHit, avgDamageCrit = calcAverageDamage(variants, n)
+    bab, mask = babMatrix(variants, n)
+    acArray = np.asarray(acArray)
+    if acArray.ndim == 2:
+        acArray = np.broadcast_to(acArray[:, np.newaxis, :], (n, 1, acArray.shape[1]))
+    else:
+        acArray = acArray[np.newaxis, np.newaxis, :]
+    attackBonus, critConfirmBonus, critRange = (intCol("attackBonus"),
+        intCol("critConfirmBonus"), intCol("critRange"))
+    failChance, fortification = col("failChance"), col("fortification")
+    avgDamageHit = avgDamageHit[:, np.newaxis, np.newaxis]
+    avgDamageCrit = avgDamageCrit[:, np.newaxis, np.newaxis]
+    bab = bab[:, :, np.newaxis]
+    mask = mask[:, :, np.newaxis]
+
+    results = np.empty((n, acArray.shape[-1]),
+                       dtype=resultDtype if dtype is None else dtype)
+    rows = chunkRows(bab.shape[1], acArray.shape[-1]) or max(n, 1)
+    for start in range(0, n, rows):
+        part = slice(start, start+rows)
+        ac = acArray[part] if acArray.shape[0] > 1 else acArray
+
+        # (variant x attack x AC) chances, summed over the attacks. Roll
+        # bonuses and threat ranges are integers, which index the chance
+        # tables directly.
+        hitChances, critChances = pr.attackChances(
+            attackBonus[part], critConfirmBonus[part], bab[part], ac,
+            critRange[part], failChance[part], fortification[part])
+        damage = pr.expectedDamage(avgDamageHit[part], avgDamageCrit[part],
+                                   hitChances, critChances)
+        results[part] = np.sum(damage * mask[part], axis=1)
+    return results
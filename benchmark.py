@@ -0,0 +1,859 @@
+# -*- coding: utf-8 -*-
+
+"""
+benchmark.py provides performance benchmarks for damage-calc.
+
+Start via "python benchmark.py <optional parameters>" from this folder. The
+program exits with a non-zero status if a benchmark exceeds its limit or got
+slower than in the benchmark history.
+
+The benchmarks use synthetic workloads:
+- dicePool: calcDamageHit()/calcDamageCrit() for growing dice pools, without
+  damage reduction and with damage reduction above the minimum roll
+- acSweep: hitChance()/critChance() of every attack for growing AC ranges
+- wideSheet: Sheet construction with growing numbers of attacks
+- readInput: readInput() and readInputWeapons() on generated workbooks
+- output: outputData(), outputColumnar() and the graph functions
+- d20Tables: hit and critical hit chances of wide (variant x attack x AC)
+  sweeps from the lookup tables of probability.attackChances(), next to the
+  closed-form arithmetic that they replaced
+- optimizer: build optimizer search over growing modifier catalogs, up to
+  2^20 combinations
+- batchMemory: batch.calcBatch() of large (variant x AC) sweeps without
+  memory limit in float64 and chunked within a memory limit in float32
+- distribution: complete damage distribution of full attacks against
+  fortified targets with damage reduction; fails if its mean differs from
+  the average damage of Attack.damage
+- server: concurrent clients of a calculation server with an on-disk result
+  cache; fails if a request is not answered correctly
+
+Every run is appended to a JSON history file (default
+"benchmark-history.json"). A benchmark counts as regression if it is slower
+than tolerance times the fastest earlier run of the same benchmark on the
+same machine and Python version.
+
+Options:
+--quick              Smaller workloads for a quick check.
+--history <file>     File name of the benchmark history.
+--no-history         Neither read nor write the benchmark history.
+--tolerance <x>      Allowed slowdown factor against the history. Default: 1.5
+--only <names>       Comma separated benchmark groups, e.g. "dicePool,acSweep".
+
+*** Recent Changes: ***
+2026-10-17: First Version with startup time benchmark
+    Added benchmarks of the calculation, input and output functions and the
+    benchmark history
+    Added the build optimizer benchmark
+    Added the d20 lookup table benchmark
+    Added the batch memory limit benchmark
+    Added the concurrent server benchmark
+    Added the damage distribution benchmark
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Folder of the program, used for the imports of the benchmarked modules
+programDir = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that a console-only run must not import
+heavyModules = ("pandas", "matplotlib")
+
+# Default file name of the benchmark history, allowed slowdown factor and
+# minimum slowdown in seconds that counts as regression (against timer noise
+# of very short benchmarks)
+historyFileName = os.path.join(programDir, "benchmark-history.json")
+regressionTolerance = 1.5
+regressionMinimum = 1e-3
+
+# Row labels of the first column of an input sheet
+inputRowLabels = ["Base Damage Dice", "Base Attacks", "Attack Bonus (with BAB)",
+                  "Damage Bonus", "Critical Threat Range", "Critical Multiplier",
+                  "Confirmation Bonus", "Precision Damage Dice",
+                  "Precision Damage Bonus", "Additional Damage Dice",
+                  "Additional Critical Dice", "Bonus Damage (no Crit.)",
+                  "Bonus Damage (only on Crit.)", "Fortification Chance (%)",
+                  "Immunity vs. Precision Damage",
+                  "Failure Chance (Concealment, %)", "Target Damage Reduction"]
+
+# Maximum additional startup time of a console-only run compared to a bare
+# interpreter which only imports numpy, in seconds
+startupLimit = 0.25
+
+
+def timeCommand(code, repeat=5):
+    """
+    Runs Python code in a new interpreter several times and returns the
+    fastest wall time as well as the output of the last run.
+
+    Parameters
+    ----------
+    code : str
+        Python code to run with "python -c".
+    repeat : int, optional
+        Number of runs. The default is 5.
+
+    Returns
+    -------
+    best : float
+        Fastest wall time in seconds.
+    output : str
+        Standard output of the last run.
+
+    """
+
+    best = float("inf")
+    output = ""
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=programDir,
+                                capture_output=True, text=True, check=True)
+        best = min(best, time.perf_counter() - start)
+        output = result.stdout
+    return best, output
+
+def benchStartup(repeat=5):
+    """
+    Measures the import time of every module of a console-only run and checks
+    that pandas and matplotlib are not imported by it.
+
+    Parameters
+    ----------
+    repeat : int, optional
+        Number of runs per measurement. The default is 5.
+
+    Returns
+    -------
+    result : dict
+        Startup time of a bare interpreter with numpy ("numpy"), of the
+        console-only modules ("console"), the difference ("overhead"), the
+        imported heavy modules ("heavyModules") and whether the limits are met
+        ("passed").
+
+    """
+
+    numpyTime, output = timeCommand("import numpy", repeat)
+    consoleTime, output = timeCommand(
+        "import sys, importlib.util\n"
+        "spec = importlib.util.spec_from_file_location('damagecalc', '__main__.py')\n"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+        "print(','.join(m for m in {} if m in sys.modules))".format(heavyModules),
+        repeat)
+    loaded = [m for m in output.strip().split(",") if m != ""]
+    overhead = consoleTime - numpyTime
+    return {"numpy": numpyTime, "console": consoleTime, "overhead": overhead,
+            "heavyModules": loaded,
+            "passed": overhead <= startupLimit and len(loaded) == 0}
+
+def timeCall(func, repeat=5, setup=None):
+    """
+    Calls a function several times and returns the fastest wall time.
+
+    Parameters
+    ----------
+    func : callable
+        Function without arguments to time.
+    repeat : int, optional
+        Number of calls. The default is 5.
+    setup : callable, optional
+        Function without arguments which is called before every call of func
+        and not timed. The default is None.
+
+    Returns
+    -------
+    best : float
+        Fastest wall time in seconds.
+
+    """
+
+    best = float("inf")
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def syntheticSpec(i=0, dice=((1, 8),), attacks=(0, -5, -10), damageReduction=0):
+    """
+    Creates a weapon for the synthetic workloads. The attack and damage bonus
+    vary with i, so that different weapons are not identical.
+
+    Parameters
+    ----------
+    i : int, optional
+        Number of the weapon. The default is 0.
+    dice : tuple, optional
+        Base damage dice. The default is ((1, 8),).
+    attacks : tuple, optional
+        baseAttacks. The default is (0, -5, -10).
+    damageReduction : int, optional
+        Target damage reduction. The default is 0.
+
+    Returns
+    -------
+    weaponSpec.WeaponSpec
+
+    """
+
+    import weaponSpec as ws
+
+    return ws.WeaponSpec(name="Weapon " + str(i), baseDice=dice,
+                         baseAttacks=attacks, attackBonus=10 + i % 15,
+                         damageBonus=5 + i % 7, critRange=19 - i % 3,
+                         precisionDice=((2, 6),), extraDice=((1, 6),),
+                         fortification=0.25, damageReduction=damageReduction)
+
+def syntheticCatalog(n):
+    """
+    Creates a modifier catalog for the optimizer benchmark with attack and
+    damage trade-offs, additional dice, additional attacks and confirmation
+    bonuses.
+
+    Parameters
+    ----------
+    n : int
+        Number of modifiers.
+
+    Returns
+    -------
+    list
+        List of optimizer.Modifier objects.
+
+    """
+
+    import optimizer as opt
+
+    catalog = []
+    for i in range(n):
+        kind = i % 5
+        if kind == 0:
+            catalog.append(opt.Modifier("Bonus " + str(i), {"attackBonus": 1 + i % 2}))
+        elif kind == 1:
+            catalog.append(opt.Modifier("Trade-off " + str(i),
+                                        {"attackBonus": -(1 + i % 3), "damageBonus": 2 + i % 4}))
+        elif kind == 2:
+            catalog.append(opt.Modifier("Dice " + str(i), {"attackBonus": -1},
+                                        dice={"extraDice": ((1, 4 + 2 * (i % 3)),)}))
+        elif kind == 3:
+            catalog.append(opt.Modifier("Attack " + str(i), {"attackBonus": -2},
+                                        attacks=(0,)))
+        else:
+            catalog.append(opt.Modifier("Confirm " + str(i),
+                                        {"critConfirmBonus": 2, "damageBonus": -1}))
+    return catalog
+
+def syntheticSheetValues(attacks, weaponsPerAttack):
+    """
+    Creates the cells of an input sheet in the layout of input_examples.xlsx:
+    attack names in the first row, row labels in the first column, weapons of
+    an attack one below the other, separated by empty rows, and attacks side by
+    side, separated by empty columns.
+
+    Parameters
+    ----------
+    attacks : int
+        Number of attacks.
+    weaponsPerAttack : int
+        Number of weapons per attack.
+
+    Returns
+    -------
+    values : np.array
+        Cell values, empty cells are NaN.
+
+    """
+
+    import numpy as np
+
+    height = len(inputRowLabels) + 1
+    values = np.full((weaponsPerAttack * (height + 1), 4 * attacks),
+                     np.nan, dtype=object)
+    for w in range(weaponsPerAttack):
+        r = 1 + w * (height + 1)
+        values[r+1:r+height, 0] = inputRowLabels
+        for a in range(attacks):
+            c = 1 + 4 * a
+            i = a * weaponsPerAttack + w
+            values[0, c] = "Attack " + str(a)
+            block = [["Weapon " + str(i)], [1, 8], [0, -5, -10], [10 + i % 15],
+                     [5 + i % 7], [19 - i % 3], [2], [0], [2, 6], [0], [1, 6],
+                     [], [0], [0], [25], [0], [0], [i % 5]]
+            for k, row in enumerate(block):
+                values[r+k, c:c+len(row)] = row
+    return values
+
+def writeWorkbook(fileName, values):
+    """
+    Writes cell values to an xlsx file with openpyxl.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of the xlsx file.
+    values : np.array
+        Cell values, NaN cells are left empty.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Sheet0")
+    for row in values.tolist():
+        worksheet.append([None if v != v else v for v in row])
+    workbook.save(fileName)
+
+def benchDicePool(quick=False):
+    """
+    Times calcDamageHit() and calcDamageCrit() of a weapon with a growing
+    number of d6 in its damage dice, with the dice caches cleared before every
+    call. "DR" variants use a damage reduction of the average dice roll, which
+    is above the minimum roll.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import dice as dc
+    import weapon as wp
+
+    results = {}
+    for n in ((1, 8, 64) if quick else (1, 8, 64, 256, 1024)):
+        for dr in (0, int(3.5 * n)):
+            w = wp.Weapon(syntheticSpec(dice=((n, 6),), damageReduction=dr), 10, 40)
+            name = "dicePool[{}d6{}]".format(n, ",DR" if dr > 0 else "")
+            results[name] = timeCall(lambda: (w.calcDamageHit(), w.calcDamageCrit()),
+                                     setup=dc.clearCache)
+    return results
+
+def benchACSweep(quick=False):
+    """
+    Times hitChance() and critChance() of every attack of a weapon with six
+    attacks for growing AC ranges.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import weapon as wp
+
+    results = {}
+    w = wp.Weapon(syntheticSpec(attacks=(0, 0, -5, -5, -10, -15)), 10, 40)
+    for width in ((31, 1001) if quick else (31, 1001, 100001)):
+        w.setACRange(0, width - 1)
+        results["acSweep[{}]".format(width)] = timeCall(
+            lambda: [(w.hitChance(b), w.critChance(b)) for b in w.baseAttacks])
+    return results
+
+def benchWideSheet(quick=False):
+    """
+    Times the construction of a Sheet object with growing numbers of attacks
+    with one weapon each.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import sheet as sht
+
+    results = {}
+    for n in ((10, 100) if quick else (10, 100, 1000)):
+        specs = [[syntheticSpec(i)] for i in range(n)]
+        names = ["Attack " + str(i) for i in range(n)]
+        results["wideSheet[{}]".format(n)] = timeCall(
+            lambda: sht.Sheet((specs, names), 10, 40), repeat=3)
+    return results
+
+def benchReadInput(quick=False):
+    """
+    Times readInput() on generated xlsx workbooks and readInputWeapons() on
+    their cell values.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import inputWeapons as iw
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for attacks, weapons in (((10, 2), (50, 4)) if quick else ((10, 2), (50, 4), (200, 8))):
+            values = syntheticSheetValues(attacks, weapons)
+            fileName = os.path.join(folder, "input{}x{}.xlsx".format(attacks, weapons))
+            writeWorkbook(fileName, values)
+            size = "{}x{}".format(attacks, weapons)
+            results["readInput[{}]".format(size)] = timeCall(
+                lambda: iw.readInput(fileName, "Sheet0"), repeat=3)
+            results["readInputWeapons[{}]".format(size)] = timeCall(
+                lambda: iw.readInputWeapons(values[1:, :]))
+    return results
+
+def benchOutput(quick=False):
+    """
+    Times outputData(), outputColumnar() (.npz) and the graph functions of a
+    Sheet object.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import sheet as sht
+
+    n = 10 if quick else 50
+    sheet = sht.Sheet(([[syntheticSpec(i)] for i in range(n)],
+                       ["Attack " + str(i) for i in range(n)]), 0, 60)
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        fileName = os.path.join(folder, "output")
+        results["outputData[{}]".format(n)] = timeCall(
+            lambda: sheet.outputData(fileName + ".xlsx"), repeat=3)
+        results["outputColumnar[{},npz]".format(n)] = timeCall(
+            lambda: sheet.outputColumnar(fileName + ".npz"), repeat=3)
+        results["graphAbsolute[{}]".format(n)] = timeCall(
+            lambda: sheet.graphAbsolute(fileName + "Absolute.png"),
+            repeat=3, setup=lambda: plt.close("all"))
+        results["graphDifference[{}]".format(n)] = timeCall(
+            lambda: sheet.graphDifference(fileName + "Difference.png"),
+            repeat=3, setup=lambda: plt.close("all"))
+        plt.close("all")
+    return results
+
+def arithmeticChances(attackBonus, critConfirmBonus, bab, ac, critRange, failChance,
+                      fortification):
+    """
+    Hit and critical hit chances from the closed-form arithmetic that
+    probability.py used before the lookup tables, as reference for
+    benchD20Tables().
+
+    Parameters
+    ----------
+    attackBonus : np.array
+        Overall attack bonus.
+    critConfirmBonus : np.array
+        Separate attack bonus for critical confirmation rolls.
+    bab : np.array
+        Additional roll penalty of every attack.
+    ac : np.array
+        Target AC.
+    critRange : np.array
+        Minimum result of the d20 which can threaten a critical hit.
+    failChance : float
+        Failure chance (0 to 1).
+    fortification : float
+        Chance for critical hits to be nullified (0 to 1).
+
+    Returns
+    -------
+    hitChances : np.array
+        Hit chances.
+    critChances : np.array
+        Critical hit chances.
+
+    """
+
+    import numpy as np
+
+    hitChances = np.clip((attackBonus + bab + 21 - ac) * 0.05, 0.05, 0.95) * (1 - failChance)
+    threat = (attackBonus + bab + 21 - ac) * 0.05
+    maxThreat = (21 - critRange) * 0.05
+    threat = np.where(threat > maxThreat, maxThreat, np.maximum(threat, 0.05)) * (1 - failChance)
+    confirm = (np.clip((attackBonus + critConfirmBonus + bab + 21 - ac) * 0.05, 0.05, 0.95)
+               * (1 - failChance))
+    return hitChances, threat * confirm * (1 - fortification)
+
+def benchD20Tables(quick=False):
+    """
+    Times the hit and critical hit chances of 1000 variants with four attacks
+    each for growing AC ranges, once from the lookup tables of
+    probability.py and once with the closed-form arithmetic.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import numpy as np
+    import probability as pr
+
+    results = {}
+    n = 1000
+    attackBonus = (10 + np.arange(n) % 25)[:, np.newaxis, np.newaxis]
+    critConfirmBonus = (np.arange(n) % 5)[:, np.newaxis, np.newaxis]
+    critRange = (19 - np.arange(n) % 4)[:, np.newaxis, np.newaxis]
+    bab = np.array([0, -5, -10, -15])[np.newaxis, :, np.newaxis]
+    for width in ((31, 121) if quick else (31, 121, 481)):
+        ac = np.arange(width)[np.newaxis, np.newaxis, :]
+        results["d20Tables[table,{}]".format(width)] = timeCall(
+            lambda: pr.attackChances(attackBonus, critConfirmBonus, bab, ac, critRange, 0., 0.),
+            repeat=3)
+        results["d20Tables[arithmetic,{}]".format(width)] = timeCall(
+            lambda: arithmeticChances(attackBonus, critConfirmBonus, bab, ac, critRange, 0., 0.),
+            repeat=3)
+    return results
+
+def benchOptimizer(quick=False):
+    """
+    Times the search for the 10 best builds of growing modifier catalogs
+    against a weighted AC distribution.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import optimizer as opt
+
+    results = {}
+    base = syntheticSpec(attacks=(0, -5, -10))
+    for n in ((10, 15) if quick else (10, 15, 20)):
+        catalog = syntheticCatalog(n)
+        results["optimizer[2^{}]".format(n)] = timeCall(
+            lambda: opt.optimize(base, catalog, {20: 1, 25: 2, 30: 2, 35: 1}, top=10),
+            repeat=3)
+    return results
+
+def benchBatchMemory(quick=False):
+    """
+    Times batch.calcBatch() of variants with three attacks against 60 ACs,
+    once in float64 without memory limit and once in float32 with a memory
+    limit of 64 MB.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import numpy as np
+    import batch as bt
+
+    results = {}
+    for n in ((2**14,) if quick else (2**14, 2**17)):
+        index = np.arange(n)
+        variants = {"baseDice": "1d8", "precisionDice": "2d6",
+                    "baseAttacks": [0, -5, -10], "attackBonus": 10 + index % 15,
+                    "damageBonus": 5 + index % 7, "critRange": 19 - index % 3,
+                    "fortification": 0.25}
+        try:
+            results["batchMemory[float64,{}]".format(n)] = timeCall(
+                lambda: bt.calcBatch(variants, 10, 69), repeat=3)
+            bt.setResultDtype(np.float32)
+            bt.setMemoryLimit(64 * 1024**2)
+            results["batchMemory[float32,64M,{}]".format(n)] = timeCall(
+                lambda: bt.calcBatch(variants, 10, 69), repeat=3)
+        finally:
+            bt.setResultDtype()
+            bt.setMemoryLimit()
+    return results
+
+def benchDistribution(quick=False):
+    """
+    Times Attack.calcDistribution() of full attacks with precision damage
+    dice against fortified targets with and without damage reduction and
+    precision immunity. The mean of every distribution is checked against
+    Attack.damage, a deviation raises a RuntimeError.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import numpy as np
+    import attack as atk
+    import weaponSpec as ws
+
+    results = {}
+    targets = [(0.25, 0, 0), (0.5, 15, 0), (0.75, 8, 0), (0.5, 5, 1)]
+    for attacks in ((0, -5),) if quick else ((0, -5), (0, 0, -5, -10)):
+        specs = [ws.WeaponSpec(name="Weapon", baseDice=((2, 6),), baseAttacks=attacks,
+                               attackBonus=12, damageBonus=6, critRange=19,
+                               precisionDice=((4, 6),), extraDice=((1, 6),),
+                               fortification=f, damageReduction=dr, precImmunity=immune)
+                 for f, dr, immune in targets]
+        attackList = [atk.Attack([spec], "Attack", 10, 40) for spec in specs]
+
+        def run():
+            for a in attackList:
+                a.distribution = None
+                if not np.allclose(a.calcDistribution().mean(), a.damage):
+                    raise RuntimeError("Distribution mean differs from Attack.damage")
+        results["distribution[{}]".format(len(attacks))] = timeCall(run, repeat=3)
+    return results
+
+def benchServer(quick=False):
+    """
+    Times concurrent requests of several client threads to a calculation
+    server which shares an on-disk ResultCache between its request threads.
+    Every response is checked against the direct calculation, a failed or
+    wrong response raises a RuntimeError.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        Smaller workloads. The default is False.
+
+    Returns
+    -------
+    results : dict
+        Wall time in seconds per benchmark name.
+
+    """
+
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    import resultCache as rc
+    import server as srv
+
+    threads = 16
+    requests = 64 if quick else 256
+    builds = [{"minAC": 10, "maxAC": 40,
+               "attacks": [{"name": "Attack", "weapons": [
+                   {"name": "Weapon", "baseDice": "1d8", "baseAttacks": [0, -5],
+                    "attackBonus": 10 + i % 8, "damageBonus": 5}]}]}
+              for i in range(requests)]
+    expected = [srv.calcBuild(b) for b in builds]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        cache = rc.ResultCache(os.path.join(folder, "cache.sqlite"))
+        server = srv.CalculationServer("127.0.0.1", 0, cache)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = "http://{}:{}/calculate".format(*server.server_address[:2])
+        try:
+            def run():
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    responses = list(executor.map(
+                        lambda b: srv.requestCalculation(b, url), builds))
+                if responses != expected:
+                    raise RuntimeError("Wrong responses of the cached server")
+            results["server[{}x{}]".format(threads, requests)] = timeCall(run, repeat=3)
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+# Benchmark groups in the order of execution
+benchmarkGroups = {"dicePool": benchDicePool, "acSweep": benchACSweep,
+                   "wideSheet": benchWideSheet, "readInput": benchReadInput,
+                   "output": benchOutput, "d20Tables": benchD20Tables,
+                   "optimizer": benchOptimizer, "batchMemory": benchBatchMemory,
+                   "distribution": benchDistribution, "server": benchServer}
+
+def machineInfo():
+    """
+    Returns
+    -------
+    dict
+        Description of the machine and the library versions of a run.
+
+    """
+
+    import numpy as np
+
+    return {"machine": platform.node(), "processor": platform.machine(),
+            "python": platform.python_version(), "numpy": np.__version__}
+
+def readHistory(fileName):
+    """
+    Reads the benchmark history.
+
+    Parameters
+    ----------
+    fileName : str
+        File name of the benchmark history.
+
+    Returns
+    -------
+    list
+        Earlier runs, empty if the file does not exist.
+
+    """
+
+    if not os.path.exists(fileName):
+        return []
+    with open(fileName, encoding="utf-8") as f:
+        return json.load(f)
+
+def findRegressions(results, history, info, tolerance=regressionTolerance):
+    """
+    Compares benchmark results to the fastest earlier runs of the same
+    benchmarks on the same machine and Python version. Slowdowns below
+    regressionMinimum are ignored.
+
+    Parameters
+    ----------
+    results : dict
+        Wall time in seconds per benchmark name.
+    history : list
+        Earlier runs as given by readHistory().
+    info : dict
+        Machine information as given by machineInfo().
+    tolerance : float, optional
+        Allowed slowdown factor. The default is regressionTolerance.
+
+    Returns
+    -------
+    regressions : dict
+        (time, best earlier time) per slower benchmark name.
+
+    """
+
+    best = {}
+    for run in history:
+        if (run["info"]["machine"], run["info"]["python"]) != (info["machine"], info["python"]):
+            continue
+        for name, t in run["results"].items():
+            best[name] = min(best.get(name, t), t)
+
+    regressions = {}
+    for name, t in results.items():
+        if name in best and t > tolerance * best[name] and t - best[name] > regressionMinimum:
+            regressions[name] = (t, best[name])
+    return regressions
+
+def main(args):
+    justLength = 30
+    allPassed = True
+    
+    # Parsing input arguments
+    quick = False
+    fileName = historyFileName
+    useHistory = True
+    tolerance = regressionTolerance
+    groups = list(benchmarkGroups.keys())
+    for i in range(len(args)):
+        a = args[i]
+        if a == "--quick":
+            quick = True
+        elif a == "--history":
+            fileName = args[i+1]
+        elif a == "--no-history":
+            useHistory = False
+        elif a == "--tolerance":
+            tolerance = float(args[i+1])
+        elif a == "--only":
+            groups = args[i+1].split(",")
+
+    result = benchStartup()
+    print("Startup (numpy only):".ljust(justLength) + "{:.3f} s".format(result["numpy"]))
+    print("Startup (console run):".ljust(justLength) + "{:.3f} s".format(result["console"]))
+    print("Startup overhead:".ljust(justLength) + "{:.3f} s (limit {:.3f} s)".format(
+        result["overhead"], startupLimit))
+    if len(result["heavyModules"]) > 0:
+        print("Imported on startup:".ljust(justLength) + ", ".join(result["heavyModules"]))
+    allPassed = allPassed and result["passed"]
+    
+    # Add the program folder for the imports of the benchmarked modules
+    if programDir not in sys.path:
+        sys.path.insert(0, programDir)
+    
+    results = {"startupOverhead": result["overhead"]}
+    for g in groups:
+        results.update(benchmarkGroups[g](quick))
+    
+    info = machineInfo()
+    regressions = {}
+    if useHistory:
+        history = readHistory(fileName)
+        regressions = findRegressions(results, history, info, tolerance)
+        history.append({"date": time.strftime("%Y-%m-%d %H:%M:%S"), "quick": quick,
+                         "info": info, "results": results})
+        with open(fileName, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=1)
+    
+    print()
+    justLength = max([justLength] + [len(name) + 2 for name in results])
+    for name, t in results.items():
+        line = (name + ":").ljust(justLength) + "{:10.3f} ms".format(t * 1e3)
+        if name in regressions:
+            line += "   REGRESSION (best {:.3f} ms)".format(regressions[name][1] * 1e3)
+        print(line)
+    allPassed = allPassed and len(regressions) == 0
+
+    print("PASSED" if allPassed else "FAILED")
+    return 0 if allPassed else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""
+damageDistribution.py provides the DamageDistribution class for the complete
+damage probability distribution of a full attack.
+
+Every single attack is a mixture of miss, normal hit and critical hit, the
+damage distribution of a full attack is the convolution of all single attacks
+of all weapons. The convolutions are carried out as products of the Fourier
+transforms of the single attack distributions, which only depend on the target
+AC through the three mixture weights. This way every AC of the AC range is
+evaluated in a single array operation.
+
+Fortification nullifies precision damage dice with the fortification chance
+on normal and critical hits: every hit is a mixture of the hit with and
+without precision damage dice, each with damage reduction applied. This is
+the same model as in Weapon.calcDamageHit(), so the mean of the distribution
+equals the average damage of Attack.damage.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+2026-10-17: Fortification only mixes the distributions if it can affect the
+    damage dice, see Weapon.isFortified()
+"""
+
+import numpy as np
+import dice as dc
+
+
+def weaponDamagePmfs(weapon):
+    """
+    Calculates the damage distributions of a normal and a critical hit of a
+    weapon, including damage reduction and fortification.
+
+    Parameters
+    ----------
+    weapon : Weapon
+        Weapon object.
+
+    Returns
+    -------
+    hitPmf : np.array
+        Probability of every damage value of a normal hit.
+    critPmf : np.array
+        Probability of every damage value of a critical hit.
+
+    """
+
+    hitPmf = dc.damagePmf(weapon.listDiceHit(), weapon.damageHit,
+                          weapon.damageReduction)
+    critPmf = dc.damagePmf(weapon.listDiceCrit(), weapon.damageCrit,
+                           weapon.damageReduction)
+    if weapon.isFortified():
+        hitPmf = mixPmf(hitPmf, dc.damagePmf(weapon.listDiceHit(precision=False),
+                                             weapon.damageHit, weapon.damageReduction),
+                        weapon.fortification)
+        critPmf = mixPmf(critPmf, dc.damagePmf(weapon.listDiceCrit(precision=False),
+                                               weapon.damageCrit, weapon.damageReduction),
+                         weapon.fortification)
+    return hitPmf, critPmf
+
+def mixPmf(pmf, otherPmf, otherChance):
+    """
+    Mixture of two distributions of different length.
+
+    Parameters
+    ----------
+    pmf : np.array
+        First distribution.
+    otherPmf : np.array
+        Second distribution.
+    otherChance : float
+        Weight of the second distribution (0 to 1).
+
+    Returns
+    -------
+    mixed : np.array
+        Mixed distribution.
+
+    """
+
+    mixed = np.zeros(max(pmf.size, otherPmf.size))
+    mixed[:pmf.size] += (1 - otherChance) * pmf
+    mixed[:otherPmf.size] += otherChance * otherPmf
+    return mixed
+
+
+class DamageDistribution:
+    """
+    The DamageDistribution class holds the probability of every damage value
+    of a full attack for every target AC.
+    """
+
+    def __init__(self, weapons, minAC, maxAC):
+        """
+        The constructor calculates the damage distribution of a full attack
+        with all weapons and all their entries of baseAttacks.
+
+        Parameters
+        ----------
+        weapons : list
+            List of Weapon objects.
+        minAC : int
+            Lower limit of target AC for calculations.
+        maxAC : int
+            Upper limit of target AC for calculations.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.acArray = np.arange(minAC, maxAC+1)
+
+        # Damage distributions and (attack x AC) chances of every weapon
+        parts = []
+        length = 1
+        for w in weapons:
+            if len(w.baseAttacks) == 0:
+                continue
+            hitPmf, critPmf = weaponDamagePmfs(w)
+            parts.append((hitPmf, critPmf) + w.chanceMatrices())
+            length += len(w.baseAttacks) * (max(hitPmf.size, critPmf.size) - 1)
+
+        # Product of the Fourier transforms of all single attacks. The
+        # transform of "no damage" is 1 at every frequency.
+        spectrum = np.ones((self.acArray.size, length // 2 + 1), dtype=complex)
+        for hitPmf, critPmf, hitChances, critChances in parts:
+            hitSpectrum = np.fft.rfft(hitPmf, length)
+            critSpectrum = np.fft.rfft(critPmf, length)
+            for b in range(hitChances.shape[0]):
+                missChance = 1 - hitChances[b]
+                spectrum *= (missChance[:, np.newaxis]
+                             + (hitChances[b] - critChances[b])[:, np.newaxis] * hitSpectrum
+                             + critChances[b][:, np.newaxis] * critSpectrum)
+
+        # (AC x damage) array, rounding errors of the transform are removed
+        self.pmf = np.fft.irfft(spectrum, length, axis=1)
+        self.pmf[self.pmf < 1e-15] = 0
+        self.pmf /= np.sum(self.pmf, axis=1)[:, np.newaxis]
+        self.damage = np.arange(length)
+
+    def mean(self):
+        """
+        Returns
+        -------
+        np.array
+            Average damage for every AC.
+
+        """
+
+        return self.pmf @ self.damage
+
+    def variance(self):
+        """
+        Returns
+        -------
+        np.array
+            Variance of the damage for every AC.
+
+        """
+
+        return self.pmf @ self.damage**2 - self.mean()**2
+
+    def std(self):
+        """
+        Returns
+        -------
+        np.array
+            Standard deviation of the damage for every AC.
+
+        """
+
+        return np.sqrt(np.maximum(self.variance(), 0))
+
+    def cdf(self):
+        """
+        Returns
+        -------
+        np.array
+            (AC x damage) array with the probability of dealing at most the
+            damage of the column index.
+
+        """
+
+        return np.cumsum(self.pmf, axis=1)
+
+    def percentile(self, q):
+        """
+        Damage value that is not exceeded with a probability of q percent.
+
+        Parameters
+        ----------
+        q : float
+            Percentile (0 to 100).
+
+        Returns
+        -------
+        np.array
+            Percentile damage for every AC.
+
+        """
+
+        # Small tolerance against rounding errors of the cumulative sum
+        return np.sum(self.cdf() < q * 1e-2 - 1e-12, axis=1)
+
+    def exceedance(self, x):
+        """
+        Probability of dealing at least x damage, P(damage >= x).
+
+        Parameters
+        ----------
+        x : int
+            Damage threshold.
+
+        Returns
+        -------
+        np.array
+            Probability for every AC.
+
+        """
+
+        x = max(int(np.ceil(x)), 0)
+        return np.sum(self.pmf[:, x:], axis=1)
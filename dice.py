@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+
+"""
+dice.py provides the damage distribution engine for damage-calc.
+
+The probability mass function (PMF) of a dice pool is built by repeated 1-D
+convolution of the single die distributions, which is equivalent to the
+multiplication of their generating polynomials. Its size grows linearly with
+the number of dice instead of exponentially like a complete dice array.
+
+*** Recent Changes: ***
+2026-10-17: First Version, replaces Weapon.createDiceArray()
+    Added parseDice() and averageDamageArray() for batch evaluation
+    Added process-wide LRU caches for dice pool distributions and averages,
+    keyed on the grouped dice pool (see diceKey())
+    Added damagePmf() for damage distributions of single hits
+    Added instrumentation for profiling.py
+    Averages against damage reduction only use the tail of the dice sum
+    distribution on the smaller side of the damage reduction threshold (see
+    floorCorrection() and flooredAverage())
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+import profiling as prf
+
+# Maximum number of entries of each dice pool cache, see setCacheSize()
+CACHE_SIZE = 4096
+
+
+def groupDice(diceList):
+    """
+    Generates a grouped list of dice from a sorted, ungrouped list.
+    Example: [3, 3, 4, 6, 6] becomes [[2,3], [1,4], [2,6]]
+
+    Parameters
+    ----------
+    diceList : list
+        Sorted list of dice to group.
+
+    Returns
+    -------
+    diceGroup : list
+        List containing a list for every dice type in the form of [x, y]
+        corresponding to xdy. An empty dice list yields an empty list.
+
+    """
+
+    diceGroup = []
+    for d in diceList:
+        if len(diceGroup) > 0 and diceGroup[-1][1] == d:
+            diceGroup[-1][0] += 1
+        else:
+            diceGroup.append([1, d])
+    return diceGroup
+
+def parseDice(diceString):
+    """
+    Converts a dice expression to the dice tuple notation used by Weapon.
+    Example: "2d6 + 1d8" -> [(2,6), (1,8)]
+
+    Parameters
+    ----------
+    diceString : str
+        Dice expression with terms in the form of <number>d<sides>, joined by
+        "+". An empty string yields no dice.
+
+    Returns
+    -------
+    diceArray : list
+        List of 2-tuples which describe the dice number and types.
+
+    """
+
+    diceArray = []
+    for term in diceString.replace(" ", "").lower().split("+"):
+        if term == "":
+            continue
+        number, sides = term.split("d")
+        if int(number) != 0 and int(sides) != 0:
+            diceArray.append((int(number), int(sides)))
+    return diceArray
+
+def dieDistribution(die, count=1, length=None):
+    """
+    Calculates the PMF of the sum of count identical dice. The dice are
+    combined by exponentiation by squaring, so 100d6 only needs a handful of
+    convolutions.
+
+    Parameters
+    ----------
+    die : int
+        Number of sides of the die.
+    count : int, optional
+        Number of dice. The default is 1.
+    length : int, optional
+        Only the probabilities of the length lowest sums are calculated, every
+        intermediate result is truncated to this length. The default is None
+        (complete PMF).
+
+    Returns
+    -------
+    pmf : np.array
+        Probability of every possible sum, where index 0 corresponds to the
+        minimum sum (every die rolls a one).
+
+    """
+
+    pmf = np.ones(1)
+    power = np.full(int(die), 1.0 / die)[:length]
+    while count > 0:
+        if count & 1:
+            pmf = np.convolve(pmf, power)[:length]
+        count >>= 1
+        if count > 0:
+            power = np.convolve(power, power)[:length]
+    return pmf
+
+def diceKey(diceList):
+    """
+    Canonical, hashable representation of a dice pool which is used as cache
+    key. Example: [6, 4, 6] -> ((1,4), (2,6))
+
+    Parameters
+    ----------
+    diceList : list
+        List of dice in the form of [x, ..., x, y, ..., y, ...].
+
+    Returns
+    -------
+    tuple
+        Grouped dice pool as tuple of (number, sides) tuples.
+
+    """
+
+    return tuple(tuple(g) for g in groupDice(sorted(diceList)))
+
+@prf.timed("dicePool")
+def poolDistribution(diceKey):
+    """
+    Calculates the PMF of the sum of a grouped dice pool. This function is not
+    cached, use diceDistribution() or cachedDistribution() instead.
+
+    Parameters
+    ----------
+    diceKey : tuple
+        Grouped dice pool as given by diceKey().
+
+    Returns
+    -------
+    pmf : np.array
+        Read-only array with the probability of every possible sum, where
+        index 0 corresponds to the minimum sum.
+
+    """
+
+    pmf = np.ones(1)
+    for count, die in diceKey:
+        pmf = np.convolve(pmf, dieDistribution(die, count))
+    # The array is shared by every caller of the cache
+    pmf.flags.writeable = False
+    return pmf
+
+def diceDistribution(diceList):
+    """
+    Calculates the PMF of the sum of an arbitrary dice pool. The result is
+    cached per dice pool.
+    Example: [4, 6] yields 24 combinations from 2 to 10, i.e. an array of
+    length 9 starting at a sum of 2.
+
+    Parameters
+    ----------
+    diceList : list
+        List of dice in the form of [x, ..., x, y, ..., y, ...].
+
+    Returns
+    -------
+    pmf : np.array
+        Read-only array with the probability of every possible sum, where
+        index 0 corresponds to the minimum sum len(diceList).
+
+    """
+
+    return cachedDistribution(diceKey(diceList))
+
+def averageDice(diceList):
+    """
+    Calculates the average dice roll according to this formula:
+    avg(xdy) = x * (y+1)/2.
+
+    Parameters
+    ----------
+    diceList : list
+        List of dice to calculate average damage from.
+
+    Returns
+    -------
+    damage : float
+        Average roll of given dice list.
+
+    """
+
+    damage = 0
+    for d in diceList:
+        damage += (d+1)/2
+    return damage
+
+def lowTailDistribution(diceKey, length):
+    """
+    Calculates the probabilities of the length lowest sums of a grouped dice
+    pool. The cost only depends on length, not on the size of the dice pool.
+
+    Parameters
+    ----------
+    diceKey : tuple
+        Grouped dice pool as given by diceKey().
+    length : int
+        Number of sums, starting at the minimum sum.
+
+    Returns
+    -------
+    pmf : np.array
+        Probability of the lowest sums, index 0 corresponds to the minimum
+        sum. Shorter than length if the dice pool has fewer possible sums.
+
+    """
+
+    pmf = np.ones(1)
+    for count, die in diceKey:
+        pmf = np.convolve(pmf, dieDistribution(die, count, length))[:length]
+    return pmf
+
+def floorCorrection(diceKey, shortfall):
+    """
+    Calculates the average damage that flooring at zero adds to a damage
+    roll. With the dice sum S counted from the minimum sum (S = 0 if every die
+    rolls a one) and shortfall t = -(minimum damage), this is the average of
+    max(t - S, 0), which only depends on the t lowest sums:
+        sum over s < t of (t - s) * P(S = s) = t * P(S < t) - E[S; S < t]
+
+    Parameters
+    ----------
+    diceKey : tuple
+        Grouped dice pool as given by diceKey().
+    shortfall : int or np.array
+        Amount by which damage reduction exceeds the minimum damage roll.
+        Values <= 0 give no correction.
+
+    Returns
+    -------
+    correction : np.array
+        Correction for every element of shortfall.
+
+    """
+
+    shortfall = np.asarray(shortfall)
+    length = int(np.max(shortfall, initial=0))
+    if length <= 0:
+        return np.zeros(shortfall.shape)
+    pmf = lowTailDistribution(diceKey, length)
+    cdf = np.cumsum(pmf)
+    partialMean = np.cumsum(np.arange(pmf.size) * pmf)
+    index = np.clip(shortfall, 1, pmf.size).astype(int) - 1
+    return np.where(shortfall > 0, shortfall * cdf[index] - partialMean[index], 0.)
+
+def flooredAverage(diceKey, minDamage):
+    """
+    Calculates the average of a damage roll which is floored at zero, for one
+    or several minimum damage values of the same dice pool.
+    Sums of dice are symmetric around their average, P(S = s) = P(S = R - s)
+    with R the difference between maximum and minimum sum. Above the middle
+    of the distribution, the average is therefore calculated from the high
+    tail instead of the low tail:
+        average of max(minDamage + S, 0) = floorCorrection(maxDamage)
+    This way, at most half of the PMF is ever needed.
+
+    Parameters
+    ----------
+    diceKey : tuple
+        Grouped dice pool as given by diceKey().
+    minDamage : int or np.array
+        Damage of the minimum roll (every die rolls a one) including damage
+        modifier and damage reduction.
+
+    Returns
+    -------
+    avgDamage : np.array
+        Average damage for every element of minDamage.
+
+    """
+
+    minDamage = np.asarray(minDamage)
+    sumRange = sum(count * (die-1) for count, die in diceKey)
+    avgDamage = minDamage + sumRange / 2
+    maxDamage = minDamage + sumRange
+    lowTail = -minDamage <= maxDamage
+    correction = floorCorrection(diceKey, np.minimum(-minDamage, maxDamage))
+    return np.where(lowTail, avgDamage + correction, correction)
+
+def poolAverageDamage(diceKey, damageMod, damageReduction):
+    """
+    Calculates the exact average damage of a grouped dice pool. This function
+    is not cached, use averageDamage() or cachedAverageDamage() instead.
+
+    Parameters
+    ----------
+    diceKey : tuple
+        Grouped dice pool as given by diceKey().
+    damageMod : int
+        Flat damage bonus added to the dice roll.
+    damageReduction : int
+        Damage reduction of the target.
+
+    Returns
+    -------
+    avgDamage : float
+        Average damage of the dice pool.
+
+    """
+
+    numberDice = sum(count for count, die in diceKey)
+    minDamage = numberDice + damageMod - damageReduction
+    if minDamage >= 0:
+        return sum(count * (die+1)/2 for count, die in diceKey) + damageMod - damageReduction
+    
+    # Flooring at zero only concerns the rolls below the damage reduction
+    # threshold, so only a tail of the dice sum distribution is needed
+    return max(float(flooredAverage(diceKey, minDamage)), 0.)
+
+def averageDamage(diceList, damageMod, damageReduction):
+    """
+    Calculates the exact average damage of a dice pool with a flat damage
+    modifier against damage reduction, which can not reduce the damage of a
+    single hit below zero.
+    If the damage reduction can not reduce the minimum damage roll (every die
+    rolls a one) to zero, the average is simply average dice roll plus damage
+    modifier minus damage reduction. Otherwise the rolls below the damage
+    reduction threshold are floored at zero with flooredAverage(), which
+    only needs a tail of the PMF of the dice pool.
+    The result is cached per dice pool, damage modifier and damage reduction.
+
+    Parameters
+    ----------
+    diceList : list
+        List of dice in the form of [x, ..., x, y, ..., y, ...].
+    damageMod : int
+        Flat damage bonus added to the dice roll.
+    damageReduction : int
+        Damage reduction of the target.
+
+    Returns
+    -------
+    avgDamage : float
+        Average damage of the dice pool.
+
+    """
+
+    return cachedAverageDamage(diceKey(diceList), damageMod, damageReduction)
+
+def damagePmf(diceList, damageMod, damageReduction):
+    """
+    Calculates the PMF of the damage of a single hit, i.e. dice roll plus flat
+    damage modifier minus damage reduction, floored at zero.
+
+    Parameters
+    ----------
+    diceList : list
+        List of dice in the form of [x, ..., x, y, ..., y, ...].
+    damageMod : int
+        Flat damage bonus added to the dice roll.
+    damageReduction : int
+        Damage reduction of the target.
+
+    Returns
+    -------
+    pmf : np.array
+        Probability of every damage value, where the index is the damage.
+
+    """
+
+    pmf = diceDistribution(diceList)
+    damage = np.maximum(np.arange(pmf.size) + len(diceList) + damageMod
+                        - damageReduction, 0)
+    return np.bincount(damage, weights=pmf)
+
+def averageDamageArray(diceList, damageMod, damageReduction):
+    """
+    Vectorized version of averageDamage() for many damage modifiers and damage
+    reductions which share the same dice pool. The needed tail of the PMF of
+    the dice pool is built at most once.
+
+    Parameters
+    ----------
+    diceList : list
+        Sorted list of dice in the form of [x, ..., x, y, ..., y, ...].
+    damageMod : np.array
+        Flat damage bonuses added to the dice roll.
+    damageReduction : np.array
+        Damage reductions of the target, broadcast against damageMod.
+
+    Returns
+    -------
+    avgDamage : np.array
+        Average damage for every element of the broadcast arguments.
+
+    """
+
+    minDamage = len(diceList) + np.asarray(damageMod) - np.asarray(damageReduction)
+    avgDamage = averageDice(diceList) + minDamage - len(diceList)
+    floored = minDamage < 0
+    if np.any(floored):
+        avgDamage = np.array(avgDamage, dtype=float)
+        avgDamage[floored] = np.maximum(
+            flooredAverage(diceKey(diceList), minDamage[floored]), 0.)
+    return avgDamage
+
+def setCacheSize(maxsize=CACHE_SIZE):
+    """
+    (Re-)Creates the process-wide LRU caches for dice pool distributions and
+    average damage values with the given size bound. Existing entries and
+    counters are discarded.
+
+    Parameters
+    ----------
+    maxsize : int or None, optional
+        Maximum number of entries of each cache, None for no bound.
+        The default is CACHE_SIZE.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    global cachedDistribution, cachedAverageDamage
+    cachedDistribution = lru_cache(maxsize=maxsize)(poolDistribution)
+    cachedAverageDamage = lru_cache(maxsize=maxsize)(poolAverageDamage)
+
+def cacheInfo():
+    """
+    Returns hit and miss counters as well as the current and maximum size of
+    the dice pool caches.
+
+    Returns
+    -------
+    info : dict
+        functools cache info of the "distribution" and the "averageDamage"
+        cache.
+
+    """
+
+    return {"distribution": cachedDistribution.cache_info(),
+            "averageDamage": cachedAverageDamage.cache_info()}
+
+def clearCache():
+    """
+    Empties the dice pool caches and resets their counters.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    cachedDistribution.cache_clear()
+    cachedAverageDamage.cache_clear()
+
+setCacheSize(CACHE_SIZE)
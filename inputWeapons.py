@@ -5,14 +5,220 @@ inputWeapons.py provides the input functions for damage-calc.
 
 *** Recent Changes: ***
 2020-12-29: Translated comments to English
+2026-10-17: xlsx input is streamed with openpyxl in read-only mode into an
+    np.array, empty rows and columns are found with vectorized operations and
+    weapons are passed on as array views instead of DataFrames
+    pandas is only imported for file types other than xlsx/xlsm
+    Added readWorkbookValues() and parseInput() to read several sheets of a
+    workbook while opening it only once
+    Added instrumentation for profiling.py
 """
 
-import pandas as pd
+import numpy as np
+
+import profiling as prf
+
+def isOpenpyxlFile(fileName):
+    """
+    Checks whether a file can be read with openpyxl directly.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of input file.
+
+    Returns
+    -------
+    bool
+        True for xlsx and xlsm files.
+    
+    """
+    
+    return str(fileName).lower().endswith((".xlsx", ".xlsm"))
+
+def readSheetNames(fileName):
+    """
+    Returns the names of all sheets of an input file in workbook order.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of input file.
+
+    Returns
+    -------
+    list
+        Sheet names.
+    
+    """
+    
+    if not isOpenpyxlFile(fileName):
+        import pandas as pd
+        return pd.ExcelFile(fileName).sheet_names
+    
+    import openpyxl
+    workbook = openpyxl.load_workbook(fileName, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+@prf.timed("readSheetValues")
+def readSheetValues(fileName, sheet):
+    """
+    Reads every cell of the selected sheet into a two-dimensional np.array of
+    objects. xlsx/xlsm files are streamed cell by cell with openpyxl in
+    read-only mode, other file types are read with pandas.read_excel.
+    Empty cells are NaN, trailing empty rows and columns are removed, just like
+    pandas.read_excel(header=None) does.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of input file.
+    sheet : int or str
+        Sheet of input file. Accepts a sheet name (str) or a sheet index (int).
+
+    Returns
+    -------
+    values : np.array
+        Cell values of the sheet.
+    
+    """
+    
+    if not isOpenpyxlFile(fileName):
+        import pandas as pd
+        return pd.read_excel(fileName, sheet_name=sheet, header=None).values
+    
+    import openpyxl
+    workbook = openpyxl.load_workbook(fileName, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet, int):
+            worksheet = workbook.worksheets[sheet]
+        else:
+            worksheet = workbook[sheet]
+        return worksheetValues(worksheet)
+    finally:
+        workbook.close()
+
+@prf.timed("readWorkbookValues")
+def readWorkbookValues(fileName, sheets=None):
+    """
+    Reads the cells of several sheets of an input file, opening and parsing
+    the workbook only once. Every sheet is converted like in readSheetValues().
+
+    Parameters
+    ----------
+    fileName : str
+        Name of input file.
+    sheets : list, optional
+        Sheet names (str) or sheet indices (int). Sheets which do not exist
+        in the file are left out of the result. The default is None (every
+        sheet of the file).
+
+    Returns
+    -------
+    values : dict
+        Cell values of every sheet, keyed by the entries of sheets or by the
+        sheet names if sheets is None.
+    
+    """
+    
+    if not isOpenpyxlFile(fileName):
+        import pandas as pd
+        frames = pd.read_excel(fileName, sheet_name=None, header=None)
+        names = list(frames.keys())
+        if sheets is None:
+            sheets = names
+        values = {}
+        for s in sheets:
+            if isinstance(s, int) and -len(names) <= s < len(names):
+                values[s] = frames[names[s]].values
+            elif s in frames:
+                values[s] = frames[s].values
+        return values
+    
+    import openpyxl
+    workbook = openpyxl.load_workbook(fileName, read_only=True, data_only=True)
+    try:
+        if sheets is None:
+            sheets = workbook.sheetnames
+        values = {}
+        for s in sheets:
+            if isinstance(s, int) and -len(workbook.worksheets) <= s < len(workbook.worksheets):
+                values[s] = worksheetValues(workbook.worksheets[s])
+            elif s in workbook.sheetnames:
+                values[s] = worksheetValues(workbook[s])
+        return values
+    finally:
+        workbook.close()
+
+def worksheetValues(worksheet):
+    """
+    Streams every cell of an openpyxl worksheet into a two-dimensional
+    np.array of objects, see readSheetValues().
+
+    Parameters
+    ----------
+    worksheet : openpyxl.worksheet.ReadOnlyWorksheet
+        Worksheet of a workbook opened in read-only mode.
+
+    Returns
+    -------
+    values : np.array
+        Cell values of the sheet.
+    
+    """
+    
+    # The dimensions stored in the file are not always reliable
+    worksheet.reset_dimensions()
+    rows = [streamRow(row) for row in worksheet.iter_rows(values_only=True)]
+    
+    # Trim trailing empty rows and extend all rows to the same width
+    while rows and len(rows[-1]) == 0:
+        rows.pop()
+    width = max([len(row) for row in rows] + [0])
+    values = np.full((len(rows), width), np.nan, dtype=object)
+    for i, row in enumerate(rows):
+        values[i, :len(row)] = row
+    return values
+
+def streamRow(row):
+    """
+    Converts a row of cell values from openpyxl in the same way as pandas:
+    Empty cells become NaN, floats without decimal places become int.
+    Trailing empty cells are removed.
+
+    Parameters
+    ----------
+    row : tuple
+        Cell values of a single row.
+
+    Returns
+    -------
+    converted : list
+        Converted cell values.
+    
+    """
+    
+    converted = []
+    for v in row:
+        if v is None or v == "":
+            v = np.nan
+        elif isinstance(v, float) and v.is_integer():
+            v = int(v)
+        converted.append(v)
+    while converted and converted[-1] is np.nan:
+        converted.pop()
+    return converted
+
 
 def readInput(fileName, sheet):
     """
-    Input function. Opens the given Excel file and imports the selected sheet
-    as a whole into a pandas.DataFrame which can be further handled.
+    Input function. Reads every cell of the selected sheet of the given Excel
+    file into an np.array (see readSheetValues(), xlsx/xlsm files are read
+    with openpyxl) and splits it into attack names and weapons (see
+    parseInput()).
         
     Parameters
     ----------
@@ -25,92 +231,99 @@ def readInput(fileName, sheet):
     -------
     dfWeaponList : list
         two-dimensional list containing attacks which themselves contain weapon
-        data.
+        data. Every weapon is an np.array block of input cells.
+    attackNames : list
+        Names of the attacks.
     
     """
     
-    # Read Weapon data from Excel file. header=None prevents pandas from assuming
-    # a header line, which the input file does not have.
-    dfWeapon = pd.read_excel(fileName, sheet_name=sheet, header=None)
+    # Read Weapon data from Excel file without a header line, which the input
+    # file does not have.
+    return parseInput(readSheetValues(fileName, sheet))
+
+def parseInput(values):
+    """
+    Splits the cells of an input sheet into attack names and weapons.
+
+    Parameters
+    ----------
+    values : np.array
+        Cell values of the sheet as given by readSheetValues().
+
+    Returns
+    -------
+    dfWeaponList : list
+        two-dimensional list containing attacks which themselves contain weapon
+        data.
+    attackNames : list
+        Names of the attacks.
+    
+    """
     
     # The first row contains the attack names, they are separated here and
     # stored in a separate list
     attackNames = []
-    attackRow = dfWeapon.iloc[0,:]
-    for a in attackRow[~pd.isnull(attackRow)]:
+    attackRow = values[0,:]
+    for a in attackRow[attackRow == attackRow]:
         attackNames.append(str(a))
     
-    dfWeaponList = readInputWeapons(dfWeapon.iloc[1:,:])
+    dfWeaponList = readInputWeapons(values[1:,:])
     
     return dfWeaponList, attackNames
 
+@prf.timed("readInputWeapons")
 def readInputWeapons(dfWeapon):
     """
-    This function accepts a DataFrame from an Excel import and partitions it
+    This function accepts the cells of an Excel import and partitions them
     into attacks and weapons.
         
     Parameters
     ----------
-    dfWeapon : pandas.DataFrame
-        The input is a single DataFrame which 1:1 represents the input file.
+    dfWeapon : np.array or pandas.DataFrame
+        The input is a single array of cell values which 1:1 represents the
+        input file, empty cells are NaN.
 
     Returns
     -------
     dfWeaponList : list
-        Two-dimensional list with attacks and weapons.
+        Two-dimensional list with attacks and weapons. Every weapon is a view
+        of the input array with the cell block of the weapon.
     
     """
     
+    values = np.asarray(getattr(dfWeapon, "values", dfWeapon), dtype=object)
+    
+    # Empty cells contain NaN, which is the only value not equal to itself.
+    cutMap = values != values
+    
     # The first column of the input file contains description text for the row
     # contents and is helpful for finding empty lines, which divide weapons
     # from each other.
     # The input is searched row-wise to find completely empty rows. The indices
     # of those rows are written to cutIndexHorizontal
-    # An empty row contains only NaN entries, which means that isna() of this
-    # row only contains True.
-    cutIndexHorizontal = [-1]
-    
-    cutMap = dfWeapon.isna().values
-    for i in range(dfWeapon.values.shape[0]):
-        if not False in cutMap[i,:]:
-            cutIndexHorizontal.append(i)
+    cutIndexHorizontal = [-1] + list(np.flatnonzero(cutMap.all(axis=1)))
     
     # The first column is no longer needed after that and is removed.
-    dfWeapon = dfWeapon.drop(labels=0, axis=1)
+    values = values[:,1:]
+    cutMap = cutMap[:,1:]
     
     # The attacks are separated by empty columns.
     # The process is exactly the same as the search for empty rows above.
-    cutIndexVertical = [-1]
-
-    # dfWeapon.isna() is searched for columns with only True-entries.
-    cutMap = dfWeapon.isna().values
-    for i in range(dfWeapon.values.shape[1]):
-        if not False in cutMap[:,i]:
-            cutIndexVertical.append(i)
+    cutIndexVertical = [-1] + list(np.flatnonzero(cutMap.all(axis=0)))
     
-    # dfWeapon is now separated along the empty columns to separate attacks from
-    # each other. They are temporarily stored in dfAttackList, before they are
-    # split along empty rows to separate weapons from each other.
-    dfAttackList = []
-    for index in range(1,len(cutIndexVertical)):
-        dfAttackList.append(dfWeapon.iloc[:,cutIndexVertical[index-1]+1:cutIndexVertical[index]])
-    
-    dfAttackList.append(dfWeapon.iloc[:,cutIndexVertical[-1]+1:])
-
-    # Horizontal splitting of the attacks and storing the resulting weapon
-    # dataFrames in dfWeaponList, grouped by attack.
+    # The sheet is now separated along the empty columns to separate attacks
+    # from each other and along empty rows to separate weapons from each other.
+    # Blocks without any data are skipped.
     # dfWeaponList looks like this: [[A1W1, A1W2], [A2W1], [A3W1, A3W2, A3W3]]
+    columnBounds = list(zip(np.add(cutIndexVertical, 1),
+                            cutIndexVertical[1:] + [values.shape[1]]))
+    rowBounds = list(zip(np.add(cutIndexHorizontal, 1),
+                         cutIndexHorizontal[1:] + [values.shape[0]]))
     dfWeaponList = []
-
-    for a in range(len(dfAttackList)):
+    for c0, c1 in columnBounds:
         dfWeaponList.append([])
-        attack = dfAttackList[a]
-        for index in range(1,len(cutIndexHorizontal)):
-            subset = attack.iloc[cutIndexHorizontal[index-1]+1:cutIndexHorizontal[index],:]
-            if False in subset.isna().values:
-                dfWeaponList[a].append(subset)
-        subset = attack.iloc[cutIndexHorizontal[-1]+1:,:]
-        if False in subset.isna().values:
-            dfWeaponList[a].append(subset)
+        for r0, r1 in rowBounds:
+            if not cutMap[r0:r1, c0:c1].all():
+                dfWeaponList[-1].append(values[r0:r1, c0:c1])
         
-    return dfWeaponList
\ No newline at end of file
+    return dfWeaponList
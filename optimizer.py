@@ -0,0 +1,564 @@
+# -*- coding: utf-8 -*-
+
+"""
+optimizer.py provides the build optimizer of damage-calc: it takes a base
+weapon and a catalog of modifiers (feats, buffs, weapon options) and finds
+the combinations with the highest expected full attack damage against a
+weighted AC distribution.
+
+A Modifier changes numerical weapon parameters by a fixed amount (e.g. Power
+Attack: attackBonus -3, damageBonus +6), adds dice (e.g. flaming: extraDice
+1d6), appends attacks (e.g. haste: baseAttacks +[0]) or doubles the threat
+range (e.g. Improved Critical, does not stack). Modifiers with the same group
+exclude each other (e.g. alternative weapons), every other modifier is
+toggled on or off independently.
+
+The search is a level-by-level branch and bound over the modifiers: every
+partial build gets an upper bound that assumes the best value of every
+undecided modifier (its positive changes and all of its dice, attacks and
+threat doubling at once), and partial builds whose bound is below the K-th
+best complete build are pruned. The bound is valid as long as every
+parameter only increases the damage in its beneficial direction, i.e. the
+damage bonuses of the base weapon are not negative. Every level is evaluated
+with batch.calcBatchAC(), partial builds with the same dice, attacks and
+threat range share one batch.
+
+Start via "python . --optimize catalog.json" from this folder or from Python:
+    base = ws.WeaponSpec("Greatsword", baseDice="2d6", baseAttacks=[0, -5],
+                         attackBonus=12, damageBonus=9, critRange=19)
+    catalog = [opt.Modifier("Power Attack", {"attackBonus": -3, "damageBonus": 9}),
+               opt.Modifier("Haste", {"attackBonus": 1}, attacks=[0]),
+               opt.Modifier("Improved Critical", doubleThreat=True)]
+    results = opt.optimize(base, catalog, {20: 1, 25: 2, 30: 1}, top=5)
+
+*** Catalog file (JSON): ***
+{"base": weapon as in WeaponSpec.fromDict(),
+ "modifiers": [{"name": "Power Attack",
+                "changes": {"attackBonus": -3, "damageBonus": 9},
+                "dice": {"extraDice": "1d6"}, "attacks": [0],
+                "doubleThreat": false, "group": null}, ...],
+ "acWeights": {"20": 1, "25": 2, "30": 1}, "top": 10}
+Every modifier entry except "name" is optional. Without "acWeights", every AC
+from minAC to maxAC has the same weight.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+"""
+
+import json
+
+import numpy as np
+
+import batch as bt
+import weaponSpec as ws
+
+# Numerical weapon parameters which modifiers can change
+NUMERIC_FIELDS = ("attackBonus", "damageBonus", "critRange", "critMultiplier",
+                  "critConfirmBonus", "precisionDamage", "extraDamage",
+                  "extraCritDamage")
+
+# Direction in which every numerical parameter increases the damage
+FIELD_DIRECTIONS = np.array([1, 1, -1, 1, 1, 1, 1, 1])
+
+# Number of builds per batch.calcBatchAC() call
+CHUNK_SIZE = 16384
+
+
+class Modifier:
+    """
+    The Modifier class holds a single option of the build catalog.
+    """
+
+    def __init__(self, name, changes=None, dice=None, attacks=(),
+                 doubleThreat=False, group=None):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the modifier.
+        changes : dict, optional
+            Changes of numerical parameters (see NUMERIC_FIELDS), e.g.
+            {"attackBonus": -3, "damageBonus": 6}. The default is None.
+        dice : dict, optional
+            Additional dice per dice parameter as dice expression or list of
+            dice tuples, e.g. {"extraDice": "1d6"}. The default is None.
+        attacks : list, optional
+            BAB penalties of additional attacks. The default is ().
+        doubleThreat : bool, optional
+            Doubles the threat range. The default is False.
+        group : str, optional
+            Modifiers of the same group exclude each other. The default is
+            None (independent modifier).
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.name = name
+        self.changes = dict(changes or {})
+        for key in self.changes:
+            if key not in NUMERIC_FIELDS:
+                raise ValueError("Modifier {} can not change {}".format(name, key))
+        self.dice = {}
+        for key, value in (dice or {}).items():
+            if key not in ws.DICE_FIELDS:
+                raise ValueError("Modifier {} can not add dice to {}".format(name, key))
+            self.dice[key] = ws.toDiceTuples(value)
+        self.attacks = tuple(int(b) for b in attacks)
+        self.doubleThreat = bool(doubleThreat)
+        self.group = group
+
+    def __repr__(self):
+        return "Modifier({!r})".format(self.name)
+
+    def isStructural(self):
+        """
+        Returns
+        -------
+        bool
+            True if the modifier adds dice or attacks or doubles the threat
+            range, which can not be expressed as numerical change.
+
+        """
+
+        return len(self.dice) > 0 or len(self.attacks) > 0 or self.doubleThreat
+
+    def delta(self):
+        """
+        Returns
+        -------
+        np.array
+            Change of every parameter of NUMERIC_FIELDS.
+
+        """
+
+        return np.array([self.changes.get(k, 0) for k in NUMERIC_FIELDS], dtype=float)
+
+    @classmethod
+    def fromDict(cls, values):
+        """
+        Creates a Modifier from a dict as in the catalog file, see module
+        docstring.
+
+        Parameters
+        ----------
+        values : dict
+            Modifier parameters.
+
+        Returns
+        -------
+        Modifier
+            New Modifier.
+
+        """
+
+        return cls(values["name"], values.get("changes"), values.get("dice"),
+                   values.get("attacks", ()), values.get("doubleThreat", False),
+                   values.get("group"))
+
+
+def acDistribution(acWeights=None, minAC=10, maxAC=40):
+    """
+    Converts an AC distribution into an AC array and normalized weights.
+
+    Parameters
+    ----------
+    acWeights : dict, optional
+        Weight of every target AC. The default is None (same weight for every
+        AC from minAC to maxAC).
+    minAC : int, optional
+        Lower limit of target AC without acWeights.
+    maxAC : int, optional
+        Upper limit of target AC without acWeights.
+
+    Returns
+    -------
+    acArray : np.array
+        Target ACs.
+    weights : np.array
+        Weight of every AC, the weights sum up to 1.
+
+    """
+
+    if acWeights is None:
+        acArray = np.arange(minAC, maxAC+1)
+        weights = np.ones(acArray.size)
+    else:
+        acArray = np.array([int(ac) for ac in acWeights], dtype=int)
+        weights = np.array([float(w) for w in acWeights.values()])
+    if acArray.size == 0 or weights.sum() <= 0:
+        raise ValueError("The AC distribution needs a positive total weight")
+    return acArray, weights / weights.sum()
+
+
+class Optimizer:
+    """
+    The Optimizer class searches the combinations of a modifier catalog for
+    the builds with the highest expected damage.
+    """
+
+    def __init__(self, base, modifiers, acArray, weights, chunkSize=CHUNK_SIZE):
+        """
+        Parameters
+        ----------
+        base : weaponSpec.WeaponSpec
+            Base weapon without any modifier.
+        modifiers : list
+            List of Modifier objects.
+        acArray : np.array
+            Target ACs.
+        weights : np.array
+            Weight of every target AC.
+        chunkSize : int, optional
+            Number of builds per batch. The default is CHUNK_SIZE.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.base = base
+        self.modifiers = list(modifiers)
+        self.acArray = np.asarray(acArray)
+        self.weights = np.asarray(weights, dtype=float)
+        self.chunkSize = chunkSize
+        self.evaluations = 0
+        self.baseValues = np.array([getattr(base, k) for k in NUMERIC_FIELDS],
+                                   dtype=float)
+
+        # Structural modifiers are tracked as boolean columns of the builds
+        self.structural = [i for i, m in enumerate(self.modifiers) if m.isStructural()]
+        structIndex = {m: s for s, m in enumerate(self.structural)}
+
+        # Every decision is a group of exclusive modifiers, option 0 of a
+        # decision is "none of them"
+        groups = {}
+        decisions = []
+        for i, m in enumerate(self.modifiers):
+            if m.group is None:
+                decisions.append([i])
+            elif m.group in groups:
+                groups[m.group].append(i)
+            else:
+                groups[m.group] = [i]
+                decisions.append(groups[m.group])
+
+        # Changes of every option and the optimistic change of every decision
+        deltaTables = []
+        structTables = []
+        for options in decisions:
+            delta = np.zeros((len(options)+1, len(NUMERIC_FIELDS)))
+            struct = np.zeros((len(options)+1, len(self.structural)), dtype=bool)
+            for c, i in enumerate(options):
+                delta[c+1] = self.modifiers[i].delta()
+                if i in structIndex:
+                    struct[c+1, structIndex[i]] = True
+            deltaTables.append(delta)
+            structTables.append(struct)
+
+        # Decisions with the largest optimistic gain are taken first, which
+        # tightens the bounds of the following levels
+        gains = self.evaluate(np.array([self.optimisticDelta(d) for d in deltaTables]),
+                              np.array([s.any(axis=0) for s in structTables]))
+        order = np.argsort(-gains, kind="stable")
+        self.decisions = [decisions[d] for d in order]
+        self.deltaTables = [deltaTables[d] for d in order]
+        self.structTables = [structTables[d] for d in order]
+
+        # Optimistic changes of all decisions after every level
+        levels = len(self.decisions)
+        self.boundDeltas = np.zeros((levels+1, len(NUMERIC_FIELDS)))
+        self.boundStructs = np.zeros((levels+1, len(self.structural)), dtype=bool)
+        for d in range(levels-1, -1, -1):
+            self.boundDeltas[d] = self.boundDeltas[d+1] + self.optimisticDelta(self.deltaTables[d])
+            self.boundStructs[d] = self.boundStructs[d+1] | self.structTables[d].any(axis=0)
+
+    def combinations(self):
+        """
+        Returns
+        -------
+        int
+            Number of possible builds.
+
+        """
+
+        return int(np.prod([len(options)+1 for options in self.decisions]))
+
+    @staticmethod
+    def optimisticDelta(deltaTable):
+        """
+        Best change of every numerical parameter over the options of a
+        decision, including "none of them".
+
+        Parameters
+        ----------
+        deltaTable : np.array
+            (option x parameter) changes of a decision.
+
+        Returns
+        -------
+        np.array
+            Optimistic change of every parameter.
+
+        """
+
+        return (deltaTable * FIELD_DIRECTIONS).max(axis=0) * FIELD_DIRECTIONS
+
+    def structuralParameters(self, active):
+        """
+        Batch parameters which are shared by builds with the same structural
+        modifiers.
+
+        Parameters
+        ----------
+        active : list
+            Indices of the active structural modifiers.
+
+        Returns
+        -------
+        variants : dict
+            Dice, baseAttacks and target parameters.
+        doubleThreat : bool
+            True if the threat range is doubled.
+
+        """
+
+        variants = {k: getattr(self.base, k) for k in ws.DICE_FIELDS}
+        variants["baseAttacks"] = list(self.base.baseAttacks)
+        doubleThreat = False
+        for i in active:
+            m = self.modifiers[i]
+            for k, dice in m.dice.items():
+                variants[k] = variants[k] + dice
+            variants["baseAttacks"] += list(m.attacks)
+            doubleThreat |= m.doubleThreat
+        for k in ("fortification", "precImmunity", "failChance", "damageReduction"):
+            variants[k] = getattr(self.base, k)
+        return variants, doubleThreat
+
+    def evaluate(self, deltas, structs):
+        """
+        Calculates the expected damage of several builds against the AC
+        distribution.
+
+        Parameters
+        ----------
+        deltas : np.array
+            (build x parameter) changes of the numerical parameters.
+        structs : np.array
+            (build x structural modifier) boolean array of the active
+            structural modifiers.
+
+        Returns
+        -------
+        values : np.array
+            Expected damage of every build.
+
+        """
+
+        values = np.zeros(len(deltas))
+        if len(deltas) == 0:
+            return values
+        self.evaluations += len(deltas)
+
+        keys, inverse = np.unique(np.packbits(structs, axis=1), axis=0,
+                                  return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for g in range(len(keys)):
+            index = np.flatnonzero(inverse == g)
+            variants, doubleThreat = self.structuralParameters(
+                [self.structural[s] for s in np.flatnonzero(structs[index[0]])])
+            for start in range(0, index.size, self.chunkSize):
+                part = index[start:start+self.chunkSize]
+                numeric = self.baseValues + deltas[part]
+                for j, k in enumerate(NUMERIC_FIELDS):
+                    variants[k] = numeric[:, j]
+                critRange = np.maximum(variants["critRange"], 2)
+                if doubleThreat:
+                    critRange = np.maximum(21 - 2 * (21 - critRange), 2)
+                variants["critRange"] = critRange
+                variants["critMultiplier"] = numeric[:, 3].astype(int)
+                values[part] = bt.calcBatchAC(variants, self.acArray) @ self.weights
+        return values
+
+    def search(self, top=10):
+        """
+        Branch and bound search for the best builds.
+
+        Parameters
+        ----------
+        top : int, optional
+            Number of returned builds. The default is 10.
+
+        Returns
+        -------
+        values : np.array
+            Expected damage of the best builds, in descending order.
+        choices : np.array
+            (build x decision) chosen option of every decision, 0 is "none".
+
+        """
+
+        levels = len(self.decisions)
+        choices = np.zeros((1, levels), dtype=np.int16)
+        deltas = np.zeros((1, len(NUMERIC_FIELDS)))
+        structs = np.zeros((1, len(self.structural)), dtype=bool)
+        bestValues = self.evaluate(deltas, structs)
+        bestChoices = choices.copy()
+
+        for d in range(levels):
+            # Every remaining partial build with every option of decision d
+            width = len(self.decisions[d]) + 1
+            parents = np.repeat(np.arange(len(choices)), width)
+            options = np.tile(np.arange(width), len(choices))
+            choices = choices[parents]
+            choices[:, d] = options
+            deltas = deltas[parents] + self.deltaTables[d][options]
+            structs = structs[parents] | self.structTables[d][options]
+
+            # Complete builds without the undecided modifiers, option 0
+            # equals the parent build which is already known
+            new = options > 0
+            values = np.concatenate((bestValues, self.evaluate(deltas[new], structs[new])))
+            best = np.argsort(-values, kind="stable")[:top]
+            bestValues = values[best]
+            bestChoices = np.concatenate((bestChoices, choices[new]))[best]
+
+            if d == levels - 1:
+                break
+            threshold = bestValues[-1] if len(bestValues) == top else -np.inf
+            bounds = self.evaluate(deltas + self.boundDeltas[d+1],
+                                   structs | self.boundStructs[d+1])
+            keep = bounds > threshold
+            choices = choices[keep]
+            deltas = deltas[keep]
+            structs = structs[keep]
+            if len(choices) == 0:
+                break
+
+        return bestValues, bestChoices
+
+    def activeModifiers(self, choice):
+        """
+        Parameters
+        ----------
+        choice : np.array
+            Chosen option of every decision, see search().
+
+        Returns
+        -------
+        list
+            Indices of the active modifiers in catalog order.
+
+        """
+
+        return sorted(options[c-1] for options, c in zip(self.decisions, choice) if c > 0)
+
+    def buildSpec(self, choice):
+        """
+        Creates the WeaponSpec of a build.
+
+        Parameters
+        ----------
+        choice : np.array
+            Chosen option of every decision, see search().
+
+        Returns
+        -------
+        weaponSpec.WeaponSpec
+            Base weapon with every chosen modifier.
+
+        """
+
+        active = self.activeModifiers(choice)
+        variants, doubleThreat = self.structuralParameters(
+            [i for i in active if i in self.structural])
+        numeric = self.baseValues + sum((self.modifiers[i].delta() for i in active),
+                                        np.zeros(len(NUMERIC_FIELDS)))
+        changes = {k: int(v) for k, v in zip(NUMERIC_FIELDS, numeric)}
+        changes["critRange"] = max(changes["critRange"], 2)
+        if doubleThreat:
+            changes["critRange"] = max(21 - 2 * (21 - changes["critRange"]), 2)
+        names = [self.modifiers[i].name for i in active]
+        return self.base.replace(
+            name=" + ".join([self.base.name] + names),
+            baseAttacks=variants["baseAttacks"],
+            **{k: variants[k] for k in ws.DICE_FIELDS}, **changes)
+
+
+def optimize(base, modifiers, acWeights=None, minAC=10, maxAC=40, top=10):
+    """
+    Finds the builds with the highest expected damage.
+
+    Parameters
+    ----------
+    base : weaponSpec.WeaponSpec
+        Base weapon without any modifier.
+    modifiers : list
+        List of Modifier objects.
+    acWeights : dict, optional
+        Weight of every target AC. The default is None (same weight for every
+        AC from minAC to maxAC).
+    minAC : int, optional
+        Lower limit of target AC without acWeights.
+    maxAC : int, optional
+        Upper limit of target AC without acWeights.
+    top : int, optional
+        Number of returned builds. The default is 10.
+
+    Returns
+    -------
+    results : list
+        {"damage": ..., "modifiers": [...], "spec": WeaponSpec} of the best
+        builds in descending order of expected damage.
+
+    """
+
+    acArray, weights = acDistribution(acWeights, minAC, maxAC)
+    optimizer = Optimizer(base, modifiers, acArray, weights)
+    values, choices = optimizer.search(top)
+    return [{"damage": float(v),
+             "modifiers": [optimizer.modifiers[i].name
+                           for i in optimizer.activeModifiers(c)],
+             "spec": optimizer.buildSpec(c)}
+            for v, c in zip(values, choices)]
+
+def optimizeFile(fileName, minAC=10, maxAC=40, top=None):
+    """
+    Runs the optimizer on a catalog file and prints the best builds.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of the JSON catalog file, see module docstring.
+    minAC : int, optional
+        Lower limit of target AC without "acWeights" in the file.
+    maxAC : int, optional
+        Upper limit of target AC without "acWeights" in the file.
+    top : int, optional
+        Number of printed builds. The default is None ("top" of the file or
+        10).
+
+    Returns
+    -------
+    results : list
+        Best builds, see optimize().
+
+    """
+
+    with open(fileName, encoding="utf-8") as f:
+        catalog = json.load(f)
+    base = ws.WeaponSpec.fromDict(catalog["base"])
+    modifiers = [Modifier.fromDict(m) for m in catalog["modifiers"]]
+    if top is None:
+        top = int(catalog.get("top", 10))
+    results = optimize(base, modifiers, catalog.get("acWeights"), minAC, maxAC, top)
+
+    print("Best builds of {} ({} modifiers)".format(base.name, len(modifiers)))
+    for rank, r in enumerate(results):
+        print("{:3d}. {:10.3f}  {}".format(rank+1, r["damage"],
+                                          ", ".join(r["modifiers"]) or "(base)"))
+    return results
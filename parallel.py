@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""
+parallel.py provides the evaluation of several input files and sheets for
+damage-calc, optionally spread across a pool of worker processes.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+    Sheet names are read with inputWeapons.readSheetNames()
+    calcSheets() opens and parses every input file only once for all of its
+    sheets
+    Added instrumentation for profiling.py
+    Added dtype of the damage arrays of the Sheet objects
+"""
+
+import glob
+import fnmatch
+from functools import partial
+
+import numpy as np
+
+import inputWeapons as iw
+import sheet as sht
+import profiling as prf
+
+
+def expandJobs(fileNames, sheets, allSheets=False):
+    """
+    Expands file name patterns and sheet names to a list of (file, sheet) jobs.
+    File names may contain glob patterns, sheet names may contain fnmatch
+    patterns (e.g. "Irgwi*") which are matched against the sheet names of
+    every file. The order of the jobs follows the order of the arguments, files
+    matched by a single pattern are sorted by name. Duplicate jobs are removed.
+
+    Parameters
+    ----------
+    fileNames : list
+        Input file names or glob patterns.
+    sheets : list
+        Input sheet names, sheet name patterns or sheet indices.
+    allSheets : bool, optional
+        Use every sheet of every file, sheets is ignored. The default is False.
+
+    Returns
+    -------
+    jobs : list
+        List of (fileName, sheet) tuples.
+
+    """
+
+    jobs = []
+    for pattern in fileNames:
+        files = sorted(glob.glob(pattern)) or [pattern]
+        for f in files:
+            if allSheets:
+                names = iw.readSheetNames(f)
+            else:
+                names = []
+                for s in sheets:
+                    if isinstance(s, str) and any(c in s for c in "*?["):
+                        names += fnmatch.filter(iw.readSheetNames(f), s)
+                    else:
+                        names.append(s)
+            for s in names:
+                if (f, s) not in jobs:
+                    jobs.append((f, s))
+    return jobs
+
+def jobLabel(job, withFileName=False):
+    """
+    Creates a short label for a job which is used for output sheet names and
+    graph file names.
+
+    Parameters
+    ----------
+    job : tuple
+        (fileName, sheet) tuple.
+    withFileName : bool, optional
+        Prefix the label with the file name (without path and extension).
+        The default is False.
+
+    Returns
+    -------
+    label : str
+        Label of the job.
+
+    """
+
+    fileName, sheet = job
+    if not withFileName:
+        return str(sheet)
+    stem = fileName.replace("\\", "/").split("/")[-1].rsplit(".", 1)[0]
+    return stem + "-" + str(sheet)
+
+@prf.timed("readJobs")
+def readJobs(jobs):
+    """
+    Reads the cells of the sheets of all jobs. Every input file is opened and
+    parsed only once, with inputWeapons.readWorkbookValues().
+
+    Parameters
+    ----------
+    jobs : list
+        List of (fileName, sheet) tuples as given by expandJobs().
+
+    Returns
+    -------
+    results : list
+        List of (values, error) tuples, one per job. values is the np.array of
+        cell values of the sheet, None if an error occurred. error is the
+        error message, None if no error occurred.
+
+    """
+
+    # Sheets of every file in the order of jobs
+    fileSheets = {}
+    for fileName, sheetName in jobs:
+        fileSheets.setdefault(fileName, []).append(sheetName)
+
+    fileValues = {}
+    for fileName, sheets in fileSheets.items():
+        try:
+            fileValues[fileName] = iw.readWorkbookValues(fileName, sheets)
+        except Exception as e:
+            fileValues[fileName] = "{}: {}".format(type(e).__name__, e)
+
+    results = []
+    for fileName, sheetName in jobs:
+        values = fileValues[fileName]
+        if isinstance(values, str):
+            results.append((None, values))
+        elif sheetName not in values:
+            results.append((None, "KeyError: Worksheet {} does not exist.".format(sheetName)))
+        else:
+            results.append((values[sheetName], None))
+    return results
+
+def calcSheetValues(readResult, minAC, maxAC, cache=None, dtype=np.float64):
+    """
+    Creates the Sheet object of a single input sheet which has already been
+    read. Errors are caught and returned, so that a single invalid sheet does
+    not stop the evaluation of all other sheets.
+
+    Parameters
+    ----------
+    readResult : tuple
+        (values, error) tuple as given by readJobs().
+    minAC : int
+        Lower limit of target AC for calculations.
+    maxAC : int
+        Upper limit of target AC for calculations.
+    cache : resultCache.ResultCache, optional
+        On-disk result cache. The default is None.
+    dtype : numpy dtype, optional
+        Floating point type of the damage arrays, see Sheet.
+        The default is np.float64.
+
+    Returns
+    -------
+    sheet : Sheet or None
+        Sheet object, None if an error occurred.
+    error : str or None
+        Error message, None if no error occurred.
+
+    """
+
+    values, error = readResult
+    if error is not None:
+        return None, error
+    try:
+        return sht.Sheet(iw.parseInput(values), minAC, maxAC, cache, dtype), None
+    except Exception as e:
+        return None, "{}: {}".format(type(e).__name__, e)
+
+@prf.timed("calcSheets")
+def calcSheets(jobs, minAC, maxAC, workers=1, cache=None, dtype=np.float64):
+    """
+    Creates the Sheet objects of all jobs. Every input file is read only once
+    (see readJobs()). With more than one worker, the calculation of the sheets
+    is distributed to a concurrent.futures.ProcessPoolExecutor. The results
+    are always returned in the order of jobs.
+
+    Parameters
+    ----------
+    jobs : list
+        List of (fileName, sheet) tuples as given by expandJobs().
+    minAC : int
+        Lower limit of target AC for calculations.
+    maxAC : int
+        Upper limit of target AC for calculations.
+    workers : int, optional
+        Number of worker processes. The default is 1 (no process pool).
+    cache : resultCache.ResultCache, optional
+        On-disk result cache, every worker opens its own connection.
+        The default is None.
+    dtype : numpy dtype, optional
+        Floating point type of the damage arrays, see Sheet.
+        The default is np.float64.
+
+    Returns
+    -------
+    results : list
+        List of (sheet, error) tuples as given by calcSheetValues(), one per
+        job.
+
+    """
+
+    readResults = readJobs(jobs)
+    calc = partial(calcSheetValues, minAC=minAC, maxAC=maxAC, cache=cache,
+                   dtype=dtype)
+    if workers <= 1 or len(jobs) <= 1:
+        return [calc(r) for r in readResults]
+
+    from concurrent.futures import ProcessPoolExecutor
+    
+    chunkSize = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(calc, readResults, chunksize=chunkSize))
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+"""
+probability.py provides the vectorized d20 probability kernels for damage-calc.
+
+Every function accepts scalars or np.arrays for all of its arguments and
+follows the NumPy broadcasting rules. Passing the iterative attack penalties
+as a column and the target ACs as a row, e.g.
+    hitChance(attackBonus, bab[:,np.newaxis], acArray[np.newaxis,:], failChance)
+yields an (attack x AC) matrix in a single expression. Additional leading axes
+(e.g. for weapon variants) work the same way.
+
+Every d20 chance only depends on the integer roll index
+    k = rollBonus + 21 - ac
+(the number of natural results that beat the AC without auto-hit and
+auto-miss), clipped to 0..20, and for threats on the critical threat range.
+The chances are therefore precomputed once as small tables and gathered with
+np.take(), which also does the clipping. The natural roll thresholds in
+ROLL_THRESHOLDS give the same results for the Monte Carlo simulation.
+Bonuses and ACs are integers, float arguments are truncated.
+
+*** Recent Changes: ***
+2026-10-17: First Version, replaces the element-wise loops of
+    Weapon.hitChance() and Weapon.critChance()
+2026-10-17: Chances are looked up in precomputed tables, added rollIndex(),
+    rollThreshold() and attackChances()
+"""
+
+import numpy as np
+
+# d20 chance k * 5% of every roll index k = 0..20
+D20_STEPS = np.arange(21) * 0.05
+
+# Chance to beat the AC, capped at 5% and 95% due to auto-hit and auto-miss
+ROLL_TABLE = np.clip(D20_STEPS, 0.05, 0.95)
+
+# Lowest natural d20 result that beats the AC (natural 1 always misses,
+# natural 20 always hits), consistent with ROLL_TABLE
+ROLL_THRESHOLDS = np.clip(21 - np.arange(21), 2, 20)
+
+# (critRange x roll index) threat chances for critRange = 0..21, capped by the
+# critical threat range instead of 95%
+MAX_THREAT = (21 - np.arange(22))[:, np.newaxis] * 0.05
+THREAT_TABLE = np.where(D20_STEPS > MAX_THREAT, MAX_THREAT,
+                        np.maximum(D20_STEPS, 0.05))
+
+
+def rollIndex(rollBonus, ac):
+    """
+    Index of a d20 roll in the chance tables, which is clipped to 0..20 by
+    the lookup.
+
+    Parameters
+    ----------
+    rollBonus : int or np.array
+        Complete bonus of the roll, including any iterative attack penalties.
+    ac : int or np.array
+        Target AC.
+
+    Returns
+    -------
+    index : np.array
+        rollBonus + 21 - ac.
+
+    """
+
+    return np.asarray(rollBonus + 21 - ac).astype(np.intp, copy=False)
+
+def rollThreshold(rollBonus, ac):
+    """
+    Lowest natural d20 result that beats the target AC, for the Monte Carlo
+    simulation. A roll succeeds with the chance rollChance() if the natural
+    result is at least this threshold.
+
+    Parameters
+    ----------
+    rollBonus : int or np.array
+        Complete bonus of the roll, including any iterative attack penalties.
+    ac : int or np.array
+        Target AC.
+
+    Returns
+    -------
+    threshold : np.array
+        Natural d20 result from 2 to 20.
+
+    """
+
+    return ROLL_THRESHOLDS.take(rollIndex(rollBonus, ac), mode="clip")
+
+
+def rollChance(rollBonus, ac):
+    """
+    Chance to beat the target AC with a d20 roll. The chance is capped at 5%
+    and 95% due to auto-hit and auto-miss.
+
+    Parameters
+    ----------
+    rollBonus : int or np.array
+        Complete bonus of the roll, including any iterative attack penalties.
+    ac : int or np.array
+        Target AC.
+
+    Returns
+    -------
+    chance : np.array
+        Chance of success without failure chance.
+
+    """
+
+    return ROLL_TABLE.take(rollIndex(rollBonus, ac), mode="clip")
+
+def hitChance(attackBonus, bab, ac, failChance):
+    """
+    Hit chance calculation for attacks with a single weapon. The hit chance is
+    appropriately modified by the given BAB penalty depending on the attack.
+
+    Parameters
+    ----------
+    attackBonus : int or np.array
+        Overall attack bonus of the weapon.
+    bab : int or np.array
+        Additional roll penalty for iterative attacks, twf, secondary etc.
+    ac : int or np.array
+        Target AC.
+    failChance : float or np.array
+        Failure chance due to concealment or similar effects (0 to 1).
+
+    Returns
+    -------
+    chance : np.array
+        Hit chance, broadcast over all arguments.
+
+    """
+
+    return rollChance(attackBonus + bab, ac) * (1 - failChance)
+
+def threatChance(attackBonus, bab, ac, critRange, failChance):
+    """
+    Chance to threaten a critical hit. It is calculated similarly to the hit
+    chance, but capped by the critical threat range instead of 95%.
+
+    Parameters
+    ----------
+    attackBonus : int or np.array
+        Overall attack bonus of the weapon.
+    bab : int or np.array
+        Additional roll penalty for iterative attacks, twf, secondary etc.
+    ac : int or np.array
+        Target AC.
+    critRange : int or np.array
+        Minimum result of the d20 which can threaten a critical hit.
+    failChance : float or np.array
+        Failure chance due to concealment or similar effects (0 to 1).
+
+    Returns
+    -------
+    chance : np.array
+        Threat chance, broadcast over all arguments.
+
+    """
+
+    # Flat index into THREAT_TABLE, the roll index needs an explicit clip
+    # to stay in its row
+    index = (np.clip(rollIndex(attackBonus + bab, ac), 0, 20)
+             + np.clip(np.asarray(critRange), 0, 21).astype(np.intp) * 21)
+    return THREAT_TABLE.take(index) * (1 - failChance)
+
+def confirmChance(attackBonus, critConfirmBonus, bab, ac, failChance):
+    """
+    Chance to confirm a threatened critical hit. Auto-hit, auto-miss and
+    failure chance are applied to confirmation rolls.
+
+    Parameters
+    ----------
+    attackBonus : int or np.array
+        Overall attack bonus of the weapon.
+    critConfirmBonus : int or np.array
+        Separate attack bonus for critical confirmation rolls.
+    bab : int or np.array
+        Additional roll penalty for iterative attacks, twf, secondary etc.
+    ac : int or np.array
+        Target AC.
+    failChance : float or np.array
+        Failure chance due to concealment or similar effects (0 to 1).
+
+    Returns
+    -------
+    chance : np.array
+        Confirmation chance, broadcast over all arguments.
+
+    """
+
+    return rollChance(attackBonus + critConfirmBonus + bab, ac) * (1 - failChance)
+
+def critChance(attackBonus, critConfirmBonus, bab, ac, critRange, failChance,
+               fortification):
+    """
+    Chance of a confirmed critical hit which is not nullified by fortification.
+
+    Parameters
+    ----------
+    attackBonus : int or np.array
+        Overall attack bonus of the weapon.
+    critConfirmBonus : int or np.array
+        Separate attack bonus for critical confirmation rolls.
+    bab : int or np.array
+        Additional roll penalty for iterative attacks, twf, secondary etc.
+    ac : int or np.array
+        Target AC.
+    critRange : int or np.array
+        Minimum result of the d20 which can threaten a critical hit.
+    failChance : float or np.array
+        Failure chance due to concealment or similar effects (0 to 1).
+    fortification : float or np.array
+        Chance for critical hits to be nullified (0 to 1).
+
+    Returns
+    -------
+    chance : np.array
+        Critical hit chance, broadcast over all arguments.
+
+    """
+
+    return (threatChance(attackBonus, bab, ac, critRange, failChance)
+            * confirmChance(attackBonus, critConfirmBonus, bab, ac, failChance)
+            * (1 - fortification))
+
+def attackChances(attackBonus, critConfirmBonus, bab, ac, critRange, failChance,
+                  fortification):
+    """
+    Hit chance and critical hit chance of the same attacks, as given by
+    hitChance() and critChance(). The roll index is computed only once for
+    both.
+
+    Parameters
+    ----------
+    attackBonus : int or np.array
+        Overall attack bonus of the weapon.
+    critConfirmBonus : int or np.array
+        Separate attack bonus for critical confirmation rolls.
+    bab : int or np.array
+        Additional roll penalty for iterative attacks, twf, secondary etc.
+    ac : int or np.array
+        Target AC.
+    critRange : int or np.array
+        Minimum result of the d20 which can threaten a critical hit.
+    failChance : float or np.array
+        Failure chance due to concealment or similar effects (0 to 1).
+    fortification : float or np.array
+        Chance for critical hits to be nullified (0 to 1).
+
+    Returns
+    -------
+    hitChances : np.array
+        Hit chances, broadcast over all arguments.
+    critChances : np.array
+        Critical hit chances, broadcast over all arguments.
+
+    """
+
+    index = rollIndex(attackBonus + bab, ac)
+    hitChances = ROLL_TABLE.take(index, mode="clip")
+    critChances = ROLL_TABLE.take(index + critConfirmBonus, mode="clip")
+    np.clip(index, 0, 20, out=index)
+    index += np.clip(np.asarray(critRange), 0, 21).astype(np.intp) * 21
+    critChances *= THREAT_TABLE.take(index)
+
+    # Failure chance applies to attack and confirmation roll. Both factors
+    # are skipped if they are zero everywhere, which is the common case.
+    if np.any(failChance):
+        success = 1 - np.asarray(failChance)
+        hitChances = hitChances * success
+        critChances = critChances * success**2
+    if np.any(fortification):
+        critChances = critChances * (1 - np.asarray(fortification))
+    return hitChances, critChances
+
+def expectedDamage(avgDamageHit, avgDamageCrit, hitChances, critChances):
+    """
+    Combines hit and critical hit chances with the average damage per hit and
+    per critical hit to the average damage per attack.
+
+    Parameters
+    ----------
+    avgDamageHit : float or np.array
+        Average damage per normal hit.
+    avgDamageCrit : float or np.array
+        Average damage per critical hit.
+    hitChances : np.array
+        Hit chances as given by hitChance().
+    critChances : np.array
+        Critical hit chances as given by critChance().
+
+    Returns
+    -------
+    damage : np.array
+        Average damage per attack.
+
+    """
+
+    return avgDamageHit * hitChances + (avgDamageCrit - avgDamageHit) * critChances
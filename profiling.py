@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+"""
+profiling.py provides the opt-in instrumentation of damage-calc: wall time and
+call count of every calculation stage (reading input, splitting weapons,
+dice distributions, damage and probability calculations, output and graphs)
+plus details like dice pool sizes and array sizes of every weapon, attack and
+sheet.
+
+The instrumentation is disabled by default and then only costs a function
+call per stage. Start it from the command line with "--profile" or from
+Python:
+    import profiling as prf
+    prf.enable()
+    sheet = sht.Sheet(iw.readInput("input_test.xlsx", "Aargan"))
+    prf.disable()
+    prf.printReport()
+    prf.writeReport("profile.json")
+
+Optionally, cProfile runs at the same time and writes its statistics to a
+file, which can be viewed with pstats or turned into a flame graph with tools
+like snakeviz or flameprof.
+
+Only the current process is instrumented, worker processes of
+parallel.calcSheets() are not.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+"""
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+# Active Profiler object, None if the instrumentation is disabled
+activeProfiler = None
+
+# Record that is handed out while the instrumentation is disabled, writes to
+# it are discarded
+unusedRecord = {}
+
+
+class Profiler:
+    """
+    The Profiler class collects the stage timings and records of a run.
+    """
+
+    def __init__(self, cProfileFileName=None):
+        """
+        Parameters
+        ----------
+        cProfileFileName : str, optional
+            File name for the cProfile statistics. The default is None (no
+            cProfile run).
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.stages = {}
+        self.records = []
+        self.depth = 0
+        self.startTime = time.perf_counter()
+        self.totalTime = None
+        self.cProfileFileName = cProfileFileName
+        self.cProfile = None
+        if cProfileFileName is not None:
+            import cProfile
+            self.cProfile = cProfile.Profile()
+            self.cProfile.enable()
+
+    def stop(self):
+        """
+        Stops the time measurement and writes the cProfile statistics.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.totalTime = time.perf_counter() - self.startTime
+        if self.cProfile is not None:
+            self.cProfile.disable()
+            self.cProfile.dump_stats(self.cProfileFileName)
+            self.cProfile = None
+
+    def add(self, name, elapsed):
+        """
+        Adds the wall time of a finished stage.
+
+        Parameters
+        ----------
+        name : str
+            Stage name.
+        elapsed : float
+            Wall time of the stage in seconds.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        stage = self.stages.setdefault(name, {"calls": 0, "time": 0., "maxTime": 0.})
+        stage["calls"] += 1
+        stage["time"] += elapsed
+        stage["maxTime"] = max(stage["maxTime"], elapsed)
+
+    def report(self):
+        """
+        Returns
+        -------
+        dict
+            Total wall time ("totalTime"), timings of every stage ("stages")
+            and details of every weapon, attack and sheet ("records").
+
+        """
+
+        totalTime = self.totalTime
+        if totalTime is None:
+            totalTime = time.perf_counter() - self.startTime
+        return {"totalTime": totalTime, "stages": self.stages,
+                "records": self.records}
+
+
+def enable(cProfileFileName=None):
+    """
+    Starts a new instrumented run.
+
+    Parameters
+    ----------
+    cProfileFileName : str, optional
+        File name for the cProfile statistics. The default is None (no
+        cProfile run).
+
+    Returns
+    -------
+    Profiler
+        Profiler of the run.
+
+    """
+
+    global activeProfiler
+    activeProfiler = Profiler(cProfileFileName)
+    return activeProfiler
+
+def disable():
+    """
+    Ends the instrumented run. The report of the run stays available until
+    the next call of enable().
+
+    Returns
+    -------
+    None.
+
+    """
+
+    global activeProfiler
+    if activeProfiler is not None and activeProfiler.totalTime is None:
+        activeProfiler.stop()
+
+def isEnabled():
+    """
+    Returns
+    -------
+    bool
+        True during an instrumented run.
+
+    """
+
+    return activeProfiler is not None and activeProfiler.totalTime is None
+
+@contextmanager
+def stage(name, **details):
+    """
+    Context manager which measures the wall time of a calculation stage.
+    The yielded dict takes additional details which are only known at the end
+    of the stage, e.g. array sizes. Stages which are given details are also
+    stored as records in the order in which they start.
+    Example:
+        with prf.stage("weapon", weapon=self.name) as record:
+            ...
+            record["arrayBytes"] = self.attackResults.nbytes
+
+    Parameters
+    ----------
+    name : str
+        Stage name.
+    **details
+        Details of the stage, e.g. the weapon name.
+
+    Yields
+    ------
+    record : dict
+        Details of the stage.
+
+    """
+
+    profiler = activeProfiler
+    if profiler is None or profiler.totalTime is not None:
+        yield unusedRecord
+        return
+    record = details
+    if len(details) > 0:
+        record = dict(stage=name, depth=profiler.depth, time=None, **details)
+        profiler.records.append(record)
+    profiler.depth += 1
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - start
+        profiler.depth -= 1
+        profiler.add(name, elapsed)
+        if len(details) > 0:
+            record["time"] = elapsed
+
+def timed(name):
+    """
+    Decorator which measures every call of a function as a stage without
+    details, see stage().
+
+    Parameters
+    ----------
+    name : str
+        Stage name.
+
+    Returns
+    -------
+    decorator : function
+        Decorator for the function.
+
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if activeProfiler is None or activeProfiler.totalTime is not None:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def report():
+    """
+    Returns
+    -------
+    dict or None
+        Report of the last instrumented run, see Profiler.report(). None if
+        there was no instrumented run.
+
+    """
+
+    if activeProfiler is None:
+        return None
+    return activeProfiler.report()
+
+def writeReport(fileName):
+    """
+    Writes the report of the last instrumented run to a JSON file.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of the JSON file.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    with open(fileName, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=1)
+
+def printReport(records=False):
+    """
+    Prints the stage timings of the last instrumented run as a table, sorted
+    by total time.
+
+    Parameters
+    ----------
+    records : bool, optional
+        Also print the details of every weapon, attack and sheet.
+        The default is False.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    values = report()
+    if values is None:
+        print("No profiling data.")
+        return
+
+    justLength = max([20] + [len(name) + 2 for name in values["stages"]])
+    print("Profile (total {:.3f} s)".format(values["totalTime"]))
+    print("Stage".ljust(justLength) + "Calls".rjust(8) + "Total [ms]".rjust(14)
+          + "Mean [ms]".rjust(12) + "Max [ms]".rjust(12) + "Share".rjust(8))
+    for name, s in sorted(values["stages"].items(), key=lambda x: -x[1]["time"]):
+        print(name.ljust(justLength) + str(s["calls"]).rjust(8)
+              + "{:14.3f}".format(s["time"] * 1e3)
+              + "{:12.3f}".format(s["time"] / s["calls"] * 1e3)
+              + "{:12.3f}".format(s["maxTime"] * 1e3)
+              + "{:7.1f}%".format(s["time"] / values["totalTime"] * 100))
+
+    if records:
+        print()
+        for r in values["records"]:
+            details = ", ".join("{}={}".format(k, v) for k, v in r.items()
+                                if k not in ("stage", "time", "depth"))
+            print("  " * r["depth"] + "{} {:.3f} ms: {}".format(
+                r["stage"], r["time"] * 1e3, details))
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+"""
+resultCache.py provides a persistent on-disk cache for weapon results.
+
+The results of every weapon (average damage per hit and per critical hit and
+the attackResults array) are stored in an SQLite database, keyed by a hash
+of the parsed weapon parameters and the AC range (see Weapon.cacheKey()).
+Edit-and-rerun loops on large workbooks then only recompute changed weapons.
+
+MemoryCache provides the same interface in memory, e.g. for long-running
+processes like the calculation server.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+    Added MemoryCache
+    CACHE_VERSION 2: exact fortification with damage reduction
+    ResultCache opens one database connection per thread, so that it can be
+    shared by the request threads of the calculation server
+"""
+
+import io
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Part of every cache key. Needs to be increased whenever the damage
+# calculation changes, so that outdated results are not reused.
+CACHE_VERSION = 2
+
+# np.load() parses the array header with ast.literal_eval(), which can fail
+# with a SystemError if several threads call it at the same time (CPython
+# 3.11), so the arrays of all ResultCache objects are read one at a time
+loadLock = threading.Lock()
+
+
+class ResultCache:
+    """
+    The ResultCache class represents a cache file. The database connection is
+    opened on first use, so that ResultCache objects can be passed to worker
+    processes, which open their own connection. Every thread opens its own
+    connection as well, so a ResultCache can be shared by the request threads
+    of a server.
+    """
+
+    def __init__(self, fileName="damage-calc-cache.sqlite"):
+        """
+        Parameters
+        ----------
+        fileName : str, optional
+            Name of the cache file. The default is "damage-calc-cache.sqlite".
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.fileName = fileName
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Connections and locks can not be pickled, workers open their own
+        # connection
+        state = self.__dict__.copy()
+        del state["local"], state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """
+        Opens the database connection of the current thread and creates the
+        result table if it does not exist yet.
+
+        Returns
+        -------
+        connection : sqlite3.Connection
+            Open database connection of the current thread.
+
+        """
+
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.fileName, timeout=60)
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS weapons "
+                    "(key TEXT PRIMARY KEY, avgDamageHit REAL, avgDamageCrit REAL, "
+                    "attackResults BLOB)")
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        """
+        Looks up the results of a weapon.
+
+        Parameters
+        ----------
+        key : str
+            Cache key as given by Weapon.cacheKey().
+
+        Returns
+        -------
+        tuple or None
+            (avgDamageHit, avgDamageCrit, attackResults) if the key is cached,
+            otherwise None.
+
+        """
+
+        row = self.connect().execute(
+            "SELECT avgDamageHit, avgDamageCrit, attackResults FROM weapons "
+            "WHERE key = ?", (key,)).fetchone()
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        with loadLock:
+            attackResults = np.load(io.BytesIO(row[2]))
+        return row[0], row[1], attackResults
+
+    def put(self, key, avgDamageHit, avgDamageCrit, attackResults):
+        """
+        Stores the results of a weapon.
+
+        Parameters
+        ----------
+        key : str
+            Cache key as given by Weapon.cacheKey().
+        avgDamageHit : float
+            Average damage per normal hit.
+        avgDamageCrit : float
+            Average damage per critical hit.
+        attackResults : np.array
+            Average damage array of the weapon.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        buffer = io.BytesIO()
+        np.save(buffer, attackResults, allow_pickle=False)
+        connection = self.connect()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO weapons VALUES (?, ?, ?, ?)",
+                (key, float(avgDamageHit), float(avgDamageCrit),
+                 buffer.getvalue()))
+
+    def clear(self):
+        """
+        Deletes every cached result.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        connection = self.connect()
+        with connection:
+            connection.execute("DELETE FROM weapons")
+
+    def close(self):
+        """
+        Closes the database connection of the current thread.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+
+class MemoryCache:
+    """
+    The MemoryCache class is an in-memory least recently used cache with the
+    interface of ResultCache. It is thread-safe, so it can be shared by the
+    request threads of a server.
+    """
+
+    def __init__(self, maxSize=65536):
+        """
+        Parameters
+        ----------
+        maxSize : int, optional
+            Maximum number of cached weapons. The default is 65536.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Looks up the results of a weapon.
+
+        Parameters
+        ----------
+        key : str
+            Cache key as given by Weapon.cacheKey().
+
+        Returns
+        -------
+        tuple or None
+            (avgDamageHit, avgDamageCrit, attackResults) if the key is cached,
+            otherwise None. attackResults must not be changed in place.
+
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, avgDamageHit, avgDamageCrit, attackResults):
+        """
+        Stores the results of a weapon and removes the least recently used
+        entry if the cache is full.
+
+        Parameters
+        ----------
+        key : str
+            Cache key as given by Weapon.cacheKey().
+        avgDamageHit : float
+            Average damage per normal hit.
+        avgDamageCrit : float
+            Average damage per critical hit.
+        attackResults : np.array
+            Average damage array of the weapon.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        with self.lock:
+            self.entries[key] = (avgDamageHit, avgDamageCrit, attackResults)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Deletes every cached result.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        with self.lock:
+            self.entries.clear()
+
+    def close(self):
+        """
+        Nothing to close, exists for compatibility with ResultCache.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        pass
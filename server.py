@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+
+"""
+server.py provides a long-running calculation server with a JSON-over-HTTP
+API, so that other programs (bots, web character builders) do not have to
+start the program, import its libraries and parse a workbook per request.
+
+The server keeps a single result cache for all requests: Weapons that were
+calculated for an earlier request with the same AC range are taken from the
+cache.
+
+Start via "python . --server <port>" from this folder.
+
+*** API: ***
+POST /calculate
+    Body: a single build or {"builds": [build, build, ...]}. The builds of a
+    request are calculated one after another and answered in one response.
+    build = {"minAC": 10, "maxAC": 40,
+             "attacks": [{"name": "Attack 1",
+                          "weapons": [weapon, weapon, ...]}, ...]}
+    weapon = parameters as in WeaponSpec.fromDict(), e.g.
+             {"name": "Longsword", "baseDice": "1d8", "baseAttacks": [0, -5],
+              "attackBonus": 12, "damageBonus": 7, "critRange": 19}
+    Response: a single result or {"results": [result, result, ...]}
+    result = {"ac": [10, ..., 40],
+              "attacks": [{"name": "Attack 1", "damage": [...],
+                           "weapons": [{"name": "Longsword",
+                                        "damage": [...]}, ...]}, ...],
+              "difference": [[...], ...]}
+    "difference" holds the damage difference of every attack except the
+    first to the first one (base case), as in Sheet.diffDamage.
+    The AC range of a build may contain at most MAX_AC_COUNT ACs. Invalid
+    requests are answered with status 400, unexpected errors with status 500,
+    both with {"error": ...}.
+GET /status
+    Number of cached weapons, cache hits and misses and served requests.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+2026-10-17: Results are read from the shared damage arrays of Sheet and Weapon
+2026-10-17: AC ranges are limited to MAX_AC_COUNT ACs, unexpected errors are
+    answered with status 500
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+import resultCache as rc
+import sheet as sht
+import weaponSpec as ws
+
+# Largest accepted request body in bytes
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# Largest accepted number of target ACs per build
+MAX_AC_COUNT = 4096
+
+
+def parseBuild(build):
+    """
+    Converts a build of the JSON API into the input of the Sheet class.
+
+    Parameters
+    ----------
+    build : dict
+        Build as described in the module docstring.
+
+    Returns
+    -------
+    inputDataTuple : 2-tuple
+        2D-list of WeaponSpec objects and list of attack names.
+    minAC : int
+        Lower limit of target AC for calculations.
+    maxAC : int
+        Upper limit of target AC for calculations.
+
+    """
+
+    weaponList = []
+    attackNames = []
+    for i, a in enumerate(build["attacks"]):
+        weaponList.append([ws.WeaponSpec.fromDict(w) for w in a["weapons"]])
+        attackNames.append(a.get("name", "Attack " + str(i+1)))
+    minAC = int(build.get("minAC", 10))
+    maxAC = int(build.get("maxAC", 40))
+    if maxAC < minAC:
+        raise ValueError("maxAC must not be smaller than minAC")
+    if maxAC - minAC + 1 > MAX_AC_COUNT:
+        raise ValueError("AC range must not contain more than {} ACs".format(MAX_AC_COUNT))
+    return (weaponList, attackNames), minAC, maxAC
+
+def calcBuild(build, cache=None):
+    """
+    Calculates a single build of the JSON API.
+
+    Parameters
+    ----------
+    build : dict
+        Build as described in the module docstring.
+    cache : resultCache.MemoryCache or resultCache.ResultCache, optional
+        Result cache for the weapons. The default is None.
+
+    Returns
+    -------
+    result : dict
+        Result as described in the module docstring.
+
+    """
+
+    inputDataTuple, minAC, maxAC = parseBuild(build)
+    sheet = sht.Sheet(inputDataTuple, minAC, maxAC, cache)
+
+    attacks = []
+    for i, a in enumerate(sheet.attacks):
+        weapons = [{"name": w.name, "damage": w.attackResults[:,0].tolist()}
+                   for w in a.weapons]
+        attacks.append({"name": a.name, "damage": sheet.damage[:,i].tolist(),
+                        "weapons": weapons})
+    difference = sheet.diffDamage.T.tolist()
+    return {"ac": list(range(minAC, maxAC+1)), "attacks": attacks,
+            "difference": difference}
+
+def calcRequest(body, cache=None):
+    """
+    Calculates every build of a request of the JSON API.
+
+    Parameters
+    ----------
+    body : dict
+        A single build or {"builds": [build, ...]}.
+    cache : resultCache.MemoryCache or resultCache.ResultCache, optional
+        Result cache for the weapons. The default is None.
+
+    Returns
+    -------
+    dict
+        A single result or {"results": [result, ...]}.
+
+    """
+
+    if "builds" in body:
+        return {"results": [calcBuild(b, cache) for b in body["builds"]]}
+    return calcBuild(body, cache)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    The RequestHandler class answers the requests of a CalculationServer.
+    """
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/status":
+            self.sendJson(200, self.server.status())
+        else:
+            self.sendJson(404, {"error": "Unknown path " + self.path})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/calculate":
+            self.sendJson(404, {"error": "Unknown path " + self.path})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_BODY_SIZE:
+                raise ValueError("Request body too large")
+            body = json.loads(self.rfile.read(length))
+            result = calcRequest(body, self.server.cache)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.sendJson(400, {"error": "{}: {}".format(type(e).__name__, e)})
+            return
+        except Exception as e:
+            self.sendJson(500, {"error": "{}: {}".format(type(e).__name__, e)})
+            return
+        self.server.countRequest()
+        self.sendJson(200, result)
+
+    def sendJson(self, status, values):
+        """
+        Sends a JSON response.
+
+        Parameters
+        ----------
+        status : int
+            HTTP status code.
+        values : dict
+            Content of the response.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        data = json.dumps(values).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Requests are not logged to keep the console free for errors
+        pass
+
+
+class CalculationServer(ThreadingHTTPServer):
+    """
+    The CalculationServer class is a multithreaded HTTP server which holds
+    the result cache shared by all requests.
+    """
+
+    daemon_threads = True
+    # Listen backlog for concurrent clients, the socketserver default of 5
+    # resets connections under load
+    request_queue_size = 128
+
+    def __init__(self, host="127.0.0.1", port=8080, cache=None):
+        """
+        Parameters
+        ----------
+        host : str, optional
+            Host address to listen on. The default is "127.0.0.1".
+        port : int, optional
+            Port to listen on, 0 selects a free port. The default is 8080.
+        cache : resultCache.MemoryCache or resultCache.ResultCache, optional
+            Result cache shared by all requests. The default is None, which
+            creates a new MemoryCache.
+
+        Returns
+        -------
+        None.
+
+        """
+
+        super().__init__((host, port), RequestHandler)
+        self.cache = cache if cache is not None else rc.MemoryCache()
+        self.requests = 0
+        self.requestLock = threading.Lock()
+
+    def countRequest(self):
+        with self.requestLock:
+            self.requests += 1
+
+    def status(self):
+        """
+        Returns
+        -------
+        dict
+            Number of served requests, cached weapons (MemoryCache only),
+            cache hits and cache misses.
+
+        """
+
+        values = {"requests": self.requests, "cacheHits": self.cache.hits,
+                  "cacheMisses": self.cache.misses}
+        if isinstance(self.cache, rc.MemoryCache):
+            values["cachedWeapons"] = len(self.cache.entries)
+        return values
+
+
+def serve(host="127.0.0.1", port=8080, cache=None):
+    """
+    Runs a CalculationServer until it is interrupted with Ctrl+C.
+
+    Parameters
+    ----------
+    host : str, optional
+        Host address to listen on. The default is "127.0.0.1".
+    port : int, optional
+        Port to listen on. The default is 8080.
+    cache : resultCache.MemoryCache or resultCache.ResultCache, optional
+        Result cache shared by all requests. The default is None (MemoryCache).
+
+    Returns
+    -------
+    None.
+
+    """
+
+    server = CalculationServer(host, port, cache)
+    print("Serving on http://{}:{}/calculate (Ctrl+C to stop)".format(
+        *server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def requestCalculation(body, url="http://127.0.0.1:8080/calculate", timeout=60):
+    """
+    Client function: sends a request to a running CalculationServer.
+
+    Parameters
+    ----------
+    body : dict
+        A single build or {"builds": [build, ...]}.
+    url : str, optional
+        URL of the calculate endpoint.
+        The default is "http://127.0.0.1:8080/calculate".
+    timeout : float, optional
+        Timeout in seconds. The default is 60.
+
+    Returns
+    -------
+    dict
+        Response of the server.
+
+    """
+
+    request = Request(url, data=json.dumps(body).encode("utf-8"),
+                      headers={"Content-Type": "application/json"})
+    with urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
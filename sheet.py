@@ -10,12 +10,38 @@ wrapped up in an input Excel sheet.
     Added argument for output file name to graph functions
     Added argument for graph title to graph functions
     Added functions printData() and printDataComplete()
+2026-10-17: Added optional on-disk result cache
+    outputData() also accepts an open pandas.ExcelWriter
+    pandas and matplotlib are imported on first use
+    Implemented outputDataComplete() and printDataComplete() with the complete
+    damage distribution of every attack
+    Added printSimulation()
+    Added setACRange() and updateWeapon() for incremental recalculation
+    Results array is preallocated instead of appended column by column
+    Added labeledResults() and labeledDiffResults()
+    Added outputColumnar() for Parquet, Arrow and .npz output
+    Added instrumentation for profiling.py
+    Added calcTargetExpectation() and printTargetExpectation() for weighted
+    target tables
+    Added calcProfiles() and printProfiles() for target profile tables
+    Added dtype of the damage arrays. The damage of all attacks is stored once
+    in self.damage and self.diffDamage, with the target ACs in self.acArray;
+    self.results and self.diffResults are assembled on demand.
 """
 
+import json
+
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import attack as atk
+import profiling as prf
+
+# pandas and matplotlib.pyplot are only imported by the functions which need
+# them, so that console-only runs do not pay their import time.
+
+# File extensions of the columnar output formats of outputColumnar()
+columnarFormats = {".parquet": "parquet", ".pq": "parquet",
+                   ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+                   ".npz": "npz"}
 
 # Global options for graphics with matplotlib.pyplot
 colorCycle = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
@@ -30,22 +56,34 @@ class Sheet:
     which contains one or more weapons.
     """
     
-    def __init__(self, inputDataTuple, minAC=10, maxAC=40):
+    @prf.timed("sheet")
+    def __init__(self, inputDataTuple, minAC=10, maxAC=40, cache=None,
+                 dtype=np.float64):
         """
         The constructor of the Sheet class takes a two-dimensional list of
-        pandas.DataFrames as given by inputWeapons and uses it to create as many
-        Attack objects als the list has columns.
+        weapons as given by inputWeapons.readInput() and uses it to create as
+        many Attack objects als the list has columns.
         
         Parameters
         ----------
         inputDataTuple : 2-tuple
-            1st part: 2D-list of pandas.DataFrame objects. Every column in this
-            list represents one attack with one or more weapons.
+            1st part: 2D-list of weapons, each an np.array block of input
+            cells (as given by inputWeapons.readInput()), a pandas.DataFrame
+            or a weaponSpec.WeaponSpec. Every column in this list represents
+            one attack with one or more weapons.
             2nd part: list of attack names
         minAC : int, optional
             Lower limit of target AC for calculations.
         maxAC : int, optional
             Upper limit of target AC for calculations.
+        cache : resultCache.ResultCache, optional
+            On-disk result cache passed on to every Weapon. Only weapons which
+            are not found in the cache are calculated. The default is None.
+        dtype : numpy dtype, optional
+            Floating point type of the damage arrays, e.g. np.float32 to halve
+            the memory of large sheets. Damage values and their sums are
+            calculated in float64 and only rounded to dtype when they are
+            stored. The default is np.float64.
 
         Returns
         -------
@@ -54,29 +92,305 @@ class Sheet:
         """
         
         self.attacks = []
+        self.dtype = np.dtype(dtype)
         
         # Split inputDataTuple into weapon list and attack name list
         dfWeaponList = inputDataTuple[0]
         attackNames = inputDataTuple[1]
         
-        # Create a result array
+        # Create a damage array with one column per attack. Every Attack
+        # writes its full attack damage directly into its column.
         self.acRange = (minAC, maxAC)
-        self.results = np.arange(minAC, maxAC+1).transpose()
+        self.acArray = np.arange(minAC, maxAC+1)
+        self.damage = np.zeros((self.acArray.size, len(dfWeaponList)), dtype=self.dtype)
         for a in range(len(dfWeaponList)):
-            newAttack = atk.Attack(dfWeaponList[a], attackNames[a], minAC, maxAC)
+            newAttack = atk.Attack(dfWeaponList[a], attackNames[a], minAC, maxAC,
+                                   cache, self.dtype, out=self.damage[:,a])
             self.attacks.append(newAttack)
-            self.results = np.c_[self.results, newAttack.results[:,1]]
         
-        # Create a difference array if the input contains more than one attack
+        with prf.stage("calcDiffResults", attacks=len(self.attacks)) as record:
+            self.diffDamage = self.calcDiffDamage()
+            record["arrayBytes"] = self.damage.nbytes + self.diffDamage.nbytes
+    
+    def __setstate__(self, state):
+        """
+        Restores a pickled Sheet, e.g. from a worker process of
+        parallel.calcSheets(). Pickling copies the damage column of every
+        Attack, which is linked to self.damage again.
+
+        Parameters
+        ----------
+        state : dict
+            Object variables.
+
+        Returns
+        -------
+        None.
+        
+        """
+        
+        self.__dict__.update(state)
+        for i, a in enumerate(self.attacks):
+            a.damage = self.damage[:,i]
+    
+    @property
+    def results(self):
+        """
+        Results array with the target ACs in the first column and one column
+        per attack. The array is assembled on every access from self.acArray
+        and self.damage and does not share its memory with them.
+
+        Returns
+        -------
+        np.array
+            Results array.
+        
+        """
+        
+        return np.column_stack((self.acArray, self.damage.astype(float)))
+    
+    @property
+    def diffResults(self):
+        """
+        Difference array with the target ACs in the first column and one
+        difference column per attack except the first, assembled on every
+        access like self.results.
+
+        Returns
+        -------
+        np.array
+            Difference array, np.array(0) if the sheet has only one attack.
+        
+        """
+        
+        if len(self.attacks) < 2:
+            return np.array(0)
+        return np.column_stack((self.acArray, self.diffDamage.astype(float)))
+    
+    def calcDiffDamage(self):
+        """
+        Calculates the damage difference between the first attack (base case)
+        and every other attack.
+
+        Returns
+        -------
+        diffDamage : np.array
+            (AC x attack) array with one difference column per attack except
+            the first. The array has no columns if the sheet has only one
+            attack.
+        
+        """
+        
         if len(self.attacks) > 1:
-            self.diffResults = self.results.copy()
-            for i in range(2, self.diffResults.shape[1]):
-                self.diffResults[:, i] -= self.diffResults[:, 1]
-            # Remove first row (= base case, no difference)
-            self.diffResults = np.delete(self.diffResults, 1, 1)
-        else:
-            self.diffResults = np.array(0)
+            return self.damage[:,1:] - self.damage[:,:1]
+        return np.zeros((self.acArray.size, 0), dtype=self.dtype)
+    
+    def setACRange(self, minAC, maxAC):
+        """
+        Changes the AC range of all attacks. The average damage per hit and
+        per critical hit of every weapon is kept, only the damage arrays are
+        recalculated.
+
+        Parameters
+        ----------
+        minAC : int
+            Lower limit of target AC for calculations.
+        maxAC : int
+            Upper limit of target AC for calculations.
+
+        Returns
+        -------
+        None.
+        
+        """
+        
+        self.acRange = (minAC, maxAC)
+        self.acArray = np.arange(minAC, maxAC+1)
+        self.damage = np.zeros((self.acArray.size, len(self.attacks)), dtype=self.dtype)
+        for i, a in enumerate(self.attacks):
+            a.setACRange(minAC, maxAC, out=self.damage[:,i])
+        self.diffDamage = self.calcDiffDamage()
+    
+    def updateWeapon(self, attackIndex, weaponIndex, **changes):
+        """
+        Changes parameters of a single weapon and only recalculates the
+        affected results: the weapon itself, the full attack of its attack and
+        the matching difference columns.
+
+        Parameters
+        ----------
+        attackIndex : int
+            Index of the attack in self.attacks.
+        weaponIndex : int
+            Index of the weapon in the weapon list of the attack.
+        **changes
+            New parameter values, see Weapon.setParameters().
+
+        Returns
+        -------
+        None.
+        
+        """
+        
+        # The attack updates its column of self.damage
+        self.attacks[attackIndex].updateWeapon(weaponIndex, **changes)
+        
+        if len(self.attacks) > 1:
+            if attackIndex == 0:
+                # Base case changed: every difference changes
+                self.diffDamage[:] = self.damage[:,1:] - self.damage[:,:1]
+            else:
+                self.diffDamage[:,attackIndex-1] = (self.damage[:,attackIndex]
+                                                    - self.damage[:,0])
             
+    def labeledResults(self):
+        """
+        Labeled view of the damage array with the target AC as index and the
+        attack names as column index. The DataFrame shares its memory with
+        self.damage.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Labeled results.
+        
+        """
+        
+        import pandas as pd
+        
+        columns = pd.Index([a.name for a in self.attacks], name="Attack")
+        return pd.DataFrame(self.damage, index=pd.Index(self.acArray, name="AC"),
+                            columns=columns, copy=False)
+    
+    def labeledDiffResults(self):
+        """
+        Labeled view of the difference array with the target AC as index and
+        the attack names (without the base case) as column index. The
+        DataFrame shares its memory with self.diffDamage.
+
+        Returns
+        -------
+        pandas.DataFrame or None
+            Labeled differences, None if the sheet has only one attack.
+        
+        """
+        
+        import pandas as pd
+        
+        if len(self.attacks) < 2:
+            return None
+        columns = pd.Index([a.name for a in self.attacks[1:]], name="Attack")
+        return pd.DataFrame(self.diffDamage, index=pd.Index(self.acArray, name="AC"),
+                            columns=columns, copy=False)
+    
+    def calcTargetExpectation(self, targets):
+        """
+        Calculates the expected damage of every attack against every group of
+        a weighted target table (see targets.py). The target properties of the
+        table replace those of the weapons, and all weapons of the sheet are
+        evaluated in a single batch.
+
+        Parameters
+        ----------
+        targets : dict
+            Target table, see targets.targetTable().
+
+        Returns
+        -------
+        results : np.array
+            (attack x group) array with the expected damage.
+        groups : list
+            Group names of the target table.
+        
+        """
+        
+        import targets as tg
+        
+        specs = [w.spec for a in self.attacks for w in a.weapons]
+        damage, groups = tg.expectedDamage(specs, targets)
+        results = np.zeros((len(self.attacks), len(groups)))
+        attackIndex = np.repeat(np.arange(len(self.attacks)),
+                                [len(a.weapons) for a in self.attacks])
+        np.add.at(results, attackIndex, damage)
+        return results, groups
+    
+    def printTargetExpectation(self, targets):
+        """
+        Prints the expected damage of every attack against every group of a
+        weighted target table, see calcTargetExpectation().
+
+        Parameters
+        ----------
+        targets : dict
+            Target table, see targets.targetTable().
+
+        Returns
+        -------
+        None.
+        
+        """
+        
+        results, groups = self.calcTargetExpectation(targets)
+        justLength = max([20] + [len(a.name) + 2 for a in self.attacks])
+        print("Expected Damage vs. Target Table")
+        print("Attack".ljust(justLength)
+              + "".join((str(g) or "All").rjust(12) for g in groups))
+        for a, r in zip(self.attacks, results):
+            print(a.name.ljust(justLength) + "".join("{:12.3f}".format(d) for d in r))
+    
+    def calcProfiles(self, profiles):
+        """
+        Calculates the average damage of every attack against every target
+        profile of a profile table (see targets.py) for every target AC. The
+        target properties of the profiles replace those of the weapons.
+
+        Parameters
+        ----------
+        profiles : dict
+            Profile table, see targets.profileTable().
+
+        Returns
+        -------
+        results : np.array
+            (attack x profile x AC) array with the average damage.
+        
+        """
+        
+        import targets as tg
+        
+        specs = [w.spec for a in self.attacks for w in a.weapons]
+        damage = tg.calcProfiles(specs, profiles, self.acArray)
+        results = np.zeros((len(self.attacks),) + damage.shape[1:])
+        attackIndex = np.repeat(np.arange(len(self.attacks)),
+                                [len(a.weapons) for a in self.attacks])
+        np.add.at(results, attackIndex, damage)
+        return results
+    
+    def printProfiles(self, profiles):
+        """
+        Prints the average damage of every attack against every target
+        profile, see calcProfiles().
+
+        Parameters
+        ----------
+        profiles : dict
+            Profile table, see targets.profileTable().
+
+        Returns
+        -------
+        None.
+        
+        """
+        
+        results = self.calcProfiles(profiles)
+        cols = ["AC"] + [a.name for a in self.attacks]
+        acColumn = self.acArray[:, np.newaxis]
+        for p, name in enumerate(profiles["name"]):
+            print()
+            print("Average Damage vs. " + str(name))
+            print(cols)
+            print(np.hstack((acColumn, results[:, p, :].T)))
+    
     def listAttacks(self):
         """
         Prints a list of attacks in self.attacks
@@ -93,6 +407,7 @@ class Sheet:
                 s += w.name + " " + w.weaponStringHit() + ";   "
             print(s[:-4])
     
+    @prf.timed("graphAbsolute")
     def graphAbsolute(self, fileName="graphAbsolute.png", graphTitle="Average Damage"):
         """
         Produces a graph of the absolute damage values with matplotlib.pyplot.
@@ -111,16 +426,18 @@ class Sheet:
         
         """
         
+        import matplotlib.pyplot as plt
+        
         # Create new figure and an empty list for legend entries
         figAbsolute = plt.figure(dpi=300)
         legendList = []
         
         # Iterate data columns, plot, put names into legend entries
-        for i in range(0, self.results.shape[1]-1):
+        for i in range(0, self.damage.shape[1]):
             
             # i-1: Ensures that the colors of data columns match with the same
             # attacks in the difference plot, which lacks the first attack.
-            plt.plot(self.results[:,0], self.results[:,i+1],
+            plt.plot(self.acArray, self.damage[:,i],
                      color=colorCycle[(i-1)%len(colorCycle)],
                      marker=markerCycle[(i-1)%len(markerCycle)],
                      linewidth=1, markersize=4.2)
@@ -141,12 +458,14 @@ class Sheet:
         plt.grid(True, which="minor", alpha=0.2, linestyle=":", linewidth=1)
         
         # Save graph as png image
-        plt.savefig(fileName, format="png",
-                    bbox_extra_artists=(legend,), bbox_inches='tight')
+        with prf.stage("savefig"):
+            plt.savefig(fileName, format="png",
+                        bbox_extra_artists=(legend,), bbox_inches='tight')
         
         # Return figure for possible further handling
         return figAbsolute
     
+    @prf.timed("graphDifference")
     def graphDifference(self, fileName="graphDifference.png", graphTitle="Average Difference"):
         """
         Produces a graph of the damage difference values between the attacks
@@ -168,13 +487,15 @@ class Sheet:
         
         """
         
+        import matplotlib.pyplot as plt
+        
         # Create new figure and an empty list for legend entries
         figDifference = plt.figure(dpi=300)
         legendList = []
         
         # Iterate data columns, plot, put names into legend entries
-        for i in range(0, self.diffResults.shape[1]-1):
-            plt.plot(self.diffResults[:,0], self.diffResults[:,i+1],
+        for i in range(0, self.diffDamage.shape[1]):
+            plt.plot(self.acArray, self.diffDamage[:,i],
                      color=colorCycle[i%len(colorCycle)],
                      marker=markerCycle[i%len(markerCycle)],
                      linewidth=1, markersize=4.2)
@@ -194,12 +515,14 @@ class Sheet:
         plt.grid(True, which="minor", alpha=0.2, linestyle=":", linewidth=1)
         
         # Save graph as png image
-        plt.savefig(fileName, format="png",
-                    bbox_extra_artists=(legend,), bbox_inches='tight')
+        with prf.stage("savefig"):
+            plt.savefig(fileName, format="png",
+                        bbox_extra_artists=(legend,), bbox_inches='tight')
         
         # Return figure for possible further handling
         return figDifference
     
+    @prf.timed("graphStonks")
     def graphStonks(self, fileName="graphStonks.png"):
         """
         STONKS
@@ -216,13 +539,15 @@ class Sheet:
 
         """
         
+        import matplotlib.pyplot as plt
+        
         # Create new figure and an empty list for legend entries
         figDifference = plt.figure(dpi=300)
         legendList = []
         
         # Iterate data columns, plot, put names into legend entries
-        for i in range(0, self.diffResults.shape[1]-1):
-            plt.plot(self.diffResults[:,0], self.diffResults[:,i+1],
+        for i in range(0, self.diffDamage.shape[1]):
+            plt.plot(self.acArray, self.diffDamage[:,i],
                      color=colorCycle[i%len(colorCycle)],
                      marker=markerCycle[i%len(markerCycle)],
                      linewidth=1, markersize=4.2)
@@ -242,20 +567,23 @@ class Sheet:
         plt.grid(True, which="minor", alpha=0.2, linestyle=":", linewidth=1)
         
         # Save graph as png image
-        plt.savefig(fileName, format="png",
-                    bbox_extra_artists=(legend,), bbox_inches='tight')
+        with prf.stage("savefig"):
+            plt.savefig(fileName, format="png",
+                        bbox_extra_artists=(legend,), bbox_inches='tight')
         
         # Return figure for possible further handling
         return figDifference
     
+    @prf.timed("outputData")
     def outputData(self, outputFileName="Output.xlsx", outputSheet="Sheet0"):
         """
         Write the results to Excel file.
 
         Parameters
         ----------
-        outputFileName : str, optional
-            Output file name. The default is "Output.xlsx".
+        outputFileName : str or pandas.ExcelWriter, optional
+            Output file name or an open ExcelWriter, which allows several
+            sheets to be written to the same file. The default is "Output.xlsx".
         outputSheet : str, optional
             Name of the sheet the output is written to. The default is "Sheet0".
 
@@ -265,9 +593,11 @@ class Sheet:
 
         """
         
+        import pandas as pd
+        
         # Create list of attack names for output DataFrame
         cols = ["AC"]
-        for i in range(0, self.results.shape[1]-1):
+        for i in range(0, len(self.attacks)):
             cols.append(self.attacks[i].name)
             
         # Write matrix of absolute values into DataFrame, use AC as index
@@ -278,7 +608,7 @@ class Sheet:
         # If sheet contains more than one attack: also output differences
         if len(self.attacks) > 1:
             # Add empty row to separate absolute block from difference block
-            df = df.append(pd.Series(), ignore_index=True)
+            df = pd.concat((df, pd.DataFrame(index=[np.nan], columns=cols)))
             
             # Delete base case from cols list
             del(cols[1])
@@ -294,16 +624,65 @@ class Sheet:
         df.to_excel(outputFileName, sheet_name=outputSheet, float_format="%.3f",
                     index=False)
     
-    def outputDataComplete(self, outputFileName="Output.xlsx", outputSheet="Sheet1"):
+    def completeData(self, percentiles=(10, 25, 50, 75, 90), thresholds=()):
         """
-        NOT YET IMPLEMENTED
+        Compiles statistics of the complete damage distribution of every attack
+        (see Attack.calcDistribution()) for every target AC.
+        The column "Mean" equals the average damage of self.damage.
 
         Parameters
         ----------
-        outputFileName : str, optional
-            Output file name. The default is "Output.xlsx".
+        percentiles : tuple, optional
+            Percentiles (0 to 100) of the damage to include.
+            The default is (10, 25, 50, 75, 90).
+        thresholds : tuple, optional
+            Damage values x for which P(damage >= x) is included.
+            The default is ().
+
+        Returns
+        -------
+        cols : list
+            Column names.
+        data : list
+            One np.array per attack with one row per AC, the first column is AC.
+        
+        """
+        
+        cols = ["AC", "Mean", "Std. Dev."]
+        cols += ["P{:g}".format(q) for q in percentiles]
+        cols += ["P(>={:g})".format(x) for x in thresholds]
+        
+        data = []
+        for a in self.attacks:
+            d = a.calcDistribution()
+            columns = [d.acArray, d.mean(), d.std()]
+            columns += [d.percentile(q) for q in percentiles]
+            columns += [d.exceedance(x) for x in thresholds]
+            data.append(np.column_stack(columns))
+        return cols, data
+    
+    @prf.timed("outputDataComplete")
+    def outputDataComplete(self, outputFileName="Output.xlsx", outputSheet="Sheet1",
+                           percentiles=(10, 25, 50, 75, 90), thresholds=()):
+        """
+        Write statistics of the complete damage distribution to Excel file:
+        average, standard deviation, percentiles and the probabilities of
+        reaching damage thresholds, for every attack and every target AC.
+        Attacks are written one below the other, the first column contains the
+        attack name.
+
+        Parameters
+        ----------
+        outputFileName : str or pandas.ExcelWriter, optional
+            Output file name or an open ExcelWriter. The default is "Output.xlsx".
         outputSheet : str, optional
             Name of the sheet the output is written to. The default is "Sheet1".
+        percentiles : tuple, optional
+            Percentiles (0 to 100) of the damage to include.
+            The default is (10, 25, 50, 75, 90).
+        thresholds : tuple, optional
+            Damage values x for which P(damage >= x) is included.
+            The default is ().
 
         Returns
         -------
@@ -311,8 +690,86 @@ class Sheet:
         
         """
 
-        pass
+        import pandas as pd
+        
+        cols, data = self.completeData(percentiles, thresholds)
+        dfList = []
+        for a, d in zip(self.attacks, data):
+            df = pd.DataFrame(data=d, columns=cols)
+            df["AC"] = df["AC"].astype(int)
+            df.insert(0, "Attack", a.name)
+            dfList.append(df)
+        
+        pd.concat(dfList).to_excel(outputFileName, sheet_name=outputSheet,
+                                   float_format="%.3f", index=False)
+
+    @prf.timed("outputColumnar")
+    def outputColumnar(self, outputFileName="Output.parquet", fileFormat=None):
+        """
+        Write the results to a typed columnar file: absolute damage and
+        differences are columns of the same table, one row per target AC.
+        The table contains the columns "AC", one column per attack and one
+        column "<attack> (Difference)" per attack except the first (base case).
+        Attack names, base case and AC range are stored as metadata of the
+        file ("damage-calc" key with a JSON object in Parquet and Arrow).
+        
+        Parquet and Arrow output need the pyarrow library, .npz output only
+        needs numpy. An .npz file contains the arrays "ac", "results" (AC x
+        attack), "diffResults" (AC x attack without base case) and
+        "attackNames" and can be read with np.load() without pickle.
+
+        Parameters
+        ----------
+        outputFileName : str, optional
+            Output file name. The default is "Output.parquet".
+        fileFormat : str, optional
+            "parquet", "arrow" or "npz". The default is None (chosen by the
+            file extension, see columnarFormats).
 
+        Returns
+        -------
+        None.
+        
+        """
+        
+        if fileFormat is None:
+            extension = "." + outputFileName.rsplit(".", 1)[-1].lower()
+            if extension not in columnarFormats:
+                raise ValueError("Unknown columnar file extension: " + outputFileName)
+            fileFormat = columnarFormats[extension]
+        
+        names = [a.name for a in self.attacks]
+        ac = self.acArray
+        
+        if fileFormat == "npz":
+            np.savez(outputFileName, ac=ac, results=self.damage,
+                     diffResults=self.diffDamage, attackNames=np.array(names, dtype=str))
+            return
+        if fileFormat not in ("parquet", "arrow"):
+            raise ValueError("Unknown columnar file format: " + fileFormat)
+        
+        import pyarrow as pa
+        
+        columns = [pa.array(ac, type=pa.int16())]
+        columnNames = ["AC"]
+        for i, name in enumerate(names):
+            columns.append(pa.array(self.damage[:,i]))
+            columnNames.append(name)
+        for i, name in enumerate(names[1:]):
+            columns.append(pa.array(self.diffDamage[:,i]))
+            columnNames.append(name + " (Difference)")
+        metadata = {"attacks": names, "baseAttack": names[0] if names else None,
+                    "minAC": int(self.acRange[0]), "maxAC": int(self.acRange[1])}
+        table = pa.Table.from_arrays(columns, names=columnNames,
+                                     metadata={"damage-calc": json.dumps(metadata)})
+        
+        if fileFormat == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, outputFileName)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, outputFileName)
+    
     def printData(self):
         """
         Prints the same data to console that would be output with outputData().
@@ -323,7 +780,7 @@ class Sheet:
         
         """
         cols = ["AC"]
-        for i in range(0, self.results.shape[1]-1):
+        for i in range(0, len(self.attacks)):
             cols.append(self.attacks[i].name)
         print("Average Damage Values")
         print(cols)
@@ -337,14 +794,61 @@ class Sheet:
             print(cols)
             print(self.diffResults)
 
-    def printDataComplete(self):
+    def printDataComplete(self, percentiles=(10, 25, 50, 75, 90), thresholds=()):
         """
         Prints the same data to console that would be output with
         outputDataComplete().
         
+        Parameters
+        ----------
+        percentiles : tuple, optional
+            Percentiles (0 to 100) of the damage to include.
+            The default is (10, 25, 50, 75, 90).
+        thresholds : tuple, optional
+            Damage values x for which P(damage >= x) is included.
+            The default is ().
+        
         Returns
         -------
         None.
         
         """
-        pass
\ No newline at end of file
+        cols, data = self.completeData(percentiles, thresholds)
+        for a, d in zip(self.attacks, data):
+            print()
+            print("Damage Distribution: " + a.name)
+            print(cols)
+            print(d)
+
+    def printSimulation(self, rounds=1000000, seed=None, confidence=0.95):
+        """
+        Runs a Monte Carlo simulation of every attack (see Attack.simulate())
+        and prints the simulated average damage with its confidence interval
+        next to the calculated average damage. The simulation rolls a single
+        fortification check per hit for the critical hit and the precision
+        damage dice (see simulation.py), so against fortified targets with
+        damage reduction it can deviate slightly from the calculated value.
+        
+        Parameters
+        ----------
+        rounds : int, optional
+            Number of simulated full attacks per AC. The default is 1000000.
+        seed : int, optional
+            Seed of the random number generator. The default is None.
+        confidence : float, optional
+            Confidence level of the interval (0 to 1). The default is 0.95.
+        
+        Returns
+        -------
+        None.
+        
+        """
+        cols = ["AC", "Calculated", "Simulated", "CI Low", "CI High"]
+        for a in self.attacks:
+            sim = a.simulate(rounds, seed)
+            low, high = sim.confidenceInterval(confidence)
+            print()
+            print("Monte Carlo Simulation: {} ({} rounds, {:g} % confidence)".format(
+                a.name, rounds, confidence*1e2))
+            print(cols)
+            print(np.column_stack((sim.acArray, a.damage, sim.mean(), low, high)))
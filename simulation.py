@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+"""
+simulation.py provides the Simulation class, a seeded Monte Carlo simulation
+of full attacks for damage-calc.
+
+The simulation rolls every d20, confirmation roll, failure chance,
+fortification check and damage die of millions of full attacks in batched
+np.arrays. The rounds are processed in chunks of fixed size, so the memory
+usage does not depend on the number of rounds. It serves as cross-check of
+the closed form in Weapon.calcAttacks() and handles rules which the closed
+form can not express:
+- A single fortification check per hit nullifies the critical hit and the
+  precision damage dice at the same time, and damage reduction is applied
+  to the damage that remains.
+- Rend/rake-like extra damage that is triggered by a minimum number of hits
+  in the same full attack.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+2026-10-17: Attack rolls use the natural roll thresholds of probability.py
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+import probability as pr
+
+
+def rollDice(rng, diceTuples, size):
+    """
+    Rolls a dice pool for several rounds.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        Random number generator.
+    diceTuples : list
+        Dice pool as list of (number, sides) tuples.
+    size : int
+        Number of rounds.
+
+    Returns
+    -------
+    total : np.array
+        Sum of the dice pool for every round.
+
+    """
+
+    total = np.zeros(size, dtype=np.int64)
+    for number, sides in diceTuples:
+        total += rng.integers(1, sides+1, (size, number)).sum(axis=1)
+    return total
+
+def rollHits(rng, rollBonus, acArray, failChance, size):
+    """
+    Rolls a d20 attack roll with auto-hit on a natural 20, auto-miss on a
+    natural 1 and failure chance.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        Random number generator.
+    rollBonus : int
+        Complete bonus of the roll.
+    acArray : np.array
+        Target ACs.
+    failChance : float
+        Failure chance (0 to 1).
+    size : int
+        Number of rounds.
+
+    Returns
+    -------
+    natural : np.array
+        Natural d20 result of every round.
+    hit : np.array
+        (round x AC) boolean array of successful rolls.
+
+    """
+
+    # Lowest successful natural result of every AC from the d20 tables of
+    # probability.py, which includes auto-hit and auto-miss
+    natural = rng.integers(1, 21, size)
+    hit = natural[:, np.newaxis] >= pr.rollThreshold(rollBonus, acArray)[np.newaxis, :]
+    hit &= (rng.random(size) >= failChance)[:, np.newaxis]
+    return natural, hit
+
+
+class Simulation:
+    """
+    The Simulation class simulates the full attack of a list of weapons for
+    every target AC and accumulates the damage statistics.
+    """
+
+    def __init__(self, weapons, minAC, maxAC, rounds=1000000, seed=None,
+                 chunkSize=65536, rend=None):
+        """
+        The constructor runs the simulation.
+
+        Parameters
+        ----------
+        weapons : list
+            List of Weapon objects.
+        minAC : int
+            Lower limit of target AC for calculations.
+        maxAC : int
+            Upper limit of target AC for calculations.
+        rounds : int, optional
+            Number of simulated full attacks per AC. The default is 1000000.
+        seed : int, optional
+            Seed of the random number generator. The default is None.
+        chunkSize : int, optional
+            Number of full attacks per chunk. The memory usage is roughly
+            chunkSize * (number of ACs) * 16 bytes. The default is 65536.
+        rend : tuple, optional
+            (hits, dice, damage): Additional damage of dice (list of
+            (number, sides) tuples) plus damage if at least hits attacks of
+            the full attack hit, reduced by the damage reduction of the first
+            weapon. The default is None (no rend).
+
+        Returns
+        -------
+        None.
+
+        """
+
+        self.acArray = np.arange(minAC, maxAC+1)
+        self.rounds = 0
+        self.rend = rend
+        self.damageSum = np.zeros(self.acArray.size)
+        self.damageSquareSum = np.zeros(self.acArray.size)
+        self.hitSum = np.zeros(self.acArray.size)
+        rng = np.random.default_rng(seed)
+
+        while self.rounds < rounds:
+            size = min(chunkSize, rounds - self.rounds)
+            damage, hits = self.simulateChunk(rng, weapons, size)
+            self.damageSum += damage.sum(axis=0)
+            self.damageSquareSum += (damage**2).sum(axis=0)
+            self.hitSum += hits.sum(axis=0)
+            self.rounds += size
+
+    def simulateChunk(self, rng, weapons, size):
+        """
+        Simulates a single chunk of full attacks.
+
+        Parameters
+        ----------
+        rng : np.random.Generator
+            Random number generator.
+        weapons : list
+            List of Weapon objects.
+        size : int
+            Number of full attacks.
+
+        Returns
+        -------
+        damage : np.array
+            (round x AC) array of the damage of every full attack.
+        hits : np.array
+            (round x AC) array of the number of hits of every full attack.
+
+        """
+
+        damage = np.zeros((size, self.acArray.size))
+        hits = np.zeros((size, self.acArray.size), dtype=np.int64)
+        for w in weapons:
+            for bab in w.baseAttacks:
+                damage += self.simulateAttack(rng, w, bab, size, hits)
+
+        if self.rend is not None and len(weapons) > 0:
+            rendHits, rendDice, rendDamage = self.rend
+            rendRoll = np.maximum(rollDice(rng, rendDice, size) + rendDamage
+                                  - weapons[0].damageReduction, 0)
+            damage += (hits >= rendHits) * rendRoll[:, np.newaxis]
+        return damage, hits
+
+    def simulateAttack(self, rng, weapon, bab, size, hits):
+        """
+        Simulates a single attack of a weapon.
+
+        Parameters
+        ----------
+        rng : np.random.Generator
+            Random number generator.
+        weapon : Weapon
+            Weapon object.
+        bab : int
+            Additional roll penalty for iterative attacks, twf, secondary etc.
+        size : int
+            Number of rounds.
+        hits : np.array
+            (round x AC) array of hit counters which is increased in place.
+
+        Returns
+        -------
+        damage : np.array
+            (round x AC) array of the damage of the attack.
+
+        """
+
+        rollBonus = weapon.attackBonus + bab
+        natural, hit = rollHits(rng, rollBonus, self.acArray,
+                                weapon.failChance, size)
+        confirmNatural, confirm = rollHits(
+            rng, rollBonus + weapon.critConfirmBonus, self.acArray,
+            weapon.failChance, size)
+
+        # A successful fortification check nullifies critical hit and
+        # precision damage dice
+        fortified = rng.random(size) < weapon.fortification
+        crit = (hit & confirm & (natural >= weapon.critRange)[:, np.newaxis]
+                & ~fortified[:, np.newaxis])
+
+        # Damage dice of a normal hit and additional dice of a critical hit
+        precision = np.zeros(size, dtype=np.int64)
+        if weapon.precImmunity == 0:
+            precision = rollDice(rng, weapon.precisionDice, size) * ~fortified
+        hitRoll = (rollDice(rng, weapon.baseDice, size) + precision
+                   + rollDice(rng, weapon.extraDice, size))
+        critRoll = hitRoll.copy()
+        for i in range(weapon.critMultiplier - 1):
+            critRoll += rollDice(rng, weapon.baseDice, size)
+        critRoll += rollDice(rng, weapon.extraCritDice, size)
+
+        hitDamage = np.maximum(hitRoll + weapon.damageHit - weapon.damageReduction, 0)
+        critDamage = np.maximum(critRoll + weapon.damageCrit - weapon.damageReduction, 0)
+
+        hits += hit
+        return np.where(crit, critDamage[:, np.newaxis],
+                        hit * hitDamage[:, np.newaxis])
+
+    def mean(self):
+        """
+        Returns
+        -------
+        np.array
+            Average damage per full attack for every AC.
+
+        """
+
+        return self.damageSum / self.rounds
+
+    def std(self):
+        """
+        Returns
+        -------
+        np.array
+            Standard deviation of the damage per full attack for every AC.
+
+        """
+
+        variance = self.damageSquareSum / self.rounds - self.mean()**2
+        return np.sqrt(np.maximum(variance, 0))
+
+    def confidenceInterval(self, confidence=0.95):
+        """
+        Confidence interval of the average damage from the normal
+        approximation.
+
+        Parameters
+        ----------
+        confidence : float, optional
+            Confidence level (0 to 1). The default is 0.95.
+
+        Returns
+        -------
+        low : np.array
+            Lower limit of the confidence interval for every AC.
+        high : np.array
+            Upper limit of the confidence interval for every AC.
+
+        """
+
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        halfWidth = z * self.std() / np.sqrt(self.rounds)
+        return self.mean() - halfWidth, self.mean() + halfWidth
+
+    def meanHits(self):
+        """
+        Returns
+        -------
+        np.array
+            Average number of hits per full attack for every AC.
+
+        """
+
+        return self.hitSum / self.rounds
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+"""
+stream.py provides the streaming batch mode of damage-calc: builds are read
+from a text stream (usually stdin) as newline-delimited JSON or CSV and the
+average full attack damage of every build is written to an output stream
+(usually stdout), one line per build in the input order.
+
+The builds are evaluated in batches of fixed size with batch.calcBatch(), so
+the memory usage does not depend on the number of builds and results are
+written as soon as their batch is done.
+
+Start via "python . --stream ndjson < builds.ndjson > results.ndjson".
+
+*** Input formats: ***
+ndjson: One build per line. A build is either a single weapon with the
+    parameters of WeaponSpec.fromDict() or {"name": ..., "weapons": [...]}
+    with several weapons that form one full attack, e.g.
+    {"name": "Longsword", "baseDice": "1d8", "baseAttacks": [0, -5],
+     "attackBonus": 12, "damageBonus": 7, "critRange": 19}
+csv: Header line with WeaponSpec parameter names, one weapon per line.
+    Dice are given as dice expressions like "2d6+1d8", baseAttacks as BAB
+    penalties separated by spaces or semicolons like "0 -5". Missing columns
+    and empty cells take the WeaponSpec defaults. Consecutive lines with the
+    same value in the optional column "build" form one full attack.
+
+*** Output formats: ***
+ndjson: {"name": ..., "damage": [...]} per build, damage for every AC.
+csv: Header line "name,AC10,AC11,...", then one line per build.
+
+*** Recent Changes: ***
+2026-10-17: First Version
+2026-10-17: Results are stored in the result dtype of batch.py
+2026-10-17: The weapons of a build are summed in float64 before the results
+    are rounded to the result dtype
+"""
+
+import csv
+import json
+
+import numpy as np
+
+import batch as bt
+import weaponSpec as ws
+
+# Number of builds per batch
+BATCH_SIZE = 1024
+
+
+def parseCsvValue(key, value):
+    """
+    Converts a CSV cell to the type of the WeaponSpec parameter key.
+
+    Parameters
+    ----------
+    key : str
+        Parameter name.
+    value : str
+        Cell content.
+
+    Returns
+    -------
+    object
+        Parameter value.
+
+    """
+
+    if key in ws.DICE_FIELDS or key == "name":
+        return value
+    if key == "baseAttacks":
+        return [int(float(b)) for b in value.replace(";", " ").split()]
+    if key in ("fortification", "failChance"):
+        return float(value)
+    return int(float(value))
+
+def readNdjson(lines):
+    """
+    Reads builds from newline-delimited JSON, empty lines are skipped.
+
+    Parameters
+    ----------
+    lines : iterable
+        Input lines.
+
+    Yields
+    ------
+    name : str
+        Name of the build.
+    specs : list
+        WeaponSpec objects of the build.
+
+    """
+
+    for line in lines:
+        if line.strip() == "":
+            continue
+        build = json.loads(line)
+        if "weapons" in build:
+            specs = [ws.WeaponSpec.fromDict(w) for w in build["weapons"]]
+            name = build.get("name", specs[0].name if len(specs) > 0 else "")
+        else:
+            specs = [ws.WeaponSpec.fromDict(build)]
+            name = specs[0].name
+        yield name, specs
+
+def readCsv(lines):
+    """
+    Reads builds from CSV with a header line.
+
+    Parameters
+    ----------
+    lines : iterable
+        Input lines.
+
+    Yields
+    ------
+    name : str
+        Name of the build.
+    specs : list
+        WeaponSpec objects of the build.
+
+    """
+
+    buildId = None
+    specs = []
+    for row in csv.DictReader(lines):
+        values = {k: parseCsvValue(k, v) for k, v in row.items()
+                  if k in ws.WeaponSpec.__slots__ and v is not None and v.strip() != ""}
+        spec = ws.WeaponSpec(**values)
+        rowId = row.get("build") or None
+        if len(specs) > 0 and (rowId is None or rowId != buildId):
+            yield (buildId or specs[0].name), specs
+            specs = []
+        buildId = rowId
+        specs.append(spec)
+    if len(specs) > 0:
+        yield (buildId or specs[0].name), specs
+
+def calcBuilds(builds, minAC=10, maxAC=40):
+    """
+    Calculates the average full attack damage of several builds with a single
+    batch.calcBatch() call over all of their weapons.
+
+    Parameters
+    ----------
+    builds : list
+        List of lists of WeaponSpec objects, one list per build.
+    minAC : int, optional
+        Lower limit of target AC for calculations.
+    maxAC : int, optional
+        Upper limit of target AC for calculations.
+
+    Returns
+    -------
+    results : np.array
+        (build x AC) array with the average full attack damage, in the
+        result dtype of batch.py.
+
+    """
+
+    # The weapon damage is summed in float64 and rounded once
+    results = np.zeros((len(builds), maxAC-minAC+1))
+    specs = [spec for b in builds for spec in b]
+    if len(specs) > 0:
+        damage = bt.calcBatch(ws.specsBatchParameters(specs), minAC, maxAC,
+                              dtype=np.float64)
+        buildIndex = np.repeat(np.arange(len(builds)), [len(b) for b in builds])
+        np.add.at(results, buildIndex, damage)
+    return results.astype(bt.resultDtype, copy=False)
+
+def streamBuilds(inputStream, outputStream, inputFormat="ndjson",
+                 outputFormat=None, minAC=10, maxAC=40, batchSize=BATCH_SIZE):
+    """
+    Reads builds from inputStream, calculates them in batches and writes the
+    results to outputStream.
+
+    Parameters
+    ----------
+    inputStream : file
+        Text stream with builds, e.g. sys.stdin.
+    outputStream : file
+        Text stream for the results, e.g. sys.stdout.
+    inputFormat : str, optional
+        "ndjson" or "csv". The default is "ndjson".
+    outputFormat : str, optional
+        "ndjson" or "csv". The default is None (same as inputFormat).
+    minAC : int, optional
+        Lower limit of target AC for calculations.
+    maxAC : int, optional
+        Upper limit of target AC for calculations.
+    batchSize : int, optional
+        Number of builds per batch. The default is BATCH_SIZE.
+
+    Returns
+    -------
+    count : int
+        Number of builds.
+
+    """
+
+    if outputFormat is None:
+        outputFormat = inputFormat
+    readers = {"ndjson": readNdjson, "csv": readCsv}
+    if inputFormat not in readers or outputFormat not in readers:
+        raise ValueError("Unknown stream format, use 'ndjson' or 'csv'")
+
+    writer = None
+    if outputFormat == "csv":
+        writer = csv.writer(outputStream, lineterminator="\n")
+        writer.writerow(["name"] + ["AC" + str(ac) for ac in range(minAC, maxAC+1)])
+
+    count = 0
+    names = []
+    builds = []
+    for name, specs in readers[inputFormat](inputStream):
+        names.append(name)
+        builds.append(specs)
+        if len(builds) == batchSize:
+            writeResults(outputStream, writer, names, calcBuilds(builds, minAC, maxAC))
+            count += len(builds)
+            names = []
+            builds = []
+    if len(builds) > 0:
+        writeResults(outputStream, writer, names, calcBuilds(builds, minAC, maxAC))
+        count += len(builds)
+    return count
+
+def writeResults(outputStream, writer, names, results):
+    """
+    Writes the results of a batch and flushes the output stream.
+
+    Parameters
+    ----------
+    outputStream : file
+        Text stream for the results.
+    writer : csv.writer or None
+        CSV writer on outputStream, None for NDJSON output.
+    names : list
+        Names of the builds.
+    results : np.array
+        (build x AC) array with the average full attack damage.
+
+    Returns
+    -------
+    None.
+
+    """
+
+    for name, damage in zip(names, results.tolist()):
+        if writer is None:
+            outputStream.write(json.dumps({"name": name, "damage": damage}) + "\n")
+        else:
+            writer.writerow([name] + ["{:.6g}".format(d) for d in damage])
+    outputStream.flush()
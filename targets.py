@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+
+"""
+targets.py provides weighted target tables for damage-calc: instead of a
+dense AC grid with the target properties of every weapon block, a table of
+targets gives the AC, damage reduction, fortification, failure chance and
+precision immunity of every target together with a weight, e.g. derived from
+a bestiary per CR. The result is a single expected damage per weapon (or
+attack) and group of targets.
+
+Every (weapon, target) pair is evaluated in one batch.calcBatchAC() call with
+the AC of its target, so no Weapon object is created per target.
+
+A profile table holds target profiles (monster types) without AC, which are
+evaluated on the whole AC grid as a (weapon x profile x AC) tensor by
+calcProfiles(). The d20 chances of every attack only depend on the weapon
+and the AC and are computed once per weapon. Failure chance and
+fortification scale them by a factor per profile, and only the average
+damage per hit and critical hit (damage reduction, fortification and
+precision immunity) is calculated per (weapon, profile) pair.
+
+*** Target table (CSV): ***
+Header line with the columns
+    AC, DR, fortification, failChance, weight, precImmunity, group
+in any order, one target per line. Only AC is required, missing columns take
+the defaults of targetTable(). fortification and failChance are given in
+percent like in the input sheet. Targets with the same value in the optional
+column "group" (or "CR") form one AC distribution with its own expected
+damage, the weights are normalized per group.
+Example:
+    CR,AC,DR,fortification,failChance,weight
+    5,18,0,0,0,3
+    5,19,5,25,20,1
+    10,24,10,0,0,2
+
+*** Profile table (CSV): ***
+Header line with the columns
+    name, DR, fortification, failChance, precImmunity
+in any order, one profile per line, with the same units and defaults as the
+target table.
+Example:
+    name,DR,fortification,failChance,precImmunity
+    Golem,10,0,0,1
+    Wraith,0,0,50,1
+    Armored Knight,0,75,0,0
+
+*** Recent Changes: ***
+2026-10-17: First Version
+2026-10-17: Added profile tables and calcProfiles()
+"""
+
+import csv
+
+import numpy as np
+
+import batch as bt
+import probability as pr
+import weaponSpec as ws
+
+# Accepted CSV header names (lower case) and the table column of each
+COLUMN_NAMES = {"ac": "ac", "dr": "damageReduction",
+                "damagereduction": "damageReduction",
+                "fortification": "fortification", "failchance": "failChance",
+                "concealment": "failChance", "precimmunity": "precImmunity",
+                "weight": "weight", "group": "group", "cr": "group",
+                "name": "name"}
+
+# Columns which are given in percent in a CSV file
+PERCENT_COLUMNS = ("fortification", "failChance")
+
+# Maximum number of (weapon, target) pairs per batch
+CHUNK_SIZE = 65536
+
+
+def targetTable(ac, weight=1., damageReduction=0, fortification=0.,
+                failChance=0., precImmunity=0, group=""):
+    """
+    Creates a target table. Every parameter is a single value or a sequence
+    with one value per target.
+
+    Parameters
+    ----------
+    ac : int or list
+        Target AC.
+    weight : float or list, optional
+        Weight of the target. The default is 1.
+    damageReduction : int or list, optional
+        Damage reduction of the target. The default is 0.
+    fortification : float or list, optional
+        Fortification chance of the target (0 to 1). The default is 0.
+    failChance : float or list, optional
+        Failure chance against the target (0 to 1). The default is 0.
+    precImmunity : int or list, optional
+        1 if the target is immune to precision damage. The default is 0.
+    group : str or list, optional
+        Group of the target, e.g. its CR. The default is "".
+
+    Returns
+    -------
+    targets : dict
+        Dictionary with an np.array of length (number of targets) per column.
+
+    """
+
+    ac = np.atleast_1d(np.asarray(ac, dtype=int))
+    n = ac.size
+    column = lambda value, dtype: np.array(np.broadcast_to(np.asarray(value, dtype=dtype), (n,)))
+    targets = {"ac": ac,
+               "damageReduction": column(damageReduction, int),
+               "fortification": column(fortification, float),
+               "failChance": column(failChance, float),
+               "precImmunity": column(precImmunity, int),
+               "weight": column(weight, float),
+               "group": column(group, str).astype(object)}
+    if np.any(targets["weight"] < 0):
+        raise ValueError("Target weights must not be negative")
+    return targets
+
+def profileTable(name, damageReduction=0, fortification=0., failChance=0.,
+                 precImmunity=0):
+    """
+    Creates a profile table. Every parameter is a single value or a sequence
+    with one value per profile.
+
+    Parameters
+    ----------
+    name : str or list
+        Name of the profile.
+    damageReduction : int or list, optional
+        Damage reduction of the profile. The default is 0.
+    fortification : float or list, optional
+        Fortification chance of the profile (0 to 1). The default is 0.
+    failChance : float or list, optional
+        Failure chance against the profile (0 to 1). The default is 0.
+    precImmunity : int or list, optional
+        1 if the profile is immune to precision damage. The default is 0.
+
+    Returns
+    -------
+    profiles : dict
+        Dictionary with an np.array of length (number of profiles) per column.
+
+    """
+
+    name = np.atleast_1d(np.asarray(name, dtype=object))
+    n = name.size
+    column = lambda value, dtype: np.array(np.broadcast_to(np.asarray(value, dtype=dtype), (n,)))
+    return {"name": name,
+            "damageReduction": column(damageReduction, int),
+            "fortification": column(fortification, float),
+            "failChance": column(failChance, float),
+            "precImmunity": column(precImmunity, int)}
+
+def readTable(fileName, columnNames):
+    """
+    Reads the columns of a target or profile table from a CSV file.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of the CSV file.
+    columnNames : tuple
+        Table columns to read, other columns are ignored. The first one is
+        required.
+
+    Returns
+    -------
+    values : dict
+        List of converted values per table column found in the file.
+
+    """
+
+    columns = {}
+    with open(fileName, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [COLUMN_NAMES.get(h.strip().lower().replace(" ", "").replace("_", ""))
+                  for h in next(reader)]
+        header = [name if name in columnNames else None for name in header]
+        if columnNames[0] not in header:
+            raise ValueError("Table {} has no {} column".format(fileName, columnNames[0]))
+        for name in header:
+            if name is not None:
+                columns[name] = []
+        for row in reader:
+            if len(row) == 0 or all(v.strip() == "" for v in row):
+                continue
+            for name, value in zip(header, row):
+                if name is not None:
+                    columns[name].append(value.strip())
+
+    values = {}
+    for name, cells in columns.items():
+        if name in ("group", "name"):
+            values[name] = cells
+        elif name in PERCENT_COLUMNS:
+            values[name] = [float(v or 0) * 1e-2 for v in cells]
+        elif name == "weight":
+            values[name] = [float(v or 1) for v in cells]
+        else:
+            values[name] = [int(float(v or 0)) for v in cells]
+    return values
+
+def readTargets(fileName):
+    """
+    Reads a target table from a CSV file, see module docstring.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of the CSV file.
+
+    Returns
+    -------
+    targets : dict
+        Target table, see targetTable().
+
+    """
+
+    return targetTable(**readTable(fileName, ("ac", "damageReduction", "fortification",
+                                              "failChance", "precImmunity",
+                                              "weight", "group")))
+
+def readProfiles(fileName):
+    """
+    Reads a profile table from a CSV file, see module docstring.
+
+    Parameters
+    ----------
+    fileName : str
+        Name of the CSV file.
+
+    Returns
+    -------
+    profiles : dict
+        Profile table, see profileTable().
+
+    """
+
+    return profileTable(**readTable(fileName, ("name", "damageReduction", "fortification",
+                                               "failChance", "precImmunity")))
+
+def groupWeights(targets):
+    """
+    Normalizes the target weights per group.
+
+    Parameters
+    ----------
+    targets : dict
+        Target table, see targetTable().
+
+    Returns
+    -------
+    groups : list
+        Group names in the order of their first target.
+    weights : np.array
+        (target x group) array with the normalized weight of every target in
+        its group.
+
+    """
+
+    groups = list(dict.fromkeys(targets["group"].tolist()))
+    index = {g: i for i, g in enumerate(groups)}
+    weights = np.zeros((targets["ac"].size, len(groups)))
+    weights[np.arange(targets["ac"].size),
+            [index[g] for g in targets["group"].tolist()]] = targets["weight"]
+    totals = weights.sum(axis=0)
+    if np.any(totals <= 0):
+        raise ValueError("Every target group needs a positive total weight")
+    return groups, weights / totals
+
+def pairVariants(specs, targets):
+    """
+    Batch parameters of every (weapon, target) pair, with the target
+    properties of the table instead of those of the weapons.
+
+    Parameters
+    ----------
+    specs : list
+        List of WeaponSpec objects.
+    targets : dict
+        Target table, see targetTable(), or profile table, see
+        profileTable().
+
+    Returns
+    -------
+    variants : dict
+        Batch parameters, weapon-major order.
+
+    """
+
+    nTargets = targets["damageReduction"].size
+    variants = {}
+    for k, values in ws.specsBatchParameters(specs).items():
+        if k == "baseAttacks":
+            variants[k] = [b for b in values for t in range(nTargets)]
+        elif k in ws.DICE_FIELDS:
+            # Object arrays mark the dice as given per variant
+            column = np.empty(len(specs), dtype=object)
+            column[:] = values
+            variants[k] = np.repeat(column, nTargets)
+        else:
+            variants[k] = np.repeat(np.asarray(values), nTargets)
+    for k in ("damageReduction", "fortification", "failChance", "precImmunity"):
+        variants[k] = np.tile(targets[k], len(specs))
+    return variants
+
+def expectedDamage(specs, targets, chunkSize=CHUNK_SIZE):
+    """
+    Calculates the expected full attack damage of every weapon against every
+    group of the target table in a single vectorized pass per chunk.
+
+    Parameters
+    ----------
+    specs : list
+        List of WeaponSpec objects.
+    targets : dict
+        Target table, see targetTable().
+    chunkSize : int, optional
+        Maximum number of (weapon, target) pairs per batch.
+        The default is CHUNK_SIZE.
+
+    Returns
+    -------
+    results : np.array
+        (weapon x group) array with the expected damage.
+    groups : list
+        Group names, see groupWeights().
+
+    """
+
+    groups, weights = groupWeights(targets)
+    nTargets = targets["ac"].size
+    results = np.zeros((len(specs), len(groups)))
+    step = max(1, chunkSize // nTargets)
+    for start in range(0, len(specs), step):
+        part = specs[start:start+step]
+        acArray = np.tile(targets["ac"], len(part))[:, np.newaxis]
+        damage = bt.calcBatchAC(pairVariants(part, targets), acArray)
+        results[start:start+len(part)] = damage.reshape(len(part), nTargets) @ weights
+    return results, groups
+
+def calcChanceSums(specs, acArray):
+    """
+    Sums of the hit chances and critical hit chances over the attacks of every
+    weapon, without failure chance and fortification.
+
+    Parameters
+    ----------
+    specs : list
+        List of WeaponSpec objects.
+    acArray : np.array
+        Target ACs.
+
+    Returns
+    -------
+    hitSums : np.array
+        (weapon x AC) sum of the hit chances.
+    critSums : np.array
+        (weapon x AC) sum of the threat chances times confirmation chances.
+
+    """
+
+    variants = ws.specsBatchParameters(specs)
+    n = len(specs)
+    col = lambda key: bt.numericColumn(variants, key, n, dtype=int)[:, np.newaxis, np.newaxis]
+    bab, mask = bt.babMatrix(variants, n)
+    bab = bab[:, :, np.newaxis]
+    mask = mask[:, :, np.newaxis]
+    acArray = np.asarray(acArray)[np.newaxis, np.newaxis, :]
+    hitChances, critChances = pr.attackChances(col("attackBonus"), col("critConfirmBonus"),
+                                               bab, acArray, col("critRange"), 0., 0.)
+    return np.sum(hitChances * mask, axis=1), np.sum(critChances * mask, axis=1)
+
+def calcProfiles(specs, profiles, acArray):
+    """
+    Calculates the average full attack damage of every weapon against every
+    profile for every target AC, see module docstring.
+
+    Parameters
+    ----------
+    specs : list
+        List of WeaponSpec objects.
+    profiles : dict
+        Profile table, see profileTable().
+    acArray : np.array
+        Target ACs.
+
+    Returns
+    -------
+    results : np.array
+        (weapon x profile x AC) array with the average full attack damage.
+
+    """
+
+    nProfiles = profiles["damageReduction"].size
+    if len(specs) == 0:
+        return np.zeros((0, nProfiles, np.size(acArray)))
+
+    # AC-dependent chances, shared by all profiles
+    hitSums, critSums = calcChanceSums(specs, acArray)
+
+    # Damage per hit and per critical hit of every (weapon, profile) pair
+    avgDamageHit, avgDamageCrit = bt.calcAverageDamage(pairVariants(specs, profiles))
+    avgDamageHit = avgDamageHit.reshape(len(specs), nProfiles)[:, :, np.newaxis]
+    avgDamageCrit = avgDamageCrit.reshape(len(specs), nProfiles)[:, :, np.newaxis]
+
+    # Failure chance applies to attack and confirmation roll, fortification
+    # to critical hits
+    success = (1 - profiles["failChance"])[np.newaxis, :, np.newaxis]
+    critFactor = success**2 * (1 - profiles["fortification"])[np.newaxis, :, np.newaxis]
+    return pr.expectedDamage(avgDamageHit, avgDamageCrit,
+                             success * hitSums[:, np.newaxis, :],
+                             critFactor * critSums[:, np.newaxis, :])
@@ -7,10 +7,29 @@ weapon.py provides the Weapon class for weapon representation.
 2020-12-29: Translated comments to English,
     refactored the groupDice*() functions to a single groupDice(diceList) function
     removed damageBonus argument from createDiceArray()
+2026-10-17: Replaced createDiceArray() by the convolution based distribution
+    engine in dice.py. Damage reduction is now exact for dice pools of any size.
+    hitChance() and critChance() use the vectorized kernels in probability.py,
+    calcAttacks() evaluates all attacks as a single (attack x AC) matrix.
+    Added optional on-disk result cache and cacheKey()
+    Weapon data is also accepted as np.array block of input cells
+    Parsing moved to weaponSpec.WeaponSpec, which can also be passed directly
+    Added setACRange() and setParameters() for incremental recalculation
+    Added instrumentation for profiling.py
+    Added chanceMatrices(), which shares the d20 table lookups of hit and
+    critical hit chances
+    Added dtype of the damage array, e.g. np.float32 for large sweeps
+    Fortification is calculated as exact mixture of hits with and without
+    precision damage dice, also with damage reduction and precision immunity
 """
 
+import hashlib
 import numpy as np
-import pandas as pd
+import dice as dc
+import probability as pr
+import profiling as prf
+import resultCache as rc
+import weaponSpec as ws
 
 class Weapon :
     """
@@ -18,20 +37,27 @@ class Weapon :
     Several weapons can be assembled in the form of an Attack object.
     """
     
-    def __init__(self, dfWeapon, minAC, maxAC):
+    @prf.timed("weapon")
+    def __init__(self, dfWeapon, minAC, maxAC, cache=None, dtype=np.float64):
         """
-        The constructor of the Weapon class takes a Pandas.DataFrame with all
-        important weapon data and sorts it into object variables.
+        The constructor of the Weapon class takes a block of input cells with
+        all important weapon data and sorts it into object variables.
 
         Parameters
         ----------
-        dfWeapon : pandas.DataFrame
-            DataFrame which contains every weapon property from the input file
-            for this single weapon.
+        dfWeapon : np.array, pandas.DataFrame or weaponSpec.WeaponSpec
+            Block of input cells which contains every weapon property from the
+            input file for this single weapon, or the already parsed WeaponSpec.
         minAC :    int
             Lower limit of target AC for calculations.
         maxAC :    int
             Upper limit of target AC for calculations.
+        cache :    resultCache.ResultCache, optional
+            On-disk result cache. If the weapon parameters are found in the
+            cache, the damage calculation is skipped. The default is None.
+        dtype :    numpy dtype, optional
+            Floating point type of self.attackResults. The calculation itself
+            always runs in float64. The default is np.float64.
 
         Returns
         -------
@@ -39,8 +65,59 @@ class Weapon :
         
         """
         
-        self.name = dfWeapon.iloc[0,0]                                          # Weapon name: Useful for distinction in the later results
-        self.baseDice = self.diceLineConversion(dfWeapon.iloc[1,:].values)      # Base Weapon Damage Dice
+        # Weapon data is parsed into an immutable WeaponSpec, unless one is
+        # passed directly
+        if isinstance(dfWeapon, ws.WeaponSpec):
+            spec = dfWeapon
+        else:
+            spec = ws.WeaponSpec.fromCells(dfWeapon)
+        self.applySpec(spec)
+        self.dtype = np.dtype(dtype)
+        
+        self.acRange = [minAC, maxAC]                                           # AC range to consider for damage calculations
+        self.acArray = np.arange(self.acRange[0], self.acRange[1]+1)
+        
+        # Reuse the results of an identical weapon from the result cache
+        cached = None
+        if cache is not None:
+            cached = cache.get(self.cacheKey())
+        if cached is not None:
+            self.avgDamageHit, self.avgDamageCrit, attackResults = cached
+            self.attackResults = np.asarray(attackResults).astype(self.dtype, copy=False)
+            return
+        
+        # Calculation of average damage per hit and per critical hit
+        # considering all damage dice and bonuses
+        self.avgDamageHit = self.calcDamageHit()
+        self.avgDamageCrit = self.calcDamageCrit()
+        
+        # Calculation of average damage array considering the given AC range
+        self.attackResults = self.calcAttacks()
+        
+        if cache is not None:
+            cache.put(self.cacheKey(), self.avgDamageHit, self.avgDamageCrit,
+                      self.attackResults)
+    
+    def applySpec(self, spec):
+        """
+        Sorts the parameters of a WeaponSpec into object variables and
+        calculates the overall damage bonuses for normal and critical hits.
+        Damage values are not recalculated.
+
+        Parameters
+        ----------
+        spec : weaponSpec.WeaponSpec
+            Parsed weapon parameters.
+
+        Returns
+        -------
+        None.
+        
+        """
+        
+        self.spec = spec
+        self.name = spec.name                                              # Weapon name: Useful for distinction in the later results
+        self.baseDice = list(spec.baseDice)                                # Base Weapon Damage Dice
         
         """
         The baseAttacks list contains as many elements as the weapon has
@@ -54,28 +131,23 @@ class Weapon :
         baseAttacks becomes [-2, -2, -7], while the (light) off-hand weapon
         (which is a separate Weapon object) gets [-2, -7].
         """
-        baseAttacksLine = dfWeapon.iloc[2,:].values
-        self.baseAttacks = []
-        for i in baseAttacksLine[~pd.isnull(baseAttacksLine)]:
-            self.baseAttacks.append(int(i))
-        
-        self.attackBonus = int(dfWeapon.iloc[3,0])                              # Overall Attack Bonus (BAB factored in)
-        self.damageBonus = int(dfWeapon.iloc[4,0])                              # Overall Damage Bonus
-        self.critRange = int(dfWeapon.iloc[5,0])                                # Critical Threat Range (minimum result of d20 which can threaten a critical hit)
-        self.critMultiplier = int(dfWeapon.iloc[6,0])                           # Critical Damage Multiplier
-        self.critConfirmBonus = int(dfWeapon.iloc[7,0])                         # Separate Attack Bonus for Critical Confirmation Rolls
-        self.precisionDice = self.diceLineConversion(dfWeapon.iloc[8,:].values) # Precision Damage Dice (e.g. Sneak Attack)
-        self.precisionDamage = int(dfWeapon.iloc[9,0])                          # Precision Damage Bonus
-        self.extraDice = self.diceLineConversion(dfWeapon.iloc[10,:].values)    # Additional Damage Dice (e.g. Flaming)
-        self.extraCritDice = self.diceLineConversion(dfWeapon.iloc[11,:].values)# Additional Critical Damage Dice (e.g. Flaming Burst)
-        self.extraDamage = int(dfWeapon.iloc[12,0])                             # Additional Damage that is not multiplied on a critical hit
-        self.extraCritDamage = int(dfWeapon.iloc[13,0])                         # Additional Damage that only comes in on a critical hit (not multiplied by Critical Damage Multiplier)
-        self.fortification = dfWeapon.iloc[14,0]*1e-2                           # Fortification -> Chance for critical hits or precision damage to be nullified.
-        self.precImmunity = dfWeapon.iloc[15,0]                                 # Immunity versus Precision Damage (0: not immune, 1: immune)
-        self.failChance = dfWeapon.iloc[16,0]*1e-2                              # Failure chance due to concealment or similar effects. Also affects confirmation rolls
-        self.damageReduction = int(dfWeapon.iloc[17,0])                         # Target Damage Reduction
-        self.acRange = [minAC, maxAC]                                           # AC range to consider for damage calculations
-        self.acArray = np.arange(self.acRange[0], self.acRange[1]+1)
+        self.baseAttacks = list(spec.baseAttacks)
+        
+        self.attackBonus = spec.attackBonus                                # Overall Attack Bonus (BAB factored in)
+        self.damageBonus = spec.damageBonus                                # Overall Damage Bonus
+        self.critRange = spec.critRange                                    # Critical Threat Range (minimum result of d20 which can threaten a critical hit)
+        self.critMultiplier = spec.critMultiplier                          # Critical Damage Multiplier
+        self.critConfirmBonus = spec.critConfirmBonus                      # Separate Attack Bonus for Critical Confirmation Rolls
+        self.precisionDice = list(spec.precisionDice)                      # Precision Damage Dice (e.g. Sneak Attack)
+        self.precisionDamage = spec.precisionDamage                        # Precision Damage Bonus
+        self.extraDice = list(spec.extraDice)                              # Additional Damage Dice (e.g. Flaming)
+        self.extraCritDice = list(spec.extraCritDice)                      # Additional Critical Damage Dice (e.g. Flaming Burst)
+        self.extraDamage = spec.extraDamage                                # Additional Damage that is not multiplied on a critical hit
+        self.extraCritDamage = spec.extraCritDamage                        # Additional Damage that only comes in on a critical hit (not multiplied by Critical Damage Multiplier)
+        self.fortification = spec.fortification                            # Fortification -> Chance for critical hits or precision damage to be nullified.
+        self.precImmunity = spec.precImmunity                              # Immunity versus Precision Damage (0: not immune, 1: immune)
+        self.failChance = spec.failChance                                  # Failure chance due to concealment or similar effects. Also affects confirmation rolls
+        self.damageReduction = spec.damageReduction                        # Target Damage Reduction
         
         # Calculation of overall damage bonus for normal and critical hits
         # from the individual damage bonuses
@@ -86,15 +158,80 @@ class Weapon :
         self.damageCrit = self.damageBonus * self.critMultiplier + self.precisionDamage + self.extraDamage + self.extraCritDamage
         if self.precImmunity == 0:
             self.damageCrit += self.precisionDamage
+    
+    def setACRange(self, minAC, maxAC):
+        """
+        Changes the AC range and recalculates the damage array. The average
+        damage per hit and per critical hit does not depend on the AC and is
+        kept.
+
+        Parameters
+        ----------
+        minAC : int
+            Lower limit of target AC for calculations.
+        maxAC : int
+            Upper limit of target AC for calculations.
+
+        Returns
+        -------
+        None.
         
-        # Calculation of average damage per hit and per critical hit
-        # considering all damage dice and bonuses
-        self.avgDamageHit = self.calcDamageHit()
-        self.avgDamageCrit = self.calcDamageCrit()
+        """
         
-        # Calculation of average damage array considering the given AC range
+        self.acRange = [minAC, maxAC]
+        self.acArray = np.arange(self.acRange[0], self.acRange[1]+1)
+        self.attackResults = self.calcAttacks()
+    
+    def setParameters(self, **changes):
+        """
+        Changes weapon parameters and recalculates only what depends on them:
+        The average damage per hit and per critical hit is only recalculated
+        if a parameter in ws.DAMAGE_FIELDS changed, the damage array is always
+        recalculated.
+
+        Parameters
+        ----------
+        **changes
+            New parameter values, named like the WeaponSpec parameters.
+
+        Returns
+        -------
+        None.
+        
+        """
+        
+        self.applySpec(self.spec.replace(**changes))
+        if any(k in ws.DAMAGE_FIELDS for k in changes):
+            self.avgDamageHit = self.calcDamageHit()
+            self.avgDamageCrit = self.calcDamageCrit()
         self.attackResults = self.calcAttacks()
     
+    def cacheKey(self):
+        """
+        Hash of every parsed weapon parameter that influences the results and
+        of the AC range, and of the dtype unless it is float64. The weapon
+        name is not part of the key, so renamed weapons still match their
+        cached results.
+
+        Returns
+        -------
+        key : str
+            Hexadecimal SHA-256 digest.
+        
+        """
+        
+        parameters = (rc.CACHE_VERSION, self.baseDice, self.baseAttacks,
+                      self.attackBonus, self.damageBonus, self.critRange,
+                      self.critMultiplier, self.critConfirmBonus,
+                      self.precisionDice, self.precisionDamage, self.extraDice,
+                      self.extraCritDice, self.extraDamage, self.extraCritDamage,
+                      float(self.fortification), float(self.precImmunity),
+                      float(self.failChance), self.damageReduction,
+                      list(self.acRange))
+        if self.dtype != np.float64:
+            parameters += (self.dtype.str,)
+        return hashlib.sha256(repr(parameters).encode()).hexdigest()
+    
     def diceLineConversion(self, line):
         """
         The input dice notation always occurs in pairs of table cells and every
@@ -106,7 +243,7 @@ class Weapon :
 
         Parameters
         ----------
-        line : pandas.DataFrame
+        line : np.array
             Input line which contains the dice description in cell pairs.
 
         Returns
@@ -118,17 +255,7 @@ class Weapon :
         
         """
         
-        # Remove NaN entries in the passed line
-        line = line[~pd.isnull(line)]
-        # Initialise empty list which takes the dice pairs as tuples
-        diceArray = []
-        # Cycle through non-NaN cells in pairs
-        for i in [2*x for x in range(int(line.size/2))]:
-            # Ignore any pair where one of the cells contains zero
-            if line[i] != 0 and line[i+1] != 0:
-                diceArray.append((int(line[i]),int(line[i+1])))
-        
-        return diceArray
+        return list(ws.diceLineConversion(line))
 
     def diceTupleToList(self, diceTupleList):
         """
@@ -200,12 +327,19 @@ class Weapon :
         print("Failure Chance:".ljust(justLength) + "{} %".format(self.failChance*1e2))
         print("Damage Reduction:".ljust(justLength) + "{}".format(self.damageReduction))
     
-    def listDiceHit(self):
+    def listDiceHit(self, precision=True):
         """
         This function generates a sorted list of all damage dice which need to
         be rolled on a normal hit.
         Example: 1d4 + 2d6 + 1d12 becomes [4, 6, 6, 12]
 
+        Parameters
+        ----------
+        precision : bool, optional
+            Include precision damage dice (unless the target is immune).
+            False gives the dice of a hit whose precision damage is nullified
+            by fortification. The default is True.
+
         Returns
         -------
         sorted(diceList) : list
@@ -218,7 +352,7 @@ class Weapon :
         for t in self.baseDice:
             for i in range(t[0]):
                 diceList.append(t[1])
-        if self.precImmunity == 0:
+        if self.precImmunity == 0 and precision:
             for t in self.precisionDice:
                 for i in range(t[0]):
                     diceList.append(t[1])
@@ -227,10 +361,16 @@ class Weapon :
                 diceList.append(t[1])
         return sorted(diceList)
         
-    def listDiceCrit(self):
+    def listDiceCrit(self, precision=True):
         """
         As listDiceHit(), but for critical hits
 
+        Parameters
+        ----------
+        precision : bool, optional
+            Include precision damage dice (unless the target is immune).
+            The default is True.
+
         Returns
         -------
         sorted(diceList) : list
@@ -244,7 +384,7 @@ class Weapon :
             for i in range(t[0]):
                 for j in range(self.critMultiplier):
                     diceList.append(t[1])
-        if self.precImmunity == 0:
+        if self.precImmunity == 0 and precision:
             for t in self.precisionDice:
                 for i in range(t[0]):
                     diceList.append(t[1])
@@ -276,18 +416,7 @@ class Weapon :
         
         # The input list is assumed to be sorted because every function that
         # generates such a list returns it sorted.
-        # list is initialised with the first entry from the passed dice list.
-        diceGroup = [[1, diceList[0]]]
-        
-        lastDice = diceList[0]
-        # Cycle through list
-        for d in diceList[1:]:
-            if d == lastDice:
-                diceGroup[-1][0] += 1
-            else:
-                diceGroup.append([1,d])
-            lastDice = d
-        return diceGroup
+        return dc.groupDice(diceList)
     
     def weaponStringHit(self):
         """
@@ -341,20 +470,16 @@ class Weapon :
         
         return s
     
+    @prf.timed("calcDamageHit")
     def calcDamageHit(self):
         """
         Calculation of average damage per normal hit from weapon properties.
-        This function generates a np.array with as many dimensions as damage dice
-        to calculate every possible dice outcome in order to accurately represent
-        the influence of damage reduction on the average damage since it can
-        not reduce damage dealt below zero, thus damage reduction vastly
-        complicates the damage calculation.
-        This array grows exponentially with amount of dice which quickly becomes
-        a problem with weapons that get several additional dice like sneak attacks.
-        The array size is capped to prevent calculation times of several minutes.
-        The program also checks if the damage reduction is actually able to
-        reduce damage dealt to zero, otherwise the creation of a dice array is
-        not necessary.
+        Damage reduction can not reduce damage dealt below zero, which vastly
+        complicates the damage calculation. The exact average is therefore
+        taken from the probability mass function of the dice pool, of which
+        dice.averageDamage() only builds the tail on the smaller side of the
+        damage reduction threshold, and only if the damage reduction is
+        actually able to reduce the minimum damage roll to zero.
 
         Returns
         -------
@@ -363,36 +488,21 @@ class Weapon :
         
         """
         
-        # Get dice list for normal hits
-        diceList = self.listDiceHit()
-        
-        # Two conditions need to be met for the program to create the complete
-        # dice array:
-        # The size of the array (= possible dice combinations) needs to be
-        # below 1e6 and the damage reduction must be greater than the minimum
-        # damage roll (every die rolls a one)
-        minDamage = len(diceList) + self.damageHit
-        if minDamage >= self.damageReduction or np.prod(diceList) > 1e6:
-            
-            # Without complete dice array, the average damage is calculated as
-            # average dice roll plus bonuses minus damage reduction
-            avgDamage = (self.calcDamageFromDice(diceList)
-                         + self.damageHit - self.damageReduction)
+        avgDamage = dc.averageDamage(self.listDiceHit(), self.damageHit,
+                                     self.damageReduction)
         
-        else:
-            print("Created complete dice array.")
-            diceArray = self.createDiceArray(diceList, self.damageHit)
-            avgDamage = np.sum(diceArray) / np.size(diceArray)
-        
-        # Extra condiction for fortification and precision damage dice
-        # This can slightly falsify the result with damage reduction
+        # Fortification nullifies the precision damage dice of a hit with the
+        # fortification chance: mixture of the hit with and without them, each
+        # with damage reduction applied.
         # Note: Fortification does not affect flat precision damage bonuses.
-        if self.fortification != 0:
-            avgDamage -= (self.fortification * 
-                self.calcDamageFromDice(self.diceTupleToList(self.precisionDice)))
+        if self.isFortified():
+            avgDamage = ((1 - self.fortification) * avgDamage + self.fortification
+                         * dc.averageDamage(self.listDiceHit(precision=False),
+                                            self.damageHit, self.damageReduction))
         
         return avgDamage
         
+    @prf.timed("calcDamageCrit")
     def calcDamageCrit(self):
         """
         As calcDamageHit(), but for critical hits.
@@ -404,96 +514,52 @@ class Weapon :
         
         """
         
-        # Get dice list for critical hits
-        diceList = self.listDiceCrit()
-        
-        # Two conditions need to be met for the program to create the complete
-        # dice array:
-        # The size of the array (= possible dice combinations) needs to be
-        # below 1e6 and the damage reduction must be greater than the minimum
-        # damage roll (every die rolls a one)
-        minDamage = len(diceList) + self.damageCrit
-        if minDamage >= self.damageReduction or np.prod(diceList) > 1e6:
-            avgDamage = (self.calcDamageFromDice(diceList)
-                         + self.damageCrit - self.damageReduction)
-        
-        else:
-            print("Created complete dice array.")
-            diceArray = self.createDiceArray(diceList, self.damageCrit)
-            avgDamage = np.sum(diceArray) / np.size(diceArray)
+        avgDamage = dc.averageDamage(self.listDiceCrit(), self.damageCrit,
+                                     self.damageReduction)
         
-        # Extra condiction for fortification and precision damage dice
-        # This can slightly falsify the result with damage reduction
-        # Note: Fortification does not affect flat precision damage bonuses.
-        if self.fortification != 0:
-            avgDamage -= (self.fortification * 
-                self.calcDamageFromDice(self.diceTupleToList(self.precisionDice)))
+        # Mixture with the critical hit without precision damage dice, see
+        # calcDamageHit()
+        if self.isFortified():
+            avgDamage = ((1 - self.fortification) * avgDamage + self.fortification
+                         * dc.averageDamage(self.listDiceCrit(precision=False),
+                                            self.damageCrit, self.damageReduction))
         
         return avgDamage
     
-    def calcDamageFromDice(self, diceList):
+    def isFortified(self):
         """
-        This function calculates the average dice roll according to this formula:
-        avg(xdy) = x * (y+1)/2.
-
-        Parameters
-        ----------
-        diceList : list
-            List of dice to calculate average damage from.
+        Checks whether fortification can nullify precision damage dice, which
+        needs a fortification chance, precision damage dice and a target that
+        is not immune to precision damage.
 
         Returns
         -------
-        damage : float
-            Average roll of given dice list.
+        bool
+            True if fortification affects the damage dice.
         
         """
         
-        damage = 0
-        for d in diceList:
-            damage += (d+1)/2
-        return damage
+        return (self.fortification != 0 and self.precImmunity == 0
+                and len(self.precisionDice) > 0)
     
-    def createDiceArray(self, diceList):
-        """
-        This function creates an array for a given list of dice with as many
-        dimensions as damage dice, where every dimension is as long als the
-        correspoding die has sides, which contains the result of every possible
-        roll combination with the array index indicating the single die result -1.
-        Damage bonuses and damage reduction are subsequently applied to this
-        array element-wise.
-        The array for 2d4+3 would look like this:
-            0   1   2   3
-        0   5   6   7   8
-        1   6   7   8   9
-        2   7   8   9   10
-        3   8   9   10  11
+    def calcDamageFromDice(self, diceList):
+        """
+        This function calculates the average dice roll according to this formula:
+        avg(xdy) = x * (y+1)/2.
 
         Parameters
         ----------
         diceList : list
-            List of dice to create array from.
+            List of dice to calculate average damage from.
 
         Returns
         -------
-        diceArray : np.array
-            Array filled with the sum of every possible dice roll combination.
+        damage : float
+            Average roll of given dice list.
         
         """
         
-        diceArray = np.zeros(tuple(diceList), dtype=int)
-        
-        # nditer is a powerful iterator that iterates over every single array
-        # element and is able to access the indices of every element in order
-        # to calculate the dice results from them.
-        it = np.nditer(diceArray, op_flags=['readwrite'], flags=['multi_index'])
-        
-        # len(diceList) is the offset between the sum of array indices and actual
-        # result, since arrays start indexing at zero and dice start at one.
-        damageMod = len(diceList) + self.damageHit - self.damageReduction
-        for x in it:
-            x[...] = max(np.sum(it.multi_index) + damageMod, 0)
-    
-        return diceArray
+        return dc.averageDice(diceList)
     
     def hitChance(self, bab):
         """
@@ -513,18 +579,7 @@ class Weapon :
         
         """
         
-        result = np.zeros(self.acArray.size,)
-        for i in range(len(result)):
-            ac = self.acArray[i]
-            baseChance = (self.attackBonus + 21 + bab - ac) * 0.05
-            
-            # Chance is capped at 5% and 9% due to auto-hit and auto-miss
-            if baseChance > 0.95:
-                baseChance = 0.95
-            elif baseChance < 0.05:
-                baseChance = 0.05
-            result[i] = baseChance * (1 - self.failChance)
-        return result
+        return pr.hitChance(self.attackBonus, bab, self.acArray, self.failChance)
         
     def critChance(self, bab):
         """
@@ -542,30 +597,31 @@ class Weapon :
         
         """
         
-        result = np.zeros(self.acArray.size,)
-        maxThreat = (21-self.critRange) * 0.05
-        for i in range(len(result)):
-            ac = self.acArray[i]
-            
-            # Threat chance is calculated similarly to hit chance
-            baseChance = (self.attackBonus + 21 + bab - ac) * 0.05
-            if baseChance > maxThreat:
-                baseChance = maxThreat
-            elif baseChance < 0.05:
-                baseChance = 0.05
-            threatChance = baseChance * (1 - self.failChance)
-            
-            # Chance of confirmation
-            # baseChance is an auxiliary variable and can be overwritten safely
-            baseChance = (self.attackBonus + self.critConfirmBonus + 21 + bab - ac) * 0.05
-            # Chance is capped at 5% and 9% due to auto-hit and auto-miss
-            # Auto-hit, auto-miss and failure chance are applied to confirmation rolls
-            if baseChance > 0.95:
-                baseChance = 0.95
-            elif baseChance < 0.05:
-                baseChance = 0.05
-            result[i] = threatChance * baseChance * (1 - self.failChance) * (1 - self.fortification)
-        return result
+        return pr.critChance(self.attackBonus, self.critConfirmBonus, bab,
+                             self.acArray, self.critRange, self.failChance,
+                             self.fortification)
+    
+    def chanceMatrices(self):
+        """
+        Hit chances and critical hit chances of every attack in
+        self.baseAttacks from a single roll index, see
+        probability.attackChances().
+
+        Returns
+        -------
+        hitChances : np.array
+            (attack x AC) matrix of hit chances, one row per entry of
+            self.baseAttacks.
+        critChances : np.array
+            (attack x AC) matrix of critical hit chances, one row per entry of
+            self.baseAttacks.
+        
+        """
+        
+        bab = np.array(self.baseAttacks, dtype=int)[:, np.newaxis]
+        return pr.attackChances(self.attackBonus, self.critConfirmBonus, bab,
+                                self.acArray[np.newaxis, :], self.critRange,
+                                self.failChance, self.fortification)
     
     def calcAttacks(self):
         """
@@ -576,17 +632,25 @@ class Weapon :
         Returns
         -------
         attackResults : np.array
-            Average damage of weapon, corresponding to target AC.
+            Average damage of weapon, corresponding to target AC, in
+            self.dtype.
 
         """
         
-        attackResults = np.zeros((self.acArray.size, len(self.baseAttacks)+1))
-        
-        for b in range(len(self.baseAttacks)):
-            bab = self.baseAttacks[b]
-            hitChances = self.hitChance(bab)
-            critChances = self.critChance(bab)
-            attackResults[:,b+1] = self.avgDamageHit * hitChances + (self.avgDamageCrit - self.avgDamageHit) * critChances
-            attackResults[:,0] = attackResults[:,0] + attackResults[:,b+1]
+        with prf.stage("calcAttacks", weapon=self.name,
+                       attacks=len(self.baseAttacks), acs=int(self.acArray.size)) as record:
+            attackResults = np.zeros((self.acArray.size, len(self.baseAttacks)+1),
+                                     dtype=self.dtype)
+            
+            # Damage of every attack at every AC, computed as (attack x AC) matrix
+            damage = pr.expectedDamage(self.avgDamageHit, self.avgDamageCrit,
+                                       *self.chanceMatrices())
+            attackResults[:,1:] = damage.transpose()
+            attackResults[:,0] = np.sum(damage, axis=0)
+            if prf.isEnabled():
+                # Dice pool sizes and allocated array sizes for the report
+                record["diceHit"] = len(self.listDiceHit())
+                record["diceCrit"] = len(self.listDiceCrit())
+                record["arrayBytes"] = attackResults.nbytes + damage.nbytes
             
         return attackResults
@@ -0,0 +1,482 @@
+# -*- coding: utf-8 -*-
+
+"""
+weaponSpec.py provides the WeaponSpec class, a compact and immutable record of
+the parsed parameters of a single weapon, decoupled from pandas.
+
+A WeaponSpec can be created from a block of input cells, a dict, JSON or a
+record of a structured np.array with SPEC_DTYPE. specsToArray() stores a
+whole sheet (or a sweep of variants) as one structured array of 74 bytes per
+weapon, weapon names are kept in a separate list. The array form is lossless:
+fromRecord(toRecord()) gives back an equal WeaponSpec.
+
+fortification and failChance are stored as fractions (0 to 1) like the
+attributes of Weapon, while the input file gives them in percent.
+
+*** Recent Changes: ***
+2026-10-17: First Version, parsing moved from Weapon.__init__
+    Added DAMAGE_FIELDS
+    Added specsBatchParameters()
+    fortification and failChance are stored as float64 in SPEC_DTYPE, so that
+    records round-trip exactly
+"""
+
+import json
+
+import numpy as np
+
+import dice as dc
+
+# Maximum number of dice terms per dice parameter and maximum number of
+# attacks in a full attack that fit into the structured array form
+MAX_DICE_TERMS = 4
+MAX_ATTACKS = 8
+
+# Names of the dice parameters, which are stored as (number, sides) tuples
+DICE_FIELDS = ("baseDice", "precisionDice", "extraDice", "extraCritDice")
+
+# Every parameter in the order of the input file (without the weapon name)
+FIELDS = ("baseDice", "baseAttacks", "attackBonus", "damageBonus", "critRange",
+          "critMultiplier", "critConfirmBonus", "precisionDice",
+          "precisionDamage", "extraDice", "extraCritDice", "extraDamage",
+          "extraCritDamage", "fortification", "precImmunity", "failChance",
+          "damageReduction")
+
+# Parameters which influence the average damage per hit and per critical hit.
+# All other parameters only influence hit and critical hit chances.
+DAMAGE_FIELDS = ("baseDice", "damageBonus", "critMultiplier", "precisionDice",
+                 "precisionDamage", "extraDice", "extraCritDice", "extraDamage",
+                 "extraCritDamage", "fortification", "precImmunity",
+                 "damageReduction")
+
+# Compact structured array form of a WeaponSpec
+SPEC_DTYPE = np.dtype([
+    ("baseDice", np.int8, (MAX_DICE_TERMS, 2)),
+    ("numberAttacks", np.int8),
+    ("baseAttacks", np.int8, (MAX_ATTACKS,)),
+    ("attackBonus", np.int16),
+    ("damageBonus", np.int16),
+    ("critRange", np.int8),
+    ("critMultiplier", np.int8),
+    ("critConfirmBonus", np.int16),
+    ("precisionDice", np.int8, (MAX_DICE_TERMS, 2)),
+    ("precisionDamage", np.int16),
+    ("extraDice", np.int8, (MAX_DICE_TERMS, 2)),
+    ("extraCritDice", np.int8, (MAX_DICE_TERMS, 2)),
+    ("extraDamage", np.int16),
+    ("extraCritDamage", np.int16),
+    ("fortification", np.float64),
+    ("precImmunity", np.bool_),
+    ("failChance", np.float64),
+    ("damageReduction", np.int16),
+    ])
+
+
+def diceLineConversion(line):
+    """
+    The input dice notation always occurs in pairs of table cells and every
+    row with dice notation can contain no, one or more of those pairs.
+    A dice pair is always <first cell>d<second cell>.
+    This function returns a tuple of 2-tuples containing these dice pairs.
+
+    Parameters
+    ----------
+    line : np.array
+        Input line which contains the dice description in cell pairs, empty
+        cells are NaN.
+
+    Returns
+    -------
+    diceArray : tuple
+        Tuple of 2-tuples which describe the dice number and types given
+        in a single line of the input file, in the form of
+        a1db1, a2db2 -> ((a1,b1), (a2,b2)).
+
+    """
+
+    # Remove NaN entries (NaN is not equal to itself)
+    line = [v for v in line if v == v]
+    diceArray = []
+    # Cycle through non-NaN cells in pairs
+    for i in range(0, len(line) - 1, 2):
+        # Ignore any pair where one of the cells contains zero
+        if line[i] != 0 and line[i+1] != 0:
+            diceArray.append((int(line[i]), int(line[i+1])))
+    return tuple(diceArray)
+
+def toDiceTuples(value):
+    """
+    Converts a dice expression like "2d6+1d8" or a list of dice pairs to a
+    tuple of (number, sides) tuples.
+
+    Parameters
+    ----------
+    value : str or list
+        Dice expression or list of dice pairs.
+
+    Returns
+    -------
+    tuple
+        Tuple of (number, sides) tuples.
+
+    """
+
+    if isinstance(value, str):
+        value = dc.parseDice(value)
+    return tuple((int(t[0]), int(t[1])) for t in value if t[0] != 0 and t[1] != 0)
+
+
+class WeaponSpec:
+    """
+    The WeaponSpec class holds the parsed parameters of a single weapon. It is
+    immutable and hashable, so it can be used as dictionary key.
+    """
+
+    __slots__ = ("name",) + FIELDS
+
+    def __init__(self, name="", baseDice=(), baseAttacks=(0,), attackBonus=0,
+                 damageBonus=0, critRange=20, critMultiplier=2,
+                 critConfirmBonus=0, precisionDice=(), precisionDamage=0,
+                 extraDice=(), extraCritDice=(), extraDamage=0,
+                 extraCritDamage=0, fortification=0., precImmunity=0,
+                 failChance=0., damageReduction=0):
+        """
+        Every argument corresponds to the Weapon attribute of the same name.
+        Dice arguments accept a list of (number, sides) pairs or a dice
+        expression like "2d6+1d8".
+
+        Returns
+        -------
+        None.
+
+        """
+
+        values = {
+            "name": str(name),
+            "baseDice": toDiceTuples(baseDice),
+            "baseAttacks": tuple(int(b) for b in baseAttacks),
+            "attackBonus": int(attackBonus),
+            "damageBonus": int(damageBonus),
+            "critRange": int(critRange),
+            "critMultiplier": int(critMultiplier),
+            "critConfirmBonus": int(critConfirmBonus),
+            "precisionDice": toDiceTuples(precisionDice),
+            "precisionDamage": int(precisionDamage),
+            "extraDice": toDiceTuples(extraDice),
+            "extraCritDice": toDiceTuples(extraCritDice),
+            "extraDamage": int(extraDamage),
+            "extraCritDamage": int(extraCritDamage),
+            "fortification": float(fortification),
+            "precImmunity": int(precImmunity),
+            "failChance": float(failChance),
+            "damageReduction": int(damageReduction),
+            }
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("WeaponSpec is immutable, use replace() instead")
+
+    def __reduce__(self):
+        # Pickling (e.g. for worker processes) recreates the object through
+        # the constructor, since __setattr__ is blocked
+        return (WeaponSpec, self.key())
+
+    def __eq__(self, other):
+        return isinstance(other, WeaponSpec) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return "WeaponSpec({})".format(", ".join(
+            "{}={!r}".format(k, v) for k, v in self.toDict().items()))
+
+    def key(self):
+        """
+        Tuple of every slot, used for comparison and hashing.
+
+        Returns
+        -------
+        tuple
+            Name followed by every parameter in the order of FIELDS.
+
+        """
+
+        return tuple(getattr(self, k) for k in self.__slots__)
+
+    def replace(self, **changes):
+        """
+        Creates a copy of the WeaponSpec with some parameters changed.
+
+        Parameters
+        ----------
+        **changes
+            New parameter values.
+
+        Returns
+        -------
+        WeaponSpec
+            Changed copy.
+
+        """
+
+        values = self.toDict()
+        values.update(changes)
+        return WeaponSpec(**values)
+
+    def toDict(self):
+        """
+        Returns
+        -------
+        dict
+            Name and every parameter, dice as lists of [number, sides] lists.
+
+        """
+
+        values = {}
+        for k in self.__slots__:
+            v = getattr(self, k)
+            if k in DICE_FIELDS:
+                v = [list(t) for t in v]
+            elif k == "baseAttacks":
+                v = list(v)
+            values[k] = v
+        return values
+
+    def toJson(self):
+        """
+        Returns
+        -------
+        str
+            JSON object with the content of toDict().
+
+        """
+
+        return json.dumps(self.toDict())
+
+    def toRecord(self):
+        """
+        Converts the parameters to a single element of a structured array
+        with SPEC_DTYPE. The weapon name is not part of the record.
+
+        Returns
+        -------
+        record : np.array
+            0-dimensional structured array.
+
+        """
+
+        record = np.zeros((), dtype=SPEC_DTYPE)
+        for k in FIELDS:
+            v = getattr(self, k)
+            if k in DICE_FIELDS:
+                if len(v) > MAX_DICE_TERMS:
+                    raise ValueError("{} has more than {} dice terms".format(
+                        k, MAX_DICE_TERMS))
+                if len(v) > 0:
+                    record[k][:len(v)] = v
+            elif k == "baseAttacks":
+                if len(v) > MAX_ATTACKS:
+                    raise ValueError("baseAttacks has more than {} attacks".format(
+                        MAX_ATTACKS))
+                record["numberAttacks"] = len(v)
+                record[k][:len(v)] = v
+            else:
+                record[k] = v
+        return record
+
+    @classmethod
+    def fromDict(cls, values):
+        """
+        Parameters
+        ----------
+        values : dict
+            Name and parameters as keyword arguments of WeaponSpec. Missing
+            parameters take their default value.
+
+        Returns
+        -------
+        WeaponSpec
+
+        """
+
+        return cls(**values)
+
+    @classmethod
+    def fromJson(cls, text):
+        """
+        Parameters
+        ----------
+        text : str
+            JSON object as given by toJson().
+
+        Returns
+        -------
+        WeaponSpec
+
+        """
+
+        return cls.fromDict(json.loads(text))
+
+    @classmethod
+    def fromRecord(cls, record, name=""):
+        """
+        Parameters
+        ----------
+        record : np.void or np.array
+            Single element of a structured array with SPEC_DTYPE.
+        name : str, optional
+            Weapon name. The default is "".
+
+        Returns
+        -------
+        WeaponSpec
+
+        """
+
+        values = {"name": name}
+        for k in FIELDS:
+            v = record[k]
+            if k in DICE_FIELDS:
+                v = [t for t in v.tolist() if t[0] != 0]
+            elif k == "baseAttacks":
+                v = v[:int(record["numberAttacks"])]
+            values[k] = v
+        return cls(**values)
+
+    @classmethod
+    def fromCells(cls, values):
+        """
+        Parses a block of input cells as given by inputWeapons.readInputWeapons().
+        Every row contains one weapon property, dice rows and the row of
+        baseAttacks can span several columns.
+
+        Parameters
+        ----------
+        values : np.array or pandas.DataFrame
+            Cells of a single weapon, empty cells are NaN.
+
+        Returns
+        -------
+        WeaponSpec
+
+        """
+
+        values = np.asarray(getattr(values, "values", values), dtype=object)
+        return cls(
+            name=values[0,0],                                   # Weapon name: Useful for distinction in the later results
+            baseDice=diceLineConversion(values[1,:]),           # Base Weapon Damage Dice
+            baseAttacks=[v for v in values[2,:] if v == v],     # BAB penalties of every attack in a full attack
+            attackBonus=values[3,0],                            # Overall Attack Bonus (BAB factored in)
+            damageBonus=values[4,0],                            # Overall Damage Bonus
+            critRange=values[5,0],                              # Critical Threat Range (minimum result of d20 which can threaten a critical hit)
+            critMultiplier=values[6,0],                         # Critical Damage Multiplier
+            critConfirmBonus=values[7,0],                       # Separate Attack Bonus for Critical Confirmation Rolls
+            precisionDice=diceLineConversion(values[8,:]),      # Precision Damage Dice (e.g. Sneak Attack)
+            precisionDamage=values[9,0],                        # Precision Damage Bonus
+            extraDice=diceLineConversion(values[10,:]),         # Additional Damage Dice (e.g. Flaming)
+            extraCritDice=diceLineConversion(values[11,:]),     # Additional Critical Damage Dice (e.g. Flaming Burst)
+            extraDamage=values[12,0],                           # Additional Damage that is not multiplied on a critical hit
+            extraCritDamage=values[13,0],                       # Additional Damage that only comes in on a critical hit
+            fortification=values[14,0]*1e-2,                    # Fortification in percent
+            precImmunity=values[15,0],                          # Immunity versus Precision Damage (0: not immune, 1: immune)
+            failChance=values[16,0]*1e-2,                       # Failure chance in percent
+            damageReduction=values[17,0],                       # Target Damage Reduction
+            )
+
+
+def specsToArray(specs):
+    """
+    Stores a list of WeaponSpec objects in one structured array.
+
+    Parameters
+    ----------
+    specs : list
+        List of WeaponSpec objects.
+
+    Returns
+    -------
+    array : np.array
+        Structured array with SPEC_DTYPE, one element per spec.
+
+    """
+
+    array = np.zeros(len(specs), dtype=SPEC_DTYPE)
+    for i, spec in enumerate(specs):
+        array[i] = spec.toRecord()
+    return array
+
+def arrayToSpecs(array, names=None):
+    """
+    Converts a structured array with SPEC_DTYPE back to WeaponSpec objects.
+
+    Parameters
+    ----------
+    array : np.array
+        Structured array with SPEC_DTYPE.
+    names : list, optional
+        Weapon names, one per element. The default is None (empty names).
+
+    Returns
+    -------
+    list
+        List of WeaponSpec objects.
+
+    """
+
+    if names is None:
+        names = [""] * len(array)
+    return [WeaponSpec.fromRecord(r, n) for r, n in zip(array, names)]
+
+def batchParameters(array):
+    """
+    Converts a structured array with SPEC_DTYPE to the struct of arrays that
+    batch.calcBatch() accepts, without creating WeaponSpec objects for the
+    numerical parameters.
+
+    Parameters
+    ----------
+    array : np.array
+        Structured array with SPEC_DTYPE.
+
+    Returns
+    -------
+    variants : dict
+        Batch parameters.
+
+    """
+
+    variants = {}
+    for k in FIELDS:
+        if k in DICE_FIELDS:
+            variants[k] = [[t for t in d if t[0] != 0] for d in array[k].tolist()]
+        elif k == "baseAttacks":
+            variants[k] = [b[:n] for b, n in zip(array[k].tolist(),
+                                                 array["numberAttacks"].tolist())]
+        else:
+            variants[k] = array[k]
+    return variants
+
+def specsBatchParameters(specs):
+    """
+    Converts a list of WeaponSpec objects to the struct of arrays that
+    batch.calcBatch() accepts. Unlike batchParameters(), the number of dice
+    terms and attacks is not limited.
+
+    Parameters
+    ----------
+    specs : list
+        List of WeaponSpec objects.
+
+    Returns
+    -------
+    variants : dict
+        Batch parameters.
+
+    """
+
+    variants = {}
+    for k in FIELDS:
+        variants[k] = [getattr(spec, k) for spec in specs]
+    return variants